@@ -0,0 +1,73 @@
+"""
+Compares two load-test result files written by benchmarks/loadgen.py.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Exits with status 1 when any metric regresses by more than the threshold.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+# metric path -> True when higher is better
+METRICS = {
+    ("rps",): True,
+    ("latency_ms", "p50"): False,
+    ("latency_ms", "p95"): False,
+    ("latency_ms", "p99"): False,
+    ("cpu_ms_per_request",): False,
+}
+
+
+def _get(result: dict[str, Any], path: tuple[str, ...]) -> float:
+    value: Any = result
+    for key in path:
+        value = value[key]
+    return float(value)
+
+
+def compare(baseline: dict[str, Any], candidate: dict[str, Any], threshold: float) -> tuple[list[dict[str, Any]], bool]:
+    rows = []
+    regressed = False
+    for path, higher_is_better in METRICS.items():
+        before, after = _get(baseline, path), _get(candidate, path)
+        change = (after - before) / before if before else 0.0
+        worse = -change if higher_is_better else change
+        is_regression = worse > threshold
+        regressed = regressed or is_regression
+        rows.append(
+            {
+                "metric": ".".join(path),
+                "baseline": before,
+                "candidate": after,
+                "change": change,
+                "regression": is_regression,
+            }
+        )
+    return rows, regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two AFRelay load-test results.")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression (0.10 = 10%%).")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text())
+    candidate = json.loads(args.candidate.read_text())
+    if baseline["scenario"] != candidate["scenario"]:
+        sys.exit(f"Scenario mismatch: {baseline['scenario']} vs {candidate['scenario']}")
+
+    rows, regressed = compare(baseline, candidate, args.threshold)
+    print(f"{baseline['scenario']}: {baseline.get('git_revision')} -> {candidate.get('git_revision')}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"  {row['metric']:<20} {row['baseline']:>12.3f} {row['candidate']:>12.3f} {row['change']:>+8.1%}{flag}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
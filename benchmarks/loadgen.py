@@ -0,0 +1,401 @@
+"""
+Load generator for AFRelay against the mock AFIP in benchmarks/mock_afip.py.
+
+The relay runs in-process behind httpx's ASGI transport, wired to the
+mock WSDLs exactly like the integration tests. Results go to
+benchmarks/results/<scenario>-<timestamp>.json and can be diffed with
+benchmarks/compare.py.
+
+    python -m benchmarks.loadgen --scenario invoices --concurrency 32 --requests 2000
+    python -m benchmarks.loadgen --scenario all --latency-ms 120 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from benchmarks.mock_afip import MOCKS_DIR, SERVICES
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+BASE_CUIT = 30740253022
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100.0 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ===================
+# == RELAY WIRING ===
+# ===================
+
+def build_relay(state_dir: Path):
+    """Imports the app and points it at the mock WSDLs, test credentials and a scratch state DB."""
+    import config.paths
+    from config.paths import AfipPaths
+    from service.api.app import app
+    from service.caea_resilience import db
+    from service.soap_client.async_client import (WSFEClientManager,
+                                                  WSPCIClientManager)
+    from service.utils.jwt_validator import verify_token
+
+    paths = AfipPaths(base_xml=MOCKS_DIR, base_crypto=MOCKS_DIR, base_certs=MOCKS_DIR)
+    config.paths.get_afip_paths = lambda: paths
+    db.DB_PATH = state_dir / "afrelay_state.db"
+    db.init_db()
+
+    WSFEClientManager.reset_singleton()
+    WSPCIClientManager.reset_singleton()
+    WSFEClientManager(str(MOCKS_DIR / SERVICES["wsfe"][0]))
+    WSPCIClientManager(str(MOCKS_DIR / SERVICES["wspci"][0]))
+
+    async def bench_auth():
+        return {"user": "bench", "roles": ["bench"]}
+
+    app.dependency_overrides[verify_token] = bench_auth
+    return app
+
+
+async def close_relay() -> None:
+    from service.soap_client.async_client import (WSFEClientManager,
+                                                  WSPCIClientManager)
+
+    for manager_cls in (WSFEClientManager, WSPCIClientManager):
+        if manager_cls._instance is not None:
+            await manager_cls._instance.close()
+        manager_cls.reset_singleton()
+
+
+# ===================
+# ==== SCENARIOS ====
+# ===================
+
+def _invoice_detail(nro: int) -> dict[str, Any]:
+    return {
+        "Concepto": 1,
+        "DocTipo": 99,
+        "DocNro": 0,
+        "CbteDesde": nro,
+        "CbteHasta": nro,
+        "CbteFch": datetime.now().strftime("%Y%m%d"),
+        "ImpTotal": 121.0,
+        "ImpNeto": 100.0,
+        "ImpTotConc": 0.0,
+        "ImpOpEx": 0.0,
+        "ImpTrib": 0.0,
+        "ImpIVA": 21.0,
+        "MonId": "PES",
+        "MonCotiz": 1,
+        "CondicionIVAReceptorId": 5,
+        "Iva": {"AlicIva": [{"Id": 5, "BaseImp": 100.0, "Importe": 21.0}]},
+    }
+
+
+class Scenario:
+    name = ""
+
+    def __init__(self, cuits: int) -> None:
+        self.cuits = [BASE_CUIT + i for i in range(cuits)]
+
+    def cuit(self, i: int) -> int:
+        return self.cuits[i % len(self.cuits)]
+
+    async def setup(self, client: httpx.AsyncClient, total: int) -> None:
+        pass
+
+    async def run_one(self, client: httpx.AsyncClient, i: int) -> tuple[int, bool]:
+        """Returns (units of work done, ok)."""
+        raise NotImplementedError
+
+
+def _ok(resp: httpx.Response) -> bool:
+    if resp.status_code != 200:
+        return False
+    body = resp.json()
+    return not (isinstance(body, dict) and body.get("status") == "error")
+
+
+class InvoicesScenario(Scenario):
+    name = "invoices"
+
+    async def run_one(self, client: httpx.AsyncClient, i: int) -> tuple[int, bool]:
+        payload = {
+            "Auth": {"Cuit": self.cuit(i)},
+            "FeCAEReq": {
+                "FeCabReq": {"CantReg": 1, "PtoVta": 1, "CbteTipo": 6},
+                "FeDetReq": {"FECAEDetRequest": [_invoice_detail(i + 1)]},
+            },
+        }
+        resp = await client.post("/wsfe/invoices", json=payload)
+        return 1, _ok(resp)
+
+
+class ParamsScenario(Scenario):
+    name = "params"
+    paths = ("/wsfe/params/types-cbte", "/wsfe/params/types-doc", "/wsfe/params/types-iva", "/wsfe/params/types-monedas")
+
+    async def run_one(self, client: httpx.AsyncClient, i: int) -> tuple[int, bool]:
+        resp = await client.post(self.paths[i % len(self.paths)], json={"Cuit": self.cuit(i)})
+        return 1, _ok(resp)
+
+
+async def _activate_cycles(cuits: list[int]) -> dict[int, int]:
+    from service.caea_resilience import repository as repo
+    from service.caea_resilience.bootstrap import \
+        resolve_current_and_next_cycles
+
+    periodo, orden = resolve_current_and_next_cycles()[0]
+    cycle_ids = {}
+    for cuit in cuits:
+        cycle = repo.create_cycle(cuit=cuit, periodo=periodo, orden=orden)
+        repo.update_cycle_from_afip(cycle["id"], {"ResultGet": {"CAEA": "61234567890123"}}, status="active")
+        cycle_ids[cuit] = cycle["id"]
+    return cycle_ids
+
+
+def _issue_local_payload(cycle_id: int, cuit: int) -> dict[str, Any]:
+    detail = _invoice_detail(0)
+    detail["CAEA"] = "61234567890123"
+    return {
+        "CycleId": cycle_id,
+        "Cuit": cuit,
+        "PtoVta": 1,
+        "CbteTipo": 6,
+        "FeCAEARegInfReq": {
+            "FeCabReq": {"CantReg": 1, "PtoVta": 1, "CbteTipo": 6},
+            "FeDetReq": {"FECAEADetRequest": [detail]},
+        },
+    }
+
+
+class CaeaIssueScenario(Scenario):
+    name = "caea_issue"
+
+    async def setup(self, client: httpx.AsyncClient, total: int) -> None:
+        self.cycle_ids = await _activate_cycles(self.cuits)
+
+    async def run_one(self, client: httpx.AsyncClient, i: int) -> tuple[int, bool]:
+        cuit = self.cuit(i)
+        resp = await client.post("/wsfe/caea/queue/issue-local", json=_issue_local_payload(self.cycle_ids[cuit], cuit))
+        return 1, resp.status_code == 200
+
+
+class OutboxDrainScenario(Scenario):
+    """Queues `total` INFORM jobs during setup, then times draining them in batches."""
+
+    name = "outbox_drain"
+    batch = 20
+
+    async def setup(self, client: httpx.AsyncClient, total: int) -> None:
+        cycle_ids = await _activate_cycles(self.cuits)
+        for i in range(total):
+            cuit = self.cuit(i)
+            await client.post("/wsfe/caea/queue/issue-local", json=_issue_local_payload(cycle_ids[cuit], cuit))
+
+    async def run_one(self, client: httpx.AsyncClient, i: int) -> tuple[int, bool]:
+        from service.caea_resilience.outbox_worker import \
+            process_pending_outbox_jobs
+
+        result = await process_pending_outbox_jobs(limit=self.batch)
+        return result["processed"], result["processed"] == result["done"]
+
+
+SCENARIOS: dict[str, type[Scenario]] = {
+    cls.name: cls for cls in (InvoicesScenario, ParamsScenario, CaeaIssueScenario, OutboxDrainScenario)
+}
+
+
+# ===================
+# ===== RUNNER ======
+# ===================
+
+async def _drive(
+    run_one: Callable[[int], Awaitable[tuple[int, bool]]],
+    total: int,
+    concurrency: int,
+) -> tuple[list[float], int, int, Counter]:
+    latencies: list[float] = []
+    units = 0
+    errors = 0
+    exceptions: Counter = Counter()
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal units, errors, next_index
+        while next_index < total:
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                done, ok = await run_one(i)
+            except Exception as exc:
+                done, ok = 1, False
+                exceptions[type(exc).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            units += done
+            errors += 0 if ok else 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, units, errors, exceptions
+
+
+async def run_scenario(name: str, total: int, concurrency: int, cuits: int, warmup: int) -> dict[str, Any]:
+    scenario = SCENARIOS[name](cuits)
+    with tempfile.TemporaryDirectory() as state_dir:
+        app = build_relay(Path(state_dir))
+        try:
+            async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60.0) as client:
+                if name == OutboxDrainScenario.name:
+                    await scenario.setup(client, total)
+                    # One call drains a batch: drive batches until the queue is empty.
+                    total, concurrency = -(-total // OutboxDrainScenario.batch), 1
+                else:
+                    await scenario.setup(client, total + warmup)
+                    await _drive(lambda i: scenario.run_one(client, i), warmup, concurrency)
+
+                cpu_started = time.process_time()
+                wall_started = time.perf_counter()
+                latencies, units, errors, exceptions = await _drive(
+                    lambda i: scenario.run_one(client, warmup + i), total, concurrency
+                )
+                wall_s = time.perf_counter() - wall_started
+                cpu_s = time.process_time() - cpu_started
+        finally:
+            await close_relay()
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "units": units,
+        "errors": errors,
+        "exceptions": dict(exceptions),
+        "duration_s": round(wall_s, 3),
+        "rps": round(units / wall_s, 2) if wall_s else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        # Includes the load generator: relay and client share this process.
+        "cpu_ms_per_request": round(cpu_s * 1000.0 / units, 3) if units else 0.0,
+        "concurrency": concurrency,
+    }
+
+
+def _wait_for_ports(timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    for _, port in SERVICES.values():
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                    break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Mock AFIP did not start listening on port {port}")
+                time.sleep(0.1)
+
+
+def start_mock(args: argparse.Namespace) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "benchmarks.mock_afip",
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+        "--fault-rate", str(args.fault_rate),
+    ]
+    if args.seed is not None:
+        cmd += ["--seed", str(args.seed)]
+    process = subprocess.Popen(cmd)
+    try:
+        _wait_for_ports()
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test AFRelay against a mock AFIP.")
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="invoices")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--cuits", type=int, default=8, help="Spread load over this many CUITs.")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=25.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--fault-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-mock", action="store_true", help="Mock AFIP is already running.")
+    parser.add_argument("--output", type=Path, default=None, help="Result file (single scenario only).")
+    args = parser.parse_args()
+
+    # Keep per-request INFO logs out of the measurement.
+    logging.getLogger().setLevel(logging.WARNING)
+    from service.utils.logger import logger
+    logger.setLevel(logging.WARNING)
+
+    mock = None if args.no_mock else start_mock(args)
+    try:
+        names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+        for name in names:
+            result = asyncio.run(run_scenario(name, args.requests, args.concurrency, args.cuits, args.warmup))
+            result.update(
+                {
+                    "started_at": datetime.now(timezone.utc).isoformat(),
+                    "git_revision": _git_revision(),
+                    "python": platform.python_version(),
+                    "cpu_count": os.cpu_count(),
+                    "mock": {
+                        "latency_ms": args.latency_ms,
+                        "jitter_ms": args.jitter_ms,
+                        "error_rate": args.error_rate,
+                        "fault_rate": args.fault_rate,
+                    },
+                }
+            )
+            output = args.output if args.output and len(names) == 1 else None
+            if output is None:
+                RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+                output = RESULTS_DIR / f"{name}-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+            output.write_text(json.dumps(result, indent=2))
+            latency = result["latency_ms"]
+            print(
+                f"{name}: {result['rps']} rps | p50 {latency['p50']} ms | p95 {latency['p95']} ms | "
+                f"p99 {latency['p99']} ms | cpu {result['cpu_ms_per_request']} ms/req | "
+                f"errors {result['errors']} -> {output}"
+            )
+    finally:
+        if mock is not None:
+            mock.terminate()
+            mock.wait()
+
+
+if __name__ == "__main__":
+    main()
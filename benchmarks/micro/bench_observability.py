@@ -0,0 +1,85 @@
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from service.observability import collector
+from service.observability.collector import record_http_exchange
+from service.observability.models import DomainEventEntry, RequestLogEntry
+from service.observability.store import ObservabilityStore
+
+PATHS = ("/wsfe/invoices", "/wsfe/invoices/query", "/wsfe/params/types-cbte", "/wspci/persona")
+ERRORS = (None, None, None, None, "Network error", "SOAPFault")
+MAX_LOGS, MAX_EVENTS = 5000, 2000
+
+
+@pytest.fixture
+def full_store() -> ObservabilityStore:
+    """A store filled to its buffer capacity with an hour of mixed traffic."""
+    rng = random.Random(7)
+    store = ObservabilityStore(max_logs=MAX_LOGS, max_events=MAX_EVENTS)
+    started = datetime.now(timezone.utc) - timedelta(minutes=59)
+    for i in range(MAX_LOGS):
+        path = rng.choice(PATHS)
+        error_type = rng.choice(ERRORS)
+        store.add_request_log(
+            RequestLogEntry(
+                trace_id=f"trace-{i}",
+                timestamp=started + timedelta(seconds=i * 3540 / MAX_LOGS),
+                method="POST",
+                path=path,
+                status_code=200,
+                ok=error_type is None,
+                duration_ms=rng.lognormvariate(4.5, 0.6),
+                service=path.split("/")[1],
+                error_type=error_type,
+                cuit=30740253022 + rng.randrange(20),
+            )
+        )
+    for i in range(MAX_EVENTS):
+        store.add_domain_event(
+            DomainEventEntry(
+                event_type="soap_call",
+                service=rng.choice(("wsfe", "wspci")),
+                status="success",
+                timestamp=started + timedelta(seconds=i * 3540 / MAX_EVENTS),
+                trace_id=f"trace-{i}",
+                error_type=None,
+                entity_key="FECAESolicitar",
+                payload={"duration_ms": rng.lognormvariate(4.2, 0.6)},
+            )
+        )
+    return store
+
+
+@pytest.mark.parametrize("method", ["get_summary", "get_errors", "get_operations_summary", "get_alerts"])
+def test_store_summaries_at_capacity(benchmark, full_store, method):
+    result = benchmark(getattr(full_store, method))
+
+    assert result
+
+
+def test_store_list_logs_filtered_at_capacity(benchmark, full_store):
+    page = benchmark(full_store.list_logs, page=1, page_size=50, endpoint="/wsfe/invoices", status="error")
+
+    assert page["items"]
+
+
+def test_record_http_exchange(benchmark, monkeypatch):
+    monkeypatch.setattr(collector, "_store", ObservabilityStore())
+    trace_ids = (f"trace-{i}" for i in itertools.count())
+
+    benchmark(
+        lambda: record_http_exchange(
+            method="POST",
+            path="/wsfe/invoices",
+            status_code=200,
+            duration_ms=123.4,
+            trace_id=next(trace_ids),
+            cuit=30740253022,
+            error_type=None,
+            request_body=None,
+            spans=[],
+        )
+    )
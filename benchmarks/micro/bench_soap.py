@@ -0,0 +1,38 @@
+import pytest
+from lxml import etree
+from zeep.helpers import serialize_object
+
+from service.api.models.fecae_solicitar import RootModel
+
+
+@pytest.mark.parametrize("details", [1, 250])
+def test_fecae_solicitar_envelope(benchmark, wsfe_zeep_client, invoice_payload, details):
+    sale_data = RootModel.model_validate(invoice_payload(details)).model_dump(by_alias=True, exclude_none=True)
+    auth = {"Token": "T" * 800, "Sign": "S" * 200, "Cuit": sale_data["Auth"]["Cuit"]}
+
+    def build_envelope():
+        envelope = wsfe_zeep_client.create_message(
+            wsfe_zeep_client.service, "FECAESolicitar", Auth=auth, FeCAEReq=sale_data["FeCAEReq"]
+        )
+        return etree.tostring(envelope)
+
+    body = benchmark(build_envelope)
+
+    assert body.count(b"FECAEDetRequest>") == 2 * details
+
+
+def test_fecae_solicitar_parse_reply(benchmark, wsfe_zeep_client, fecae_response_xml):
+    operation = wsfe_zeep_client.service._binding._operations["FECAESolicitar"]
+
+    result = benchmark(lambda: operation.process_reply(etree.fromstring(fecae_response_xml)))
+
+    assert len(result.FeDetResp.FECAEDetResponse) == 250
+
+
+def test_serialize_object_large_response(benchmark, wsfe_zeep_client, fecae_response_xml):
+    operation = wsfe_zeep_client.service._binding._operations["FECAESolicitar"]
+    result = operation.process_reply(etree.fromstring(fecae_response_xml))
+
+    serialized = benchmark(serialize_object, result)
+
+    assert len(serialized["FeDetResp"]["FECAEDetResponse"]) == 250
@@ -0,0 +1,45 @@
+import pytest
+from pydantic import TypeAdapter
+
+from service.api.models.fecae_batch import (FECAESolicitarPayload,
+                                            finalize_fecae_payload)
+from service.api.models.fecae_solicitar import RootModel
+
+
+@pytest.mark.parametrize("details", [1, 250])
+def test_root_model_validation(benchmark, invoice_payload, details):
+    payload = invoice_payload(details)
+
+    model = benchmark(RootModel.model_validate, payload)
+
+    assert len(model.FeCAEReq.FeDetReq.FECAEDetRequest) == details
+
+
+@pytest.mark.parametrize("details", [1, 250])
+def test_model_dump_by_alias(benchmark, invoice_payload, details):
+    model = RootModel.model_validate(invoice_payload(details))
+
+    dumped = benchmark(model.model_dump, by_alias=True, exclude_none=True)
+
+    assert dumped["FeCAEReq"]["FeCabReq"]["CantReg"] == details
+
+
+@pytest.mark.parametrize("details", [1, 250])
+def test_root_model_validate_and_dump(benchmark, invoice_payload, details):
+    """What /wsfe/invoices did per request before the batch path."""
+    payload = invoice_payload(details)
+
+    dumped = benchmark(lambda: RootModel.model_validate(payload).model_dump(by_alias=True, exclude_none=True))
+
+    assert dumped["FeCAEReq"]["FeCabReq"]["CantReg"] == details
+
+
+@pytest.mark.parametrize("details", [1, 250])
+def test_batch_payload_validation(benchmark, invoice_payload, details):
+    """The /wsfe/invoices path: compiled TypedDict validation plus column-wise business rules."""
+    payload = invoice_payload(details)
+    adapter = TypeAdapter(FECAESolicitarPayload)
+
+    dumped = benchmark(lambda: finalize_fecae_payload(adapter.validate_python(payload)))
+
+    assert dumped == RootModel.model_validate(payload).model_dump(by_alias=True, exclude_none=True)
@@ -0,0 +1,55 @@
+import datetime
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from lxml import etree
+
+from service.crypto.sign import sign_login_ticket_request
+from service.xml_management.xml_builder import build_login_ticket_request
+
+
+def _time_provider():
+    return 1768471845, "2026-01-15T10:10:45Z", "2026-01-15T10:20:45Z"
+
+
+@pytest.fixture(scope="module")
+def credentials() -> tuple[bytes, bytes]:
+    # AFIP certificates use 2048-bit RSA keys.
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "afrelay-bench")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    return key_pem, certificate.public_bytes(serialization.Encoding.PEM)
+
+
+def test_build_login_ticket_request(benchmark):
+    root = benchmark(build_login_ticket_request, _time_provider, "wsfe")
+
+    assert root.findtext("service") == "wsfe"
+
+
+def test_build_and_sign_login_ticket_request(benchmark, credentials):
+    key_pem, cert_pem = credentials
+
+    def build_and_sign():
+        root = build_login_ticket_request(_time_provider, "wsfe")
+        return sign_login_ticket_request(etree.tostring(root), key_pem, cert_pem)
+
+    cms = benchmark(build_and_sign)
+
+    assert cms
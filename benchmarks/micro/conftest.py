@@ -0,0 +1,179 @@
+"""
+Minimal pytest-benchmark-style harness, so the suite runs with the dev
+requirements only.
+
+    python -m pytest benchmarks/micro                      # compare with baseline.json (required)
+    python -m pytest benchmarks/micro --bench-save         # record baseline.json on this machine
+    python -m pytest benchmarks/micro --bench-threshold 0.5
+
+Each benchmark reports the best per-call time over several rounds and
+fails when it is slower than the baseline by more than the threshold.
+"""
+import copy
+import gc
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+MICRO_DIR = Path(__file__).resolve().parent
+FIXTURES_DIR = MICRO_DIR / "fixtures"
+DEFAULT_BASELINE = MICRO_DIR / "baseline.json"
+DEFAULT_RESULTS = MICRO_DIR / "results.json"
+
+MIN_ROUND_SECONDS = 0.02
+ROUNDS = 7
+
+_results: dict[str, dict[str, Any]] = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("micro benchmarks")
+    group.addoption("--bench-baseline", type=Path, default=DEFAULT_BASELINE)
+    group.addoption("--bench-results", type=Path, default=DEFAULT_RESULTS)
+    group.addoption("--bench-save", action="store_true", help="Write the measured timings as the new baseline.")
+    group.addoption(
+        "--bench-threshold",
+        type=float,
+        default=float(os.getenv("MICRO_BENCH_THRESHOLD", "0.25")),
+        help="Allowed slowdown against the baseline (0.25 = 25%%).",
+    )
+
+
+class Benchmark:
+    def __init__(self, name: str, baseline: dict[str, Any] | None, threshold: float, enforce: bool) -> None:
+        self.name = name
+        self.baseline = baseline
+        self.threshold = threshold
+        self.enforce = enforce
+
+    def _calibrate(self, fn: Callable[[], Any]) -> int:
+        iterations = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            if time.perf_counter() - started >= MIN_ROUND_SECONDS or iterations >= 1_000_000:
+                return iterations
+            iterations *= 2
+
+    def __call__(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        call = (lambda: fn(*args, **kwargs)) if args or kwargs else fn
+        result = call()
+        iterations = self._calibrate(call)
+
+        per_call = []
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(ROUNDS):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    call()
+                per_call.append((time.perf_counter() - started) / iterations)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        stats = {
+            "min_us": round(min(per_call) * 1e6, 3),
+            "median_us": round(statistics.median(per_call) * 1e6, 3),
+            "stdev_us": round(statistics.pstdev(per_call) * 1e6, 3),
+            "rounds": ROUNDS,
+            "iterations": iterations,
+        }
+        _results[self.name] = stats
+
+        if self.enforce and self.baseline:
+            limit = self.baseline["min_us"] * (1 + self.threshold)
+            if stats["min_us"] > limit:
+                pytest.fail(
+                    f"{self.name}: {stats['min_us']:.1f} us/call vs baseline "
+                    f"{self.baseline['min_us']:.1f} us (+{self.threshold:.0%} allowed)"
+                )
+        return result
+
+
+def pytest_sessionstart(session):
+    config = session.config
+    baseline_path: Path = config.getoption("--bench-baseline")
+    if not config.getoption("--bench-save") and not baseline_path.exists():
+        # Without a baseline nothing is compared, and a regression would pass unnoticed.
+        raise pytest.UsageError(
+            f"No micro benchmark baseline at {baseline_path}. Record one on this machine with --bench-save "
+            "(CI records it from the base commit, see benchmarks/README.md)."
+        )
+
+
+@pytest.fixture
+def benchmark(request) -> Benchmark:
+    config = request.config
+    baseline_path: Path = config.getoption("--bench-baseline")
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    return Benchmark(
+        name=request.node.name,
+        baseline=baseline.get(request.node.name),
+        threshold=config.getoption("--bench-threshold"),
+        enforce=not config.getoption("--bench-save"),
+    )
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    config = session.config
+    config.getoption("--bench-results").write_text(json.dumps(dict(sorted(_results.items())), indent=2))
+    if config.getoption("--bench-save"):
+        # Merge, so saving a -k subset keeps the other entries.
+        baseline_path: Path = config.getoption("--bench-baseline")
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        baseline.update(_results)
+        baseline_path.write_text(json.dumps(dict(sorted(baseline.items())), indent=2))
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("micro benchmarks (us per call)")
+    for name, stats in sorted(_results.items()):
+        terminalreporter.write_line(f"{name:<60} min {stats['min_us']:>12.1f}  median {stats['median_us']:>12.1f}")
+
+
+# ===================
+# ==== FIXTURES =====
+# ===================
+
+@pytest.fixture(scope="session")
+def invoice_payload() -> Callable[[int], dict[str, Any]]:
+    """Recorded FECAESolicitar body, widened to n details."""
+    recorded = json.loads((FIXTURES_DIR / "fecae_solicitar_request.json").read_text())
+
+    def build(n: int) -> dict[str, Any]:
+        payload = copy.deepcopy(recorded)
+        template = payload["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"][0]
+        details = []
+        for i in range(n):
+            detail = copy.deepcopy(template)
+            detail["CbteDesde"] = detail["CbteHasta"] = template["CbteDesde"] + i
+            details.append(detail)
+        payload["FeCAEReq"]["FeCabReq"]["CantReg"] = n
+        payload["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"] = details
+        return payload
+
+    return build
+
+
+@pytest.fixture(scope="session")
+def wsfe_zeep_client():
+    from zeep import Client
+
+    return Client(str(MICRO_DIR.parent.parent / "tests" / "mocks" / "wsfe_mock.wsdl"))
+
+
+@pytest.fixture(scope="session")
+def fecae_response_xml() -> bytes:
+    return (FIXTURES_DIR / "fecae_solicitar_response_250.xml").read_bytes()
@@ -0,0 +1,197 @@
+"""
+Local async mock of AFIP's WSAA, WSFE and WSPCI for load tests.
+
+Replies are serialized by zeep from the same tests/mocks/*_mock.wsdl files
+the unit tests use, and each service listens on the port its mock WSDL
+points to, so a relay built on those WSDLs talks to it unchanged.
+
+    python -m benchmarks.mock_afip --latency-ms 80 --jitter-ms 40 --error-rate 0.01 --fault-rate 0.01
+"""
+import argparse
+import asyncio
+import itertools
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+import uvicorn
+from lxml import etree
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from zeep import Client
+
+MOCKS_DIR = Path(__file__).resolve().parent.parent / "tests" / "mocks"
+
+# service -> (mock wsdl, port the wsdl's soap:address points to)
+SERVICES = {
+    "wsaa": ("wsaa_mock.wsdl", 23592),
+    "wsfe": ("wsfe_mock.wsdl", 62768),
+    "wspci": ("wspci_mock.wsdl", 51893),
+}
+
+FAULT_TEMPLATE = (
+    '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+    "<soap:Fault><faultcode>soap:Server</faultcode><faultstring>{message}</faultstring></soap:Fault>"
+    "</soap:Body></soap:Envelope>"
+)
+
+
+@dataclass
+class MockBehaviour:
+    latency_ms: float = 50.0
+    jitter_ms: float = 25.0
+    error_rate: float = 0.0
+    fault_rate: float = 0.0
+
+    def delay(self) -> float:
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+
+def _text(request_root: etree._Element, name: str, default: Any = None) -> Any:
+    found = request_root.xpath(f"//*[local-name()='{name}']")
+    return found[0].text if found else default
+
+
+_cae_counter = itertools.count(70000000000000)
+
+
+def _fecae_solicitar(req: etree._Element) -> dict:
+    now = datetime.now()
+    desde = int(_text(req, "CbteDesde", 1))
+    return {
+        "FECAESolicitarResult": {
+            "FeCabResp": {
+                "Cuit": int(_text(req, "Cuit", 0)),
+                "PtoVta": int(_text(req, "PtoVta", 1)),
+                "CbteTipo": int(_text(req, "CbteTipo", 1)),
+                "FchProceso": now.strftime("%Y%m%d%H%M%S"),
+                "CantReg": 1,
+                "Resultado": "A",
+                "Reproceso": "N",
+            },
+            "FeDetResp": {
+                "FECAEDetResponse": [
+                    {
+                        "Concepto": int(_text(req, "Concepto", 1)),
+                        "DocTipo": int(_text(req, "DocTipo", 99)),
+                        "DocNro": int(_text(req, "DocNro", 0)),
+                        "CbteDesde": desde,
+                        "CbteHasta": desde,
+                        "CbteFch": _text(req, "CbteFch", now.strftime("%Y%m%d")),
+                        "Resultado": "A",
+                        "CAE": str(next(_cae_counter)),
+                        "CAEFchVto": (now + timedelta(days=10)).strftime("%Y%m%d"),
+                    }
+                ]
+            },
+        }
+    }
+
+
+def _fecaea_reg_informativo(req: etree._Element) -> dict:
+    return {
+        "FECAEARegInformativoResult": {
+            "FeCabResp": {
+                "Cuit": int(_text(req, "Cuit", 0)),
+                "PtoVta": int(_text(req, "PtoVta", 1)),
+                "CbteTipo": int(_text(req, "CbteTipo", 1)),
+                "FchProceso": datetime.now().strftime("%Y%m%d%H%M%S"),
+                "CantReg": 1,
+                "Resultado": "A",
+                "Reproceso": "N",
+            }
+        }
+    }
+
+
+def _param_list(result_name: str, item_name: str) -> Callable[[etree._Element], dict]:
+    def build(_req: etree._Element) -> dict:
+        items = [{"Id": i, "Desc": f"Item {i}", "FchDesde": "20100101", "FchHasta": "NULL"} for i in range(1, 21)]
+        return {result_name: {"ResultGet": {item_name: items}}}
+
+    return build
+
+
+def _login_cms(_req: etree._Element) -> dict:
+    return {"loginCmsReturn": (MOCKS_DIR / "loginTicketResponse.xml").read_text()}
+
+
+REPLIES: dict[str, Callable[[etree._Element], dict]] = {
+    "loginCms": _login_cms,
+    "FECAESolicitar": _fecae_solicitar,
+    "FECAEARegInformativo": _fecaea_reg_informativo,
+    "FECompUltimoAutorizado": lambda req: {
+        "FECompUltimoAutorizadoResult": {
+            "PtoVta": int(_text(req, "PtoVta", 1)),
+            "CbteTipo": int(_text(req, "CbteTipo", 1)),
+            "CbteNro": 100,
+        }
+    },
+    "FEParamGetTiposCbte": _param_list("FEParamGetTiposCbteResult", "CbteTipo"),
+    "FEParamGetTiposDoc": _param_list("FEParamGetTiposDocResult", "DocTipo"),
+    "FEParamGetTiposIva": _param_list("FEParamGetTiposIvaResult", "IvaTipo"),
+    "FEParamGetTiposMonedas": _param_list("FEParamGetTiposMonedasResult", "Moneda"),
+    "FEDummy": lambda _req: {"FEDummyResult": {"AppServer": "OK", "DbServer": "OK", "AuthServer": "OK"}},
+}
+
+
+def _operations(service: str) -> dict[str, Any]:
+    # Same default port (SOAP 1.1) the relay's zeep clients bind to.
+    client = Client(str(MOCKS_DIR / SERVICES[service][0]))
+    return client.service._binding._operations
+
+
+def build_app(service: str, behaviour: MockBehaviour) -> Starlette:
+    operations = _operations(service)
+
+    async def soap(request: Request) -> Response:
+        body = await request.body()
+        root = etree.fromstring(body)
+        envelope_body = root.xpath("//*[local-name()='Body']")[0]
+        operation_name = etree.QName(envelope_body[0]).localname
+        await asyncio.sleep(behaviour.delay())
+
+        roll = random.random()
+        if roll < behaviour.error_rate:
+            return Response("Service Unavailable", status_code=503, media_type="text/plain")
+        if roll < behaviour.error_rate + behaviour.fault_rate:
+            fault = FAULT_TEMPLATE.format(message=f"Mock fault in {operation_name}")
+            return Response(fault, status_code=500, media_type="text/xml")
+
+        operation = operations[operation_name]
+        reply = REPLIES.get(operation_name, lambda _req: {})(root)
+        message = operation.output.serialize(**reply)
+        return Response(etree.tostring(message.content), media_type="text/xml; charset=utf-8")
+
+    return Starlette(routes=[Route("/soap", soap, methods=["POST"])])
+
+
+async def serve(behaviour: MockBehaviour, host: str = "127.0.0.1") -> None:
+    servers = [
+        uvicorn.Server(uvicorn.Config(build_app(service, behaviour), host=host, port=port, log_level="warning"))
+        for service, (_, port) in SERVICES.items()
+    ]
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock AFIP SOAP services for load tests.")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=25.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with HTTP 503.")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="Fraction of calls answered with a SOAP Fault.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    behaviour = MockBehaviour(args.latency_ms, args.jitter_ms, args.error_rate, args.fault_rate)
+    asyncio.run(serve(behaviour))
+
+
+if __name__ == "__main__":
+    main()
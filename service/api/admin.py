@@ -0,0 +1,75 @@
+import asyncio
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from service.api.routing import TracedRoute
+from service.observability.loop_monitor import loop_monitor
+from service.observability.profiler import (MAX_PROFILE_SECONDS,
+                                            ProfilerBusyError,
+                                            SamplingProfiler,
+                                            acquire_profile_slot,
+                                            release_profile_slot)
+from service.soap_client.format_error import build_error_response
+from service.utils.jwt_validator import verify_admin_token
+from service.utils.logger import get_log_levels, logger, set_log_level
+
+router = APIRouter(route_class=TracedRoute)
+
+
+@router.get("/admin/profile", include_in_schema=False)
+async def profile(
+    seconds: float = Query(default=10.0, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(default=10.0, ge=1, le=1000),
+    format: Literal["collapsed", "speedscope"] = Query(default="collapsed"),
+    loop_only: bool = Query(default=False),
+    jwt=Depends(verify_admin_token),
+) -> Response:
+    try:
+        acquire_profile_slot()
+    except ProfilerBusyError as e:
+        return JSONResponse(content=build_error_response("profile", "Profiler busy", str(e)), status_code=409)
+
+    logger.info(f"Profiling for {seconds}s every {interval_ms}ms ({format})")
+    thread_ids = {loop_monitor.loop_thread_id} if loop_only and loop_monitor.loop_thread_id else None
+    sampler = SamplingProfiler(interval=interval_ms / 1000.0, thread_ids=thread_ids)
+    sampler.start()
+    try:
+        # The loop keeps serving traffic while the sampler thread watches it.
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+        release_profile_slot()
+
+    if format == "speedscope":
+        return JSONResponse(
+            content=sampler.speedscope(),
+            headers={"Content-Disposition": 'attachment; filename="afrelay.speedscope.json"'},
+        )
+    return PlainTextResponse(sampler.collapsed())
+
+
+@router.get("/admin/loop-lag", include_in_schema=False)
+async def loop_lag(jwt=Depends(verify_admin_token)) -> dict:
+    return loop_monitor.snapshot()
+
+
+@router.get("/admin/log-levels", include_in_schema=False)
+async def log_levels(jwt=Depends(verify_admin_token)) -> dict:
+    return get_log_levels()
+
+
+@router.put("/admin/log-levels", include_in_schema=False)
+async def update_log_level(
+    level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL", "NOTSET"] = Query(),
+    module: str | None = Query(default=None, min_length=1, description="Dotted prefix, e.g. service.soap_client"),
+    jwt=Depends(verify_admin_token),
+) -> Response:
+    if module is None and level == "NOTSET":
+        return JSONResponse(
+            content=build_error_response("log-levels", "Invalid level", "NOTSET only clears a module override"),
+            status_code=400,
+        )
+    logger.info("Log level for %s set to %s", module or "all modules", level)
+    return JSONResponse(content=set_log_level(level, module))
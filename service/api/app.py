@@ -1,3 +1,4 @@
+import asyncio
 import os
 import secrets
 from contextlib import asynccontextmanager
@@ -11,14 +12,24 @@ from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from starlette.exceptions import HTTPException
 
-from service.api import (ui_frontend, ui_monitoring, wsaa, wsfe,
-                         wsfe_caea_resilience, wspci)
+from service.api import (admin, metrics, ui_frontend, ui_monitoring, wsaa,
+                         wsfe, wsfe_caea_resilience, wspci)
+from service.api.middleware.deadline import DeadlineMiddleware
 from service.api.middleware.observability import ObservabilityMiddleware
 from service.caea_resilience.bootstrap import bootstrap_caea_cycles_once
 from service.caea_resilience.db import init_db
 from service.controllers.readiness_health_controller import \
     readiness_health_check
+from service.observability.collector import publish_response
+from service.observability.loop_monitor import (LOOP_MONITOR_ENABLED,
+                                                loop_monitor)
+from service.observability.ui_stream import ui_stream_hub
+from service.param_rules.tables import param_tables
+from service.soap_client.admission import AdmissionRejected
+from service.soap_client.format_error import build_error_response
+from service.time.clock import clock
 from service.utils.afip_token_scheduler import start_scheduler, stop_scheduler
+from service.utils.deadline import ClientDisconnected, RequestAbandoned
 from service.utils.logger import logger
 
 load_dotenv(override=False)
@@ -26,14 +37,21 @@ load_dotenv(override=False)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    await asyncio.to_thread(param_tables.load)
+    # Sync before the token watchdog builds its first login ticket.
+    await clock.refresh()
     await bootstrap_caea_cycles_once()
     start_scheduler()
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
     yield
+    await ui_stream_hub.stop()
+    await loop_monitor.stop()
     stop_scheduler()
 
 app = FastAPI(
     lifespan=lifespan,
-    middleware=[Middleware(ObservabilityMiddleware)],
+    middleware=[Middleware(ObservabilityMiddleware), Middleware(DeadlineMiddleware)],
 )
 app.include_router(wsaa.router)
 app.include_router(wsfe.router)
@@ -41,6 +59,29 @@ app.include_router(wsfe_caea_resilience.router)
 app.include_router(wspci.router)
 app.include_router(ui_monitoring.router)
 app.include_router(ui_frontend.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request, exc: AdmissionRejected) -> JSONResponse:
+    error_type = "Too many requests" if exc.status_code == 429 else "Service overloaded"
+    content = build_error_response(exc.method, error_type, str(exc))
+    publish_response(content)
+    return JSONResponse(
+        content=content,
+        status_code=exc.status_code,
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+
+@app.exception_handler(RequestAbandoned)
+async def request_abandoned_handler(request, exc: RequestAbandoned) -> JSONResponse:
+    # 499 (client closed request) is only for the access log; nobody reads it.
+    status_code = 499 if isinstance(exc, ClientDisconnected) else 504
+    content = build_error_response(request.url.path, "Request abandoned", str(exc))
+    publish_response(content)
+    return JSONResponse(content=content, status_code=status_code)
 
 # ===================
 # == HEALTH CHECKS ==
@@ -52,10 +93,13 @@ def liveness() -> dict:
     return {"health" : "OK"}
 
 @app.get("/health/readiness")
-async def readiness() -> dict:
+async def readiness() -> JSONResponse:
 
-    status = await readiness_health_check()
-    return status
+    health = await readiness_health_check()
+    # Only missing or stale results fail the probe; AFIP being down is
+    # reported per dependency but does not take the pod out of rotation.
+    status_code = 503 if health["status"] == "stale" else 200
+    return JSONResponse(content=health, status_code=status_code)
 
 
 # ===================
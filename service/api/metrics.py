@@ -0,0 +1,78 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+
+from service.api.routing import TracedRoute
+from service.caea_resilience import repository as caea_repo
+from service.observability.collector import (get_store,
+                                             refresh_token_state_from_files)
+from service.observability.metrics import (CONTENT_TYPE, admission_slots,
+                                           clock_offset_seconds,
+                                           clock_staleness_seconds,
+                                           http_in_flight, http_pool_limits,
+                                           outbox_jobs, registry,
+                                           token_seconds_to_expiry)
+from service.soap_client import admission
+from service.soap_client.async_client import HTTP_LIMITS, HTTP_SERVICES
+from service.time.clock import clock
+from service.utils.jwt_validator import verify_token
+
+router = APIRouter(route_class=TracedRoute)
+
+OUTBOX_STATUSES = ("pending", "retrying", "processing", "done", "failed")
+
+
+def _collect_outbox_depth() -> None:
+    try:
+        counts = caea_repo.count_outbox_by_status()
+    except sqlite3.OperationalError:
+        # State DB not initialised yet in this process.
+        counts = {}
+    for status in OUTBOX_STATUSES:
+        outbox_jobs.labels(status).set(counts.get(status, 0))
+
+
+def _collect_token_expiry() -> None:
+    refresh_token_state_from_files()
+    now = datetime.now(timezone.utc)
+    for service, status in get_store().get_token_status().items():
+        expires_at = status.get("expires_at")
+        if expires_at:
+            remaining = (datetime.fromisoformat(expires_at) - now).total_seconds()
+            token_seconds_to_expiry.labels(service).set(remaining)
+
+
+def _collect_http_pools() -> None:
+    # Pool internals are private to httpcore; report what the transport counts and the configured limits.
+    for service in HTTP_SERVICES:
+        http_in_flight.labels(service)
+        http_pool_limits.labels(service, "max_connections").set(HTTP_LIMITS.max_connections)
+        http_pool_limits.labels(service, "max_keepalive_connections").set(HTTP_LIMITS.max_keepalive_connections)
+
+
+def _collect_clock() -> None:
+    staleness = clock.staleness_seconds()
+    clock_offset_seconds.labels().set(clock.offset_seconds)
+    clock_staleness_seconds.labels().set(-1 if staleness is None else staleness)
+
+
+def _collect_admission() -> None:
+    for service, slots in admission.snapshot().items():
+        for state, value in slots.items():
+            admission_slots.labels(service, state).set(value)
+
+
+registry.add_collector(_collect_outbox_depth)
+registry.add_collector(_collect_token_expiry)
+registry.add_collector(_collect_http_pools)
+registry.add_collector(_collect_clock)
+registry.add_collector(_collect_admission)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(jwt=Depends(verify_token)) -> Response:
+    # Collectors read the state and observability stores.
+    return Response(content=await asyncio.to_thread(registry.render), media_type=CONTENT_TYPE)
@@ -0,0 +1,58 @@
+import asyncio
+import os
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from service.utils.deadline import (RequestDeadline, parse_timeout,
+                                    reset_request_deadline,
+                                    set_request_deadline)
+
+# Applied when the client sends neither X-Request-Deadline nor X-Request-Timeout (0 = none).
+REQUEST_DEFAULT_TIMEOUT_SECONDS = float(os.getenv("REQUEST_DEFAULT_TIMEOUT_SECONDS", "0"))
+
+
+class DeadlineMiddleware:
+    """
+    Publishes the request deadline for the SOAP layer and watches the
+    connection so in-flight AFIP calls can be cancelled on disconnect.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k: v for k, v in scope["headers"] if k in (b"x-request-deadline", b"x-request-timeout")}
+        timeout = parse_timeout(
+            headers.get(b"x-request-deadline", b"").decode("latin-1"),
+            headers.get(b"x-request-timeout", b"").decode("latin-1"),
+        )
+        if timeout is None and REQUEST_DEFAULT_TIMEOUT_SECONDS > 0:
+            timeout = REQUEST_DEFAULT_TIMEOUT_SECONDS
+
+        deadline = RequestDeadline(expires_at=None if timeout is None else time.monotonic() + timeout)
+        # The watcher owns the ASGI receive channel; the app reads from this queue.
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+
+        async def watch_connection() -> None:
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    deadline.disconnected.set()
+                    return
+
+        async def queued_receive() -> Message:
+            return await messages.get()
+
+        watcher = asyncio.create_task(watch_connection())
+        token = set_request_deadline(deadline)
+        try:
+            await self.app(scope, queued_receive, send)
+        finally:
+            reset_request_deadline(token)
+            watcher.cancel()
@@ -1,60 +1,106 @@
+import os
 import time
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from service.observability.collector import (new_trace_id, record_http_exchange,
+from service.observability import tracing
+from service.observability.collector import (end_exchange, new_trace_id,
+                                             record_http_exchange,
                                              reset_current_trace_id,
-                                             set_current_trace_id)
+                                             set_current_trace_id,
+                                             start_exchange)
 
+# Request bytes kept only as a CUIT fallback for requests that never reach a
+# handler (e.g. 422). Larger bodies are not captured at all.
+CAPTURE_MAX_BYTES = int(os.getenv("OBS_CAPTURE_MAX_BYTES", "65536"))
 
-class ObservabilityMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path.startswith("/monitor"):
-            return await call_next(request)
+
+class _BodyCapture:
+    """Keeps references to the received chunks (no copies) up to a byte cap."""
+
+    __slots__ = ("chunks", "size", "overflow")
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.size = 0
+        self.overflow = False
+
+    def add(self, chunk: bytes) -> None:
+        if self.overflow or not chunk:
+            return
+        self.size += len(chunk)
+        if self.size > CAPTURE_MAX_BYTES:
+            self.overflow = True
+            self.chunks.clear()
+            return
+        self.chunks.append(chunk)
+
+    def body(self) -> bytes | None:
+        if self.overflow or not self.chunks:
+            return None
+        return self.chunks[0] if len(self.chunks) == 1 else b"".join(self.chunks)
+
+
+class ObservabilityMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path.startswith("/monitor") or path == "/metrics":
+            await self.app(scope, receive, send)
+            return
 
         trace_id = new_trace_id()
         trace_ctx_token = set_current_trace_id(trace_id)
-        raw_body = await request.body()
-        pending_body = raw_body
+        exchange, exchange_token = start_exchange()
+        scope.setdefault("state", {})["trace_id"] = trace_id
+        capture = _BodyCapture()
+        status_code = 500
 
-        async def receive():
-            nonlocal pending_body
-            body = pending_body
-            pending_body = b""
-            return {"type": "http.request", "body": body, "more_body": False}
-
-        request = Request(request.scope, receive)
-        request.state.trace_id = trace_id
+        async def tee_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                capture.add(message.get("body", b""))
+            return message
 
         started = time.perf_counter()
+        spans_ctx_token = tracing.start_trace(started)
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Trace-Id"] = trace_id
+                if tracing.SERVER_TIMING_ENABLED:
+                    elapsed_ms = (time.perf_counter() - started) * 1000.0
+                    headers["Server-Timing"] = tracing.server_timing_header(tracing.current_spans(), elapsed_ms)
+            await send(message)
+
         try:
-            response = await call_next(request)
-        except Exception:
+            await self.app(scope, tee_receive, send_with_headers)
+        finally:
             duration_ms = (time.perf_counter() - started) * 1000.0
-            record_http_exchange(
-                method=request.method,
-                path=request.url.path,
-                status_code=500,
-                duration_ms=duration_ms,
-                trace_id=trace_id,
-                request_body=raw_body,
-                response_body=None,
-            )
-            reset_current_trace_id(trace_ctx_token)
-            raise
-
-        duration_ms = (time.perf_counter() - started) * 1000.0
-        response_body = getattr(response, "body", None)
-        record_http_exchange(
-            method=request.method,
-            path=request.url.path,
-            status_code=response.status_code,
-            duration_ms=duration_ms,
-            trace_id=trace_id,
-            request_body=raw_body,
-            response_body=response_body,
-        )
-        response.headers["X-Trace-Id"] = trace_id
-        reset_current_trace_id(trace_ctx_token)
-        return response
+            handled = tracing.get_mark("endpoint_started") is not None
+            try:
+                record_http_exchange(
+                    method=scope["method"],
+                    path=path,
+                    status_code=status_code,
+                    duration_ms=duration_ms,
+                    trace_id=trace_id,
+                    cuit=exchange.cuit,
+                    error_type=exchange.error_type,
+                    request_body=None if handled else capture.body(),
+                    spans=tracing.current_spans(),
+                )
+            finally:
+                tracing.finish_trace(spans_ctx_token)
+                end_exchange(exchange_token)
+                reset_current_trace_id(trace_ctx_token)
@@ -0,0 +1,208 @@
+"""
+Batch validation path for FECAESolicitar payloads.
+
+The pydantic models in fecae_solicitar.py build one model instance per
+detail, run validate_business_rules per detail and are then dumped back to
+a dict. The TypedDicts below describe the same payload, so FastAPI's
+compiled TypeAdapter validates the body straight into the dict that is sent
+to AFIP. The business rules run once over all details, column by column.
+
+The models stay the reference: when a payload fails any batch check it is
+re-validated with RootModel, so clients get the same error messages and
+locations as before. Type errors (missing fields, bad numbers) come from the
+TypedDict schema, which uses the same field names and error types.
+"""
+import math
+from typing import Annotated, Any
+
+from pydantic import AliasChoices, Field
+from typing_extensions import NotRequired, TypedDict
+
+from service.api.models.fecae_solicitar import DATE_YYYYMMDD_RE, RootModel
+
+SERVICE_DATE_FIELDS = ("FchServDesde", "FchServHasta", "FchVtoPago")
+
+
+class ActividadPayload(TypedDict):
+    Id: int
+
+class ActividadesPayload(TypedDict):
+    Actividad: list[ActividadPayload]
+
+class PeriodoAsocPayload(TypedDict):
+    FchDesde: str
+    FchHasta: str
+
+class CompradorPayload(TypedDict):
+    DocTipo: int
+    DocNro: int
+    Porcentaje: float
+
+class CompradoresPayload(TypedDict):
+    Comprador: list[CompradorPayload]
+
+class OpcionalPayload(TypedDict):
+    Id: str
+    Valor: str
+
+class OpcionalesPayload(TypedDict):
+    Opcional: list[OpcionalPayload]
+
+class AlicIvaPayload(TypedDict):
+    Id: int
+    BaseImp: float
+    Importe: float
+
+class IvaPayload(TypedDict):
+    AlicIva: list[AlicIvaPayload]
+
+class TributoPayload(TypedDict):
+    Id: int
+    Desc: NotRequired[str | None]
+    BaseImp: float
+    Alic: float
+    Importe: float
+
+class TributosPayload(TypedDict):
+    Tributo: list[TributoPayload]
+
+class CbteAsocPayload(TypedDict):
+    Tipo: int
+    PtoVta: int
+    Nro: int
+    Cuit: NotRequired[str | None]
+    CbteFch: str
+
+class CbtesAsocPayload(TypedDict):
+    CbteAsoc: list[CbteAsocPayload]
+
+
+def _group(alias: str, name: str) -> Any:
+    # FECAEDetRequest accepts the groups by alias or by field name (populate_by_name).
+    return Field(validation_alias=AliasChoices(alias, name))
+
+
+class FECAEDetRequestPayload(TypedDict):
+    Concepto: int
+    DocTipo: int
+    DocNro: int
+    CbteDesde: int
+    CbteHasta: int
+    CbteFch: str
+    ImpTotal: float
+    ImpTotConc: float
+    ImpNeto: float
+    ImpOpEx: float
+    ImpTrib: float
+    ImpIVA: float
+    FchServDesde: NotRequired[str | None]
+    FchServHasta: NotRequired[str | None]
+    FchVtoPago: NotRequired[str | None]
+    MonId: str
+    MonCotiz: NotRequired[float | None]
+    CanMisMonExt: NotRequired[str | None]
+    CondicionIVAReceptorId: int
+
+    CbtesAsoc: NotRequired[Annotated[CbtesAsocPayload | None, _group("CbtesAsoc", "cbtes_asoc")]]
+    Tributos: NotRequired[Annotated[TributosPayload | None, _group("Tributos", "tributos")]]
+    Iva: NotRequired[Annotated[IvaPayload | None, _group("Iva", "iva")]]
+    Opcionales: NotRequired[Annotated[OpcionalesPayload | None, _group("Opcionales", "opcionales")]]
+    Compradores: NotRequired[Annotated[CompradoresPayload | None, _group("Compradores", "compradores")]]
+    PeriodoAsoc: NotRequired[Annotated[PeriodoAsocPayload | None, _group("PeriodoAsoc", "periodo_asoc")]]
+    Actividades: NotRequired[Annotated[ActividadesPayload | None, _group("Actividades", "actividades")]]
+
+class FeDetReqPayload(TypedDict):
+    FECAEDetRequest: list[FECAEDetRequestPayload]
+
+class FeCabReqPayload(TypedDict):
+    CantReg: int
+    PtoVta: int
+    CbteTipo: int
+
+class FeCAEReqPayload(TypedDict):
+    FeCabReq: FeCabReqPayload
+    FeDetReq: FeDetReqPayload
+
+class AuthPayload(TypedDict):
+    Cuit: int
+
+class FECAESolicitarPayload(TypedDict):
+    """Same shape as RootModel, validated into plain dicts."""
+    Auth: AuthPayload
+    FeCAEReq: FeCAEReqPayload
+
+
+def details_pass_business_rules(details: list[dict]) -> bool:
+    """
+    FECAEDetRequest.validate_business_rules for every detail at once. Only
+    answers pass/fail: it never accepts a detail the model would reject, and
+    the model explains the failures.
+    """
+    dates = [detail["CbteFch"] for detail in details]
+    for label in SERVICE_DATE_FIELDS:
+        dates.extend(value for detail in details if (value := detail.get(label)) is not None)
+    if not all(map(DATE_YYYYMMDD_RE.fullmatch, dates)):
+        return False
+
+    if any(detail["CbteDesde"] > detail["CbteHasta"] for detail in details):
+        return False
+
+    if any(
+        detail["Concepto"] in (2, 3) and any(detail.get(label) is None for label in SERVICE_DATE_FIELDS)
+        for detail in details
+    ):
+        return False
+
+    # Same addition order as the model, so float rounding matches.
+    if not all(
+        abs(
+            detail["ImpTotal"]
+            - (detail["ImpTotConc"] + detail["ImpNeto"] + detail["ImpOpEx"] + detail["ImpTrib"] + detail["ImpIVA"])
+        ) <= 0.01
+        for detail in details
+    ):
+        return False
+
+    for detail in details:
+        mon_cotiz = detail.get("MonCotiz")
+        if detail["MonId"] == "PES":
+            if not math.isclose(mon_cotiz or 0.0, 1.0, rel_tol=0.0, abs_tol=0.0001):
+                return False
+        elif mon_cotiz is None or mon_cotiz <= 0:
+            return False
+    return True
+
+
+def _drop_none(rows: list[dict]) -> None:
+    for row in rows:
+        if None in row.values():
+            for key in [key for key, value in row.items() if value is None]:
+                del row[key]
+
+
+def _exclude_none(details: list[dict]) -> None:
+    """What model_dump(exclude_none=True) drops: explicit nulls in optional fields."""
+    _drop_none(details)
+    for detail in details:
+        if "Tributos" in detail:
+            _drop_none(detail["Tributos"]["Tributo"])
+        if "CbtesAsoc" in detail:
+            _drop_none(detail["CbtesAsoc"]["CbteAsoc"])
+
+
+def finalize_fecae_payload(payload: dict) -> dict:
+    """
+    Applies the batch business rules to a payload FastAPI already validated
+    as FECAESolicitarPayload and returns the dict for AFIP (the same one
+    RootModel.model_dump(by_alias=True, exclude_none=True) would build).
+    Raises pydantic.ValidationError, from RootModel, when a rule fails.
+    """
+    fe_cae_req = payload["FeCAEReq"]
+    details = fe_cae_req["FeDetReq"]["FECAEDetRequest"]
+    if fe_cae_req["FeCabReq"]["CantReg"] == len(details) and details_pass_business_rules(details):
+        _exclude_none(details)
+        return payload
+
+    # Slow path: the reference models report the errors, or accept the payload.
+    return RootModel.model_validate(payload).model_dump(by_alias=True, exclude_none=True)
+
@@ -1,4 +1,9 @@
-from pydantic import BaseModel
+import os
+
+from pydantic import BaseModel, Field, model_validator
+
+# Upper bound on invoices per /wsfe/invoices/query/batch request.
+INVOICE_QUERY_MAX_INVOICES = int(os.getenv("WSFE_QUERY_MAX_INVOICES", "10000"))
 
 
 class InvoiceBase(BaseModel):
@@ -10,5 +15,34 @@ class InvoiceBase(BaseModel):
 class InvoiceQueryRequest(InvoiceBase):
     CbteNro: int
 
+
+class InvoiceBatchQueryRequest(InvoiceBase):
+    # Either a CbteDesde..CbteHasta range or an explicit CbteNros list
+    # (the "resume" list returned by a previous, partially failed batch).
+    CbteDesde: int | None = Field(None, ge=1)
+    CbteHasta: int | None = Field(None, ge=1)
+    CbteNros: list[int] | None = Field(None, min_length=1)
+
+    @model_validator(mode="after")
+    def validate_selection(self):
+        has_range = self.CbteDesde is not None or self.CbteHasta is not None
+        if has_range == (self.CbteNros is not None):
+            raise ValueError("Send either CbteDesde/CbteHasta or CbteNros")
+        if has_range:
+            if self.CbteDesde is None or self.CbteHasta is None:
+                raise ValueError("CbteDesde and CbteHasta are both required")
+            if self.CbteDesde > self.CbteHasta:
+                raise ValueError("CbteDesde must be less than or equal to CbteHasta")
+        count = self.CbteHasta - self.CbteDesde + 1 if has_range else len(set(self.CbteNros))
+        if count > INVOICE_QUERY_MAX_INVOICES:
+            raise ValueError(f"At most {INVOICE_QUERY_MAX_INVOICES} invoices per request")
+        return self
+
+    def cbte_nros(self) -> list[int]:
+        if self.CbteNros is not None:
+            return list(dict.fromkeys(self.CbteNros))
+        return list(range(self.CbteDesde, self.CbteHasta + 1))
+
+
 class LastAuthorizedInvoiceRequest(InvoiceBase):
     pass
@@ -1,6 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class GetPersonaRequest(BaseModel):
     cuitRepresentada: int
     idPersona: int
+
+
+class GetPersonaListRequest(BaseModel):
+    cuitRepresentada: int
+    idPersonas: list[int] = Field(min_length=1, max_length=1000)
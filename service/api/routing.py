@@ -0,0 +1,81 @@
+import functools
+import inspect
+import time
+from typing import Any, Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+from service.observability import tracing
+from service.observability.collector import (publish_request_model,
+                                             publish_response)
+
+
+def _publish_request(kwargs: dict[str, Any]) -> None:
+    tracing.mark("endpoint_started")
+    for value in kwargs.values():
+        # Bodies validated as TypedDicts (e.g. /wsfe/invoices) arrive as dicts.
+        if isinstance(value, (BaseModel, dict)):
+            publish_request_model(value)
+
+
+def _observed_endpoint(endpoint: Callable) -> Callable:
+    # functools.wraps keeps the signature FastAPI reads to build the dependant.
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            _publish_request(kwargs)
+            try:
+                result = await endpoint(*args, **kwargs)
+            finally:
+                tracing.mark("endpoint_finished")
+            publish_response(result)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        _publish_request(kwargs)
+        try:
+            result = endpoint(*args, **kwargs)
+        finally:
+            tracing.mark("endpoint_finished")
+        publish_response(result)
+        return result
+
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """
+    Records the FastAPI work around the endpoint as spans: "validation" is
+    body read plus dependency/pydantic resolution before the endpoint runs,
+    "serialize" is response model encoding after it returns. The endpoint
+    also publishes the request CUIT and AFIP error type for the access log,
+    read from the validated models and the returned dict.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any) -> None:
+        super().__init__(path, _observed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def traced_handler(request: Request) -> Response:
+            started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                endpoint_started = tracing.get_mark("endpoint_started")
+                endpoint_finished = tracing.get_mark("endpoint_finished")
+                if endpoint_started is None or endpoint_started < started:
+                    # Rejected (e.g. 422) before the endpoint ran.
+                    tracing.record_span("validation", started)
+                else:
+                    tracing.record_span("validation", started, endpoint_started)
+                    tracing.record_span("serialize", endpoint_finished)
+
+        return traced_handler
@@ -1,48 +1,152 @@
+import gzip
+import hashlib
+import re
 from pathlib import Path
 
-from fastapi import APIRouter
-from fastapi.responses import HTMLResponse, Response
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional: without it the UI is served gzip-only
+    brotli = None
 
 router = APIRouter()
 
 UI_DIR = Path(__file__).resolve().parent.parent / "ui"
 
-
-def _read_ui_file(file_name: str) -> str:
-    return (UI_DIR / file_name).read_text(encoding="utf-8")
+# Hashed asset URLs never change content, so browsers may keep them for a year.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Pages and unversioned URLs are revalidated on every load (a cheap 304).
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+ASSET_MEDIA_TYPES = {
+    "styles.css": "text/css; charset=utf-8",
+    "app.js": "application/javascript; charset=utf-8",
+    "logs.js": "application/javascript; charset=utf-8",
+}
+PAGE_FILES = ("index.html", "logs.html")
+
+
+class StaticAsset:
+    """A UI file held in memory with its precompressed variants and ETags."""
+
+    def __init__(self, body: bytes, media_type: str) -> None:
+        self.media_type = media_type
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.variants: dict[str, bytes] = {"identity": body}
+        gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gzipped) < len(body):
+            self.variants["gzip"] = gzipped
+        if brotli is not None:
+            brotlied = brotli.compress(body, quality=11)
+            if len(brotlied) < len(body):
+                self.variants["br"] = brotlied
+
+    def etag(self, encoding: str) -> str:
+        # Strong ETags must differ between encodings of the same content.
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _choose_encoding(asset: StaticAsset, accept_encoding: str) -> str:
+    accepted = _accepted_encodings(accept_encoding)
+    for encoding in ("br", "gzip"):
+        if encoding in asset.variants and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so a W/ prefix still matches.
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def _load_assets() -> tuple[dict[str, StaticAsset], dict[str, StaticAsset]]:
+    assets = {
+        name: StaticAsset((UI_DIR / name).read_bytes(), media_type)
+        for name, media_type in ASSET_MEDIA_TYPES.items()
+    }
+
+    def versioned(match: re.Match) -> str:
+        return f'{match.group(1)}?v={assets[match.group(2)].digest}"'
+
+    asset_refs = re.compile(r'((?:href|src)="/monitor/(' + "|".join(map(re.escape, assets)) + '))"')
+    pages = {
+        name: StaticAsset(
+            asset_refs.sub(versioned, (UI_DIR / name).read_text(encoding="utf-8")).encode("utf-8"),
+            "text/html; charset=utf-8",
+        )
+        for name in PAGE_FILES
+    }
+    return assets, pages
+
+
+_assets, _pages = _load_assets()
+
+
+def _serve(request: Request, asset: StaticAsset, immutable: bool = False) -> Response:
+    encoding = _choose_encoding(asset, request.headers.get("accept-encoding", ""))
+    etag = asset.etag(encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=asset.variants[encoding], media_type=asset.media_type, headers=headers)
+
+
+def _serve_asset(request: Request, file_name: str) -> Response:
+    asset = _assets[file_name]
+    return _serve(request, asset, immutable=request.query_params.get("v") == asset.digest)
 
 
 @router.get("/monitor/")
-async def monitor_index() -> HTMLResponse:
-    return HTMLResponse(content=_read_ui_file("index.html"))
+async def monitor_index(request: Request) -> Response:
+    return _serve(request, _pages["index.html"])
 
 
 @router.get("/monitor")
-async def monitor_index_redirect() -> HTMLResponse:
-    return HTMLResponse(content=_read_ui_file("index.html"))
+async def monitor_index_redirect(request: Request) -> Response:
+    return _serve(request, _pages["index.html"])
 
 
 @router.get("/monitor/styles.css")
-async def monitor_css() -> Response:
-    return Response(content=_read_ui_file("styles.css"), media_type="text/css")
+async def monitor_css(request: Request) -> Response:
+    return _serve_asset(request, "styles.css")
 
 
 @router.get("/monitor/app.js")
-async def monitor_js() -> Response:
-    return Response(
-        content=_read_ui_file("app.js"),
-        media_type="application/javascript",
-    )
+async def monitor_js(request: Request) -> Response:
+    return _serve_asset(request, "app.js")
 
 
 @router.get("/monitor/logs")
-async def monitor_logs() -> HTMLResponse:
-    return HTMLResponse(content=_read_ui_file("logs.html"))
+async def monitor_logs(request: Request) -> Response:
+    return _serve(request, _pages["logs.html"])
 
 
 @router.get("/monitor/logs.js")
-async def monitor_logs_js() -> Response:
-    return Response(
-        content=_read_ui_file("logs.js"),
-        media_type="application/javascript",
-    )
+async def monitor_logs_js(request: Request) -> Response:
+    return _serve_asset(request, "logs.js")
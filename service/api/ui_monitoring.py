@@ -1,15 +1,19 @@
+import asyncio
 from typing import Literal
 
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
+from service.api.routing import TracedRoute
 from service.caea_resilience import repository as caea_repo
 from service.caea_resilience.db import init_db
 from service.caea_resilience.outbox_worker import process_pending_outbox_jobs
 from service.observability.collector import (get_store,
                                              refresh_token_state_from_files)
+from service.observability.ui_stream import sse_messages, ui_stream_hub
 from service.utils.jwt_validator import verify_token
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.get("/ui/metrics/summary")
@@ -18,7 +22,21 @@ async def ui_metrics_summary(
     jwt=Depends(verify_token),
 ) -> dict:
     store = get_store()
-    return store.get_summary(window_minutes=window_minutes)
+    return await asyncio.to_thread(store.get_summary, window_minutes=window_minutes)
+
+
+@router.get("/ui/stream")
+async def ui_stream(
+    window_minutes: int = Query(default=60, ge=1, le=1440),
+    jwt=Depends(verify_token),
+) -> StreamingResponse:
+    # Deltas only: the client loads its initial snapshot from the endpoints below.
+    subscriber = ui_stream_hub.subscribe(window_minutes=window_minutes)
+    return StreamingResponse(
+        sse_messages(ui_stream_hub, subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/ui/logs")
@@ -29,16 +47,23 @@ async def ui_logs(
     status: Literal["ok", "error"] | None = None,
     service: str | None = None,
     error_type: str | None = None,
+    cuit: int | None = None,
+    trace_id: str | None = None,
+    cursor: int | None = Query(default=None, ge=1),
     jwt=Depends(verify_token),
 ) -> dict:
     store = get_store()
-    return store.list_logs(
+    return await asyncio.to_thread(
+        store.list_logs,
         page=page,
         page_size=page_size,
         endpoint=endpoint,
         status=status,
         service=service,
         error_type=error_type,
+        cuit=cuit,
+        trace_id=trace_id,
+        cursor=cursor,
     )
 
 
@@ -49,14 +74,14 @@ async def ui_errors(
     jwt=Depends(verify_token),
 ) -> dict:
     store = get_store()
-    return store.get_errors(window_minutes=window_minutes, group_by=group_by)
+    return await asyncio.to_thread(store.get_errors, window_minutes=window_minutes, group_by=group_by)
 
 
 @router.get("/ui/tokens/status")
 async def ui_tokens_status(jwt=Depends(verify_token)) -> dict:
-    refresh_token_state_from_files()
+    await asyncio.to_thread(refresh_token_state_from_files)
     store = get_store()
-    return store.get_token_status()
+    return await asyncio.to_thread(store.get_token_status)
 
 
 @router.get("/ui/operations/summary")
@@ -65,14 +90,14 @@ async def ui_operations_summary(
     jwt=Depends(verify_token),
 ) -> dict:
     store = get_store()
-    return store.get_operations_summary(window_minutes=window_minutes)
+    return await asyncio.to_thread(store.get_operations_summary, window_minutes=window_minutes)
 
 
 @router.get("/ui/alerts")
 async def ui_alerts(jwt=Depends(verify_token)) -> dict:
-    refresh_token_state_from_files()
+    await asyncio.to_thread(refresh_token_state_from_files)
     store = get_store()
-    return store.get_alerts()
+    return await asyncio.to_thread(store.get_alerts)
 
 
 @router.get("/ui/events")
@@ -82,18 +107,29 @@ async def ui_events(
     service: str | None = None,
     event_type: str | None = None,
     status: Literal["success", "error"] | None = None,
+    trace_id: str | None = None,
+    cursor: int | None = Query(default=None, ge=1),
     jwt=Depends(verify_token),
 ) -> dict:
     store = get_store()
-    return store.list_domain_events(
+    return await asyncio.to_thread(
+        store.list_domain_events,
         page=page,
         page_size=page_size,
         service=service,
         event_type=event_type,
         status=status,
+        trace_id=trace_id,
+        cursor=cursor,
     )
 
 
+@router.get("/ui/traces/{trace_id}")
+async def ui_trace(trace_id: str, jwt=Depends(verify_token)) -> dict:
+    store = get_store()
+    return await asyncio.to_thread(store.get_trace, trace_id)
+
+
 @router.get("/ui/caea/queue")
 async def ui_caea_queue(
     limit: int = Query(default=200, ge=1, le=1000),
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends
 
+from service.api.routing import TracedRoute
 from service.controllers.request_access_token_controller import \
     generate_afip_access_token
 from service.utils.jwt_validator import verify_token
 from service.utils.logger import logger
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("/wsaa/token")
 async def renew_access_token(jwt = Depends(verify_token)) -> dict:
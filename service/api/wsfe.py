@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends
-
-from service.api.models.fecae_solicitar import RootModel
-from service.api.models.invoice_query import InvoiceBase, InvoiceQueryRequest
+from fastapi import APIRouter, Body, Depends
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from service.api.models.fecae_batch import (FECAESolicitarPayload,
+                                            finalize_fecae_payload)
+from service.api.models.invoice_query import (InvoiceBase,
+                                              InvoiceBatchQueryRequest,
+                                              InvoiceQueryRequest)
 from service.api.models.wsfe_caea import (
     WsfeCaeaPeriodoOrdenRequest, WsfeCaeaRegInformativoRequest,
     WsfeCaeaSinMovimientoConsultarRequest, WsfeCaeaSinMovimientoRequest)
 from service.api.models.wsfe_params import (WsfeAuthRequest,
                                             WsfeCondicionIvaReceptorRequest,
                                             WsfeCotizacionRequest)
-from service.controllers.consult_invoice_controller import \
-    consult_specific_invoice
+from service.api.routing import TracedRoute
+from service.controllers.consult_invoice_controller import (
+    consult_specific_invoice, stream_invoice_batch)
 from service.controllers.request_invoice_controller import \
     request_invoice_controller
 from service.controllers.request_last_authorized_controller import \
@@ -25,15 +32,18 @@ from service.controllers.wsfe_params_controller import (
 from service.utils.jwt_validator import verify_token
 from service.utils.logger import logger
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("/wsfe/invoices")
-async def generate_invoice(sale_data: RootModel, jwt = Depends(verify_token)) -> dict:
+async def generate_invoice(sale_data: FECAESolicitarPayload = Body(), jwt = Depends(verify_token)) -> dict:
     
     logger.info("Received request to generate invoice at /wsfe/invoices")
 
-    # Preserve AFIP field aliases (e.g. Iva/AlicIva) for SOAP payload keys.
-    sale_data = sale_data.model_dump(by_alias=True, exclude_none=True)
+    # The body is already the AFIP-keyed dict (e.g. Iva/AlicIva); only the business rules remain.
+    try:
+        sale_data = finalize_fecae_payload(sale_data)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)])
     invoice_result = await request_invoice_controller(sale_data)
 
     return invoice_result
@@ -61,6 +71,17 @@ async def consult_invoice(comp_info: InvoiceQueryRequest, jwt = Depends(verify_t
     return result
 
 
+@router.post("/wsfe/invoices/query/batch")
+async def consult_invoice_batch(batch_info: InvoiceBatchQueryRequest, jwt = Depends(verify_token)) -> StreamingResponse:
+
+    logger.info("Received request to query invoices in batch at /wsfe/invoices/query/batch")
+
+    cbte_nros = batch_info.cbte_nros()
+    query = batch_info.model_dump(include={"Cuit", "PtoVta", "CbteTipo"})
+
+    return StreamingResponse(stream_invoice_batch(query, cbte_nros), media_type="application/x-ndjson")
+
+
 @router.post("/wsfe/params/max-reg-x-request")
 async def max_reg_x_request(comp_info: WsfeAuthRequest, jwt = Depends(verify_token)) -> dict:
 
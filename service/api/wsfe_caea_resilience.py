@@ -1,15 +1,22 @@
+from datetime import date, timedelta
+from typing import Literal
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 from service.api.models.wsfe_caea_resilience import (
     QueueIssueLocalInvoiceRequest, QueueSolicitCaeaRequest)
+from service.api.routing import TracedRoute
 from service.caea_resilience import repository as repo
 from service.caea_resilience.bootstrap import resolve_current_and_next_cycles
+from service.caea_resilience.contingency import issue_local_invoice
 from service.caea_resilience.db import init_db
+from service.caea_resilience.export import EXPORT_MEDIA_TYPES, export_lines
 from service.caea_resilience.outbox_worker import process_pending_outbox_jobs
 from service.utils.jwt_validator import verify_token
 from service.utils.logger import logger
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.post("/wsfe/caea/queue/solicitar")
@@ -39,36 +46,14 @@ async def queue_issue_local_invoice(payload: QueueIssueLocalInvoiceRequest, jwt=
             detail="No active CAEA code loaded for this cycle. Wait bootstrap/solicitar to complete.",
         )
 
-    next_nro = repo.reserve_next_invoice_number(data["Cuit"], data["PtoVta"], data["CbteTipo"])
-
-    det_req = data["FeCAEARegInfReq"]["FeDetReq"]["FECAEADetRequest"][0]
-    det_req["CbteDesde"] = next_nro
-    det_req["CbteHasta"] = next_nro
-    det_req["CAEA"] = cycle["caea_code"]
-
-    local_invoice = repo.create_local_invoice(
-        cycle_id=data["CycleId"],
+    return issue_local_invoice(
+        cycle,
         cuit=data["Cuit"],
         pto_vta=data["PtoVta"],
         cbte_tipo=data["CbteTipo"],
-        cbte_nro=next_nro,
-        payload=data["FeCAEARegInfReq"],
+        fe_caea_reg_inf_req=data["FeCAEARegInfReq"],
     )
 
-    request = {"Cuit": data["Cuit"], "FeCAEARegInfReq": data["FeCAEARegInfReq"]}
-    job = repo.add_outbox_job(
-        job_type="INFORM_CAEA_MOVEMENT",
-        idempotency_key=f"inform:{data['Cuit']}:{data['PtoVta']}:{data['CbteTipo']}:{next_nro}",
-        payload={"invoice_id": local_invoice["id"], "request": request},
-    )
-    return {
-        "status": "queued",
-        "reserved_cbte_nro": next_nro,
-        "caea": cycle["caea_code"],
-        "invoice": local_invoice,
-        "job": job,
-    }
-
 
 @router.post("/wsfe/caea/queue/retry")
 async def retry_outbox(limit: int = Query(default=20, ge=1, le=200), jwt=Depends(verify_token)) -> dict:
@@ -101,3 +86,78 @@ async def active_caea(cuit: int, jwt=Depends(verify_token)) -> dict:
             }
         )
     return {"status": "ok", "cycles": cycles}
+
+
+# ===================
+# ===== EXPORTS =====
+# ===================
+# Rows stream in id order; resume an interrupted export with after_id set
+# to the last id received. created_to is inclusive (the whole day).
+
+def _created_range(created_from: date | None, created_to: date | None) -> dict:
+    return {
+        "created_from": created_from.isoformat() if created_from else None,
+        "created_to": (created_to + timedelta(days=1)).isoformat() if created_to else None,
+    }
+
+
+def _export_response(pages, export_format: str, columns: tuple[str, ...], name: str) -> StreamingResponse:
+    return StreamingResponse(
+        export_lines(pages, export_format, columns),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'},
+    )
+
+
+@router.get("/wsfe/caea/export/invoices")
+async def export_caea_invoices(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    cuit: int | None = None,
+    periodo: int | None = None,
+    status: str | None = None,
+    pto_vta: int | None = None,
+    cbte_tipo: int | None = None,
+    created_from: date | None = None,
+    created_to: date | None = None,
+    after_id: int = Query(default=0, ge=0),
+    limit: int | None = Query(default=None, ge=1),
+    jwt=Depends(verify_token),
+) -> StreamingResponse:
+    init_db()
+    logger.info(f"Exporting CAEA invoices as {format} (cuit={cuit}, periodo={periodo}, status={status})")
+    pages = repo.iter_caea_invoice_pages(
+        cuit=cuit,
+        periodo=periodo,
+        status=status,
+        pto_vta=pto_vta,
+        cbte_tipo=cbte_tipo,
+        after_id=after_id,
+        limit=limit,
+        **_created_range(created_from, created_to),
+    )
+    return _export_response(pages, format, repo.INVOICE_EXPORT_COLUMNS, "caea_invoices")
+
+
+@router.get("/wsfe/caea/export/outbox")
+async def export_outbox(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    cuit: int | None = None,
+    status: str | None = None,
+    job_type: str | None = None,
+    created_from: date | None = None,
+    created_to: date | None = None,
+    after_id: int = Query(default=0, ge=0),
+    limit: int | None = Query(default=None, ge=1),
+    jwt=Depends(verify_token),
+) -> StreamingResponse:
+    init_db()
+    logger.info(f"Exporting outbox history as {format} (cuit={cuit}, status={status}, job_type={job_type})")
+    pages = repo.iter_outbox_pages(
+        cuit=cuit,
+        status=status,
+        job_type=job_type,
+        after_id=after_id,
+        limit=limit,
+        **_created_range(created_from, created_to),
+    )
+    return _export_response(pages, format, repo.OUTBOX_EXPORT_COLUMNS, "afip_outbox")
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends
 
-from service.api.models.wspci_models import GetPersonaRequest
-from service.controllers.get_persona_controller import get_persona_controller
+from service.api.models.wspci_models import (GetPersonaListRequest,
+                                             GetPersonaRequest)
+from service.api.routing import TracedRoute
+from service.controllers.get_persona_controller import (
+    get_persona_controller, get_persona_list_controller)
 from service.controllers.request_wspci_access_token_controller import \
     generate_wspci_access_token
 from service.utils.jwt_validator import verify_token
 from service.utils.logger import logger
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("/wspci/token")
 async def renew_wspci_access_token(jwt = Depends(verify_token)) -> dict:
@@ -28,3 +31,14 @@ async def get_persona(persona_data: GetPersonaRequest, jwt = Depends(verify_toke
     result = await get_persona_controller(persona_data)
 
     return result
+
+
+@router.post("/wspci/personas")
+async def get_persona_list(persona_list_data: GetPersonaListRequest, jwt = Depends(verify_token)) -> dict:
+
+    logger.info(f"Received request to query {len(persona_list_data.idPersonas)} personas at /wspci/personas")
+
+    persona_list_data = persona_list_data.model_dump()
+    result = await get_persona_list_controller(persona_list_data)
+
+    return result
@@ -0,0 +1,149 @@
+import asyncio
+import copy
+import os
+from typing import Any
+
+import httpx
+
+from service.caea_resilience import repository as repo
+from service.caea_resilience.bootstrap import resolve_current_and_next_cycles
+from service.caea_resilience.db import init_db
+from service.observability.collector import emit_domain_event
+from service.utils.logger import logger
+
+# FECAESolicitar errors that mean AFIP could not be reached, not that the
+# invoice was rejected. Only these can trigger the CAEA failover.
+FAILOVER_ERROR_TYPES = ("Network error", "HTTP Error", "Circuit open")
+# Attempt failures that prove the request was never sent. After any other one
+# (read timeout, 5xx from a gateway) AFIP may have authorized the invoice, and
+# issuing it again with the CAEA would record the same sale twice.
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def request_never_reached_afip(attempt_errors: list[BaseException]) -> bool:
+    """True when every attempt failed before sending (or none ran: circuit open)."""
+    return all(isinstance(error, UNSENT_ERRORS) for error in attempt_errors)
+
+
+def not_authorized_per_last_authorized(sale_data: dict[str, Any], last_authorized: dict[str, Any]) -> bool:
+    """
+    Whether a FECompUltimoAutorizado answer proves none of the requested
+    numbers was authorized. Anything unclear counts as "maybe authorized".
+    """
+    if last_authorized.get("status") != "success":
+        return False
+    response = last_authorized.get("response") or {}
+    if response.get("Errors") or response.get("CbteNro") is None:
+        return False
+    details = sale_data["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"]
+    return response["CbteNro"] < min(detail["CbteDesde"] for detail in details)
+
+
+def failover_enabled() -> bool:
+    return os.getenv("WSFE_CAEA_FAILOVER", "false").lower() in ("1", "true", "yes")
+
+
+def issue_local_invoice(
+    cycle: dict[str, Any],
+    cuit: int,
+    pto_vta: int,
+    cbte_tipo: int,
+    fe_caea_reg_inf_req: dict[str, Any],
+) -> dict[str, Any]:
+    """
+    Reserves the next local number, stamps the cycle CAEA on the first
+    detail, stores the invoice and queues the FECAEARegInformativo job.
+    """
+    next_nro = repo.reserve_next_invoice_number(cuit, pto_vta, cbte_tipo)
+
+    det_req = fe_caea_reg_inf_req["FeDetReq"]["FECAEADetRequest"][0]
+    det_req["CbteDesde"] = next_nro
+    det_req["CbteHasta"] = next_nro
+    det_req["CAEA"] = cycle["caea_code"]
+
+    local_invoice = repo.create_local_invoice(
+        cycle_id=cycle["id"],
+        cuit=cuit,
+        pto_vta=pto_vta,
+        cbte_tipo=cbte_tipo,
+        cbte_nro=next_nro,
+        payload=fe_caea_reg_inf_req,
+    )
+
+    request = {"Cuit": cuit, "FeCAEARegInfReq": fe_caea_reg_inf_req}
+    job = repo.add_outbox_job(
+        job_type="INFORM_CAEA_MOVEMENT",
+        idempotency_key=f"inform:{cuit}:{pto_vta}:{cbte_tipo}:{next_nro}",
+        payload={"invoice_id": local_invoice["id"], "request": request},
+    )
+    return {
+        "status": "queued",
+        "reserved_cbte_nro": next_nro,
+        "caea": cycle["caea_code"],
+        "invoice": local_invoice,
+        "job": job,
+    }
+
+
+def _active_cycle(cuit: int, periodo: int, orden: int) -> dict[str, Any] | None:
+    init_db()
+    return repo.get_active_cycle(cuit, periodo, orden)
+
+
+async def failover_fecae_to_caea(sale_data: dict[str, Any], cause: dict[str, Any]) -> dict[str, Any] | None:
+    """
+    Issues a failed FECAESolicitar locally against the active CAEA cycle.
+    Returns None (caller keeps the original error) when the request has
+    more than one detail or no CAEA is loaded for the current fortnight.
+    The state DB is used from a worker thread: failovers arrive in bursts
+    exactly when AFIP is degraded.
+    """
+    cuit = sale_data["Auth"]["Cuit"]
+    cab_req = sale_data["FeCAEReq"]["FeCabReq"]
+    details = sale_data["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"]
+    if len(details) != 1:
+        logger.warning("CAEA failover skipped: only single-detail FECAESolicitar requests are supported")
+        return None
+
+    periodo, orden = resolve_current_and_next_cycles()[0]
+    cycle = await asyncio.to_thread(_active_cycle, cuit, periodo, orden)
+    if not cycle:
+        logger.warning("CAEA failover skipped: no active CAEA for cuit=%s periodo=%s orden=%s", cuit, periodo, orden)
+        return None
+
+    # CAEA invoices usually go out through a point of sale enabled for CAEA.
+    pto_vta = int(os.getenv("WSFE_CAEA_FAILOVER_PTO_VTA", cab_req["PtoVta"]))
+    fe_caea_reg_inf_req = {
+        "FeCabReq": {"CantReg": 1, "PtoVta": pto_vta, "CbteTipo": cab_req["CbteTipo"]},
+        "FeDetReq": {"FECAEADetRequest": [copy.deepcopy(details[0])]},
+    }
+    issued = await asyncio.to_thread(
+        issue_local_invoice, cycle, cuit, pto_vta, cab_req["CbteTipo"], fe_caea_reg_inf_req
+    )
+
+    emit_domain_event(
+        event_type="wsfe_caea_failover",
+        service="wsfe",
+        status="success",
+        entity_key="FECAESolicitar",
+        error_type=cause["error"]["error_type"],
+        payload={"invoice_id": issued["invoice"]["id"], "cbte_nro": issued["reserved_cbte_nro"]},
+    )
+    logger.warning(
+        "FECAESolicitar failed (%s); issued cbte %s locally with CAEA %s",
+        cause["error"]["error_type"],
+        issued["reserved_cbte_nro"],
+        issued["caea"],
+    )
+    return {
+        "status": "contingency",
+        "mode": "CAEA",
+        "PtoVta": pto_vta,
+        "CbteTipo": cab_req["CbteTipo"],
+        "cbte_nro": issued["reserved_cbte_nro"],
+        "caea": issued["caea"],
+        "cycle": {"periodo": periodo, "orden": orden},
+        "invoice": issued["invoice"],
+        "job": issued["job"],
+        "cause": cause,
+    }
@@ -81,6 +81,34 @@ def init_db() -> None:
             );
             """
         )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS ix_afip_outbox_updated
+            ON afip_outbox (updated_at, id);
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS wspci_persona_cache (
+                cuit_representada INTEGER NOT NULL,
+                id_persona INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                result_json TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (cuit_representada, id_persona)
+            );
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS wsfe_param_tables (
+                name TEXT PRIMARY KEY,
+                payload_json TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            """
+        )
     finally:
         conn.close()
 
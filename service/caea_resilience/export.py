@@ -0,0 +1,33 @@
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def ndjson_lines(pages: Iterable[list[dict]]) -> Iterator[str]:
+    """One chunk per page, so a response write carries hundreds of rows, not one."""
+    for page in pages:
+        yield "".join(json.dumps(row, separators=(",", ":"), ensure_ascii=False) + "\n" for row in page)
+
+
+def csv_lines(pages: Iterable[list[dict]], columns: tuple[str, ...]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue()
+    for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(page)
+        yield buffer.getvalue()
+
+
+def export_lines(pages: Iterable[list[dict]], export_format: str, columns: tuple[str, ...]) -> Iterator[str]:
+    if export_format == "csv":
+        return csv_lines(pages, columns)
+    return ndjson_lines(pages)
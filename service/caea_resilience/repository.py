@@ -1,7 +1,8 @@
 import json
+import os
 import sqlite3
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Iterator
 
 from service.caea_resilience.db import get_connection
 
@@ -321,6 +322,15 @@ def list_outbox(status: str | None = None, limit: int = 100) -> list[dict[str, A
         conn.close()
 
 
+def count_outbox_by_status() -> dict[str, int]:
+    conn = get_connection()
+    try:
+        rows = conn.execute("SELECT status, COUNT(*) AS total FROM afip_outbox GROUP BY status").fetchall()
+        return {r["status"]: r["total"] for r in rows}
+    finally:
+        conn.close()
+
+
 def list_caea_assignments(limit: int = 200) -> list[dict[str, Any]]:
     conn = get_connection()
     try:
@@ -351,3 +361,158 @@ def list_caea_assignments(limit: int = 200) -> list[dict[str, Any]]:
         return [dict(r) for r in rows]
     finally:
         conn.close()
+
+
+# ===================
+# ===== EXPORTS =====
+# ===================
+
+EXPORT_PAGE_SIZE = int(os.getenv("CAEA_EXPORT_PAGE_SIZE", "500"))
+
+INVOICE_EXPORT_COLUMNS = (
+    "id", "cycle_id", "cuit", "periodo", "orden", "caea_code", "pto_vta", "cbte_tipo", "cbte_nro",
+    "status", "created_at", "updated_at", "last_error", "payload_json",
+)
+OUTBOX_EXPORT_COLUMNS = (
+    "id", "job_type", "idempotency_key", "status", "attempts", "next_retry_at",
+    "created_at", "updated_at", "last_error", "payload_json", "last_response_json",
+)
+
+
+def _iter_keyset_pages(
+    select_sql: str,
+    id_column: str,
+    filters: list[tuple[str, Any]],
+    after_id: int,
+    limit: int | None,
+    page_size: int | None,
+) -> Iterator[list[dict[str, Any]]]:
+    """
+    Pages of `WHERE id > last_id ORDER BY id LIMIT n`. Each page is its own
+    short statement on its own connection, so no read lock is held while
+    the client consumes a page, and pages may be read from different
+    threads (Starlette iterates sync generators in its threadpool).
+    """
+    where = " AND ".join([f"{id_column} > ?", *(clause for clause, _ in filters)])
+    params = [value for _, value in filters]
+    page_size = page_size or EXPORT_PAGE_SIZE
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        conn = get_connection()
+        try:
+            rows = conn.execute(
+                f"{select_sql} WHERE {where} ORDER BY {id_column} LIMIT ?",
+                (after_id, *params, size),
+            ).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return
+        yield [dict(r) for r in rows]
+        after_id = rows[-1]["id"]
+        if remaining is not None:
+            remaining -= len(rows)
+        if len(rows) < size:
+            return
+
+
+def _created_range(column: str, created_from: str | None, created_to: str | None) -> list[tuple[str, Any]]:
+    # created_at is an ISO 8601 UTC string, so lexicographic order is time order.
+    filters = []
+    if created_from:
+        filters.append((f"{column} >= ?", created_from))
+    if created_to:
+        filters.append((f"{column} < ?", created_to))
+    return filters
+
+
+def iter_caea_invoice_pages(
+    cuit: int | None = None,
+    periodo: int | None = None,
+    status: str | None = None,
+    pto_vta: int | None = None,
+    cbte_tipo: int | None = None,
+    created_from: str | None = None,
+    created_to: str | None = None,
+    after_id: int = 0,
+    limit: int | None = None,
+    page_size: int | None = None,
+) -> Iterator[list[dict[str, Any]]]:
+    filters = [
+        (clause, value)
+        for clause, value in (
+            ("i.cuit = ?", cuit),
+            ("c.periodo = ?", periodo),
+            ("i.status = ?", status),
+            ("i.pto_vta = ?", pto_vta),
+            ("i.cbte_tipo = ?", cbte_tipo),
+        )
+        if value is not None
+    ]
+    filters += _created_range("i.created_at", created_from, created_to)
+    select_sql = """
+        SELECT
+            i.id AS id, i.cycle_id AS cycle_id, i.cuit AS cuit, c.periodo AS periodo, c.orden AS orden,
+            c.caea_code AS caea_code, i.pto_vta AS pto_vta, i.cbte_tipo AS cbte_tipo, i.cbte_nro AS cbte_nro,
+            i.status AS status, i.created_at AS created_at, i.updated_at AS updated_at,
+            i.last_error AS last_error, i.payload_json AS payload_json
+        FROM caea_invoice i
+        JOIN caea_cycle c ON c.id = i.cycle_id
+    """
+    return _iter_keyset_pages(select_sql, "i.id", filters, after_id, limit, page_size)
+
+
+def iter_outbox_pages(
+    cuit: int | None = None,
+    status: str | None = None,
+    job_type: str | None = None,
+    created_from: str | None = None,
+    created_to: str | None = None,
+    after_id: int = 0,
+    limit: int | None = None,
+    page_size: int | None = None,
+) -> Iterator[list[dict[str, Any]]]:
+    filters = [
+        (clause, value)
+        for clause, value in (("status = ?", status), ("job_type = ?", job_type))
+        if value is not None
+    ]
+    if cuit is not None:
+        # Every job's idempotency key is "<kind>:<cuit>:...".
+        filters.append(("idempotency_key LIKE ?", f"%:{cuit}:%"))
+    filters += _created_range("created_at", created_from, created_to)
+    select_sql = f"SELECT {', '.join(OUTBOX_EXPORT_COLUMNS)} FROM afip_outbox"
+    return _iter_keyset_pages(select_sql, "id", filters, after_id, limit, page_size)
+
+
+def list_outbox_changes(
+    since: tuple[str, int] | None, limit: int = 100
+) -> tuple[list[dict[str, Any]], tuple[str, int]]:
+    """
+    Outbox rows changed after `since`, an (updated_at, id) cursor, oldest
+    change first, plus the cursor to pass next time. The id breaks ties
+    between rows sharing an updated_at. since=None only returns the cursor.
+    """
+    conn = get_connection()
+    try:
+        if since is None:
+            latest = conn.execute(
+                "SELECT updated_at, id FROM afip_outbox ORDER BY updated_at DESC, id DESC LIMIT 1"
+            ).fetchone()
+            # "" sorts before any ISO timestamp, so an empty table still gets a cursor.
+            return [], (latest["updated_at"], latest["id"]) if latest else ("", 0)
+        updated_at, last_id = since
+        rows = conn.execute(
+            """
+            SELECT * FROM afip_outbox
+             WHERE updated_at > ? OR (updated_at = ? AND id > ?)
+             ORDER BY updated_at ASC, id ASC
+             LIMIT ?
+            """,
+            (updated_at, updated_at, last_id, limit),
+        ).fetchall()
+        items = [dict(r) for r in rows]
+        return items, (items[-1]["updated_at"], items[-1]["id"]) if items else since
+    finally:
+        conn.close()
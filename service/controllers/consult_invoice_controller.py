@@ -1,25 +1,34 @@
+import asyncio
+import json
+import os
+from typing import AsyncIterator
+
+from fastapi.encoders import jsonable_encoder
+
+from service.observability import tracing
 from service.payload_builder.builder import build_auth
+from service.soap_client.admission import AdmissionRejected
 from service.soap_client.async_client import WSFEClientManager
+from service.soap_client.format_error import build_error_response
 from service.soap_client.wsdl.wsdl_manager import get_wsfe_wsdl
 from service.soap_client.wsfe import consult_afip_wsfe
+from service.utils.deadline import ClientDisconnected, RequestAbandoned
 from service.utils.logger import logger
 from service.xml_management.xml_builder import extract_token_and_sign_from_xml
 
 afip_wsdl = get_wsfe_wsdl()
 
-async def consult_specific_invoice(comp_info: dict) -> dict:
-
-    logger.info(f"Consulting info about an specific invoice: CbteNro={comp_info['CbteNro']}")
+# Parallel FECompConsultar calls per batch query. Admission control still
+# caps calls per CUIT (AFIP_CUIT_MAX_CONCURRENCY), so more only queues there.
+INVOICE_QUERY_CONCURRENCY = int(os.getenv("WSFE_QUERY_CONCURRENCY", "4"))
 
-    token, sign = extract_token_and_sign_from_xml()
 
-    cuit = comp_info["Cuit"]
-    auth = build_auth(token, sign, cuit)
+async def _fe_comp_consultar(auth: dict, pto_vta: int, cbte_tipo: int, cbte_nro: int) -> dict:
 
     fecomp_req = {
-        'PtoVta': comp_info["PtoVta"],
-        'CbteTipo': comp_info["CbteTipo"],
-        'CbteNro': comp_info["CbteNro"],
+        'PtoVta': pto_vta,
+        'CbteTipo': cbte_tipo,
+        'CbteNro': cbte_nro,
     }
 
     async def fe_comp_consultar():
@@ -27,5 +36,114 @@ async def consult_specific_invoice(comp_info: dict) -> dict:
         client = manager.get_client()
         return await client.service.FECompConsultar(auth, fecomp_req)
 
-    invoice_result = await consult_afip_wsfe(fe_comp_consultar, "FECompConsultar")
-    return invoice_result
\ No newline at end of file
+    return await consult_afip_wsfe(fe_comp_consultar, "FECompConsultar")
+
+
+async def consult_specific_invoice(comp_info: dict) -> dict:
+
+    logger.info(f"Consulting info about an specific invoice: CbteNro={comp_info['CbteNro']}")
+
+    token, sign = extract_token_and_sign_from_xml()
+
+    cuit = comp_info["Cuit"]
+    auth = build_auth(token, sign, cuit)
+
+    return await _fe_comp_consultar(auth, comp_info["PtoVta"], comp_info["CbteTipo"], comp_info["CbteNro"])
+
+
+def _ndjson(line: dict) -> str:
+    return json.dumps(jsonable_encoder(line), separators=(",", ":")) + "\n"
+
+
+def _is_found(result: dict) -> bool:
+    return result["status"] == "success" and bool((result["response"] or {}).get("ResultGet"))
+
+
+def stream_invoice_batch(query: dict, cbte_nros: list[int]) -> AsyncIterator[str]:
+
+    logger.info(f"Batch FECompConsultar for {len(cbte_nros)} invoices: PtoVta={query['PtoVta']} CbteTipo={query['CbteTipo']}")
+
+    # Read the ticket before the response starts, so a missing token is a normal error.
+    token, sign = extract_token_and_sign_from_xml()
+    auth = build_auth(token, sign, query["Cuit"])
+
+    return _invoice_batch_lines(auth, query, cbte_nros)
+
+
+async def _invoice_batch_lines(auth: dict, query: dict, cbte_nros: list[int]) -> AsyncIterator[str]:
+    """
+    Yields one NDJSON line per invoice in completion order, then a summary
+    line. Invoices that failed in transit (network, HTTP, circuit open,
+    admission) or were never queried are listed under "resume", which is a
+    ready-to-send request body for retrying just those.
+    """
+    cuit, pto_vta, cbte_tipo = query["Cuit"], query["PtoVta"], query["CbteTipo"]
+    pending = iter(cbte_nros)
+    completed: asyncio.Queue[tuple[int, dict | RequestAbandoned]] = asyncio.Queue()
+
+    async def worker() -> None:
+        # Per-invoice spans would bloat the stream's trace; keep them task-local.
+        tracing.start_trace()
+        for cbte_nro in pending:
+            try:
+                result = await _fe_comp_consultar(auth, pto_vta, cbte_tipo, cbte_nro)
+            except AdmissionRejected as e:
+                error_type = "Too many requests" if e.status_code == 429 else "Service overloaded"
+                result = build_error_response("FECompConsultar", error_type, str(e))
+            except RequestAbandoned as e:
+                await completed.put((cbte_nro, e))
+                return
+            except Exception as e:
+                result = build_error_response("FECompConsultar", "unknown", str(e))
+            await completed.put((cbte_nro, result))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(INVOICE_QUERY_CONCURRENCY, len(cbte_nros)))]
+
+    found = afip_errors = 0
+    failed: list[int] = []
+    received: set[int] = set()
+    abandoned: RequestAbandoned | None = None
+    try:
+        while len(received) < len(cbte_nros):
+            cbte_nro, result = await completed.get()
+            if isinstance(result, RequestAbandoned):
+                abandoned = result
+                break
+            received.add(cbte_nro)
+            if result["status"] != "success":
+                failed.append(cbte_nro)
+            elif _is_found(result):
+                found += 1
+            else:
+                # AFIP answered with Errors (e.g. 602, comprobante inexistente): definitive, not retried.
+                afip_errors += 1
+            yield _ndjson({"CbteNro": cbte_nro, **result})
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    if isinstance(abandoned, ClientDisconnected):
+        return
+
+    unprocessed = [cbte_nro for cbte_nro in cbte_nros if cbte_nro not in received]
+    resume = sorted(failed + unprocessed)
+    if abandoned is not None:
+        status = "abandoned"
+    else:
+        status = "complete" if not resume else "partial"
+
+    logger.info(f"Batch FECompConsultar {status}: {found} found, {afip_errors} AFIP errors, {len(resume)} to resume")
+    yield _ndjson(
+        {
+            "summary": {
+                "status": status,
+                "requested": len(cbte_nros),
+                "found": found,
+                "afip_errors": afip_errors,
+                "failed": len(failed),
+                "unprocessed": len(unprocessed),
+            },
+            "resume": {"Cuit": cuit, "PtoVta": pto_vta, "CbteTipo": cbte_tipo, "CbteNros": resume} if resume else None,
+        }
+    )
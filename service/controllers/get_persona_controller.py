@@ -1,19 +1,36 @@
+import asyncio
+import os
+
+from service.observability.metrics import persona_cache_lookups
+from service.persona_cache.cache import (coalesce, is_not_found_message,
+                                         persona_cache)
 from service.soap_client.async_client import WSPCIClientManager
+from service.soap_client.format_error import build_error_response
 from service.soap_client.wsdl.wsdl_manager import get_wspci_wsdl
 from service.soap_client.wspci import consult_afip_wspci
 from service.utils.logger import logger
-from service.xml_management.xml_builder import extract_wspci_token_and_sign_from_xml
+from service.xml_management.xml_builder import \
+    extract_wspci_token_and_sign_from_xml
 
 afip_wsdl = get_wspci_wsdl()
 
-async def get_persona_controller(persona_data: dict) -> dict:
+# "getPersonaList" resolves up to a batch of ids per AFIP call; "getPersona"
+# fans out single lookups instead, for representadas without padron list access.
+PERSONA_BULK_OPERATION = os.getenv("WSPCI_PERSONA_BULK_OPERATION", "getPersonaList")
+PERSONA_LIST_BATCH_SIZE = int(os.getenv("WSPCI_PERSONA_LIST_BATCH_SIZE", "250"))
+PERSONA_BULK_CONCURRENCY = int(os.getenv("WSPCI_PERSONA_BULK_CONCURRENCY", "4"))
 
-    logger.info(f"Querying persona data for idPersona={persona_data['idPersona']}")
 
-    token, sign = extract_wspci_token_and_sign_from_xml()
+async def _cached_result(cuit_representada: int, id_persona: int) -> dict | None:
+    key = (cuit_representada, id_persona)
+    cached = persona_cache.peek(key) or await asyncio.to_thread(persona_cache.get, key)
+    if cached is None:
+        return None
+    persona_cache_lookups.labels("hit" if cached.kind == "found" else "negative_hit").inc()
+    return cached.result
 
-    cuit_representada = persona_data["cuitRepresentada"]
-    id_persona = persona_data["idPersona"]
+
+async def _fetch_persona(token: str, sign: str, cuit_representada: int, id_persona: int) -> dict:
 
     async def get_persona():
         manager = WSPCIClientManager(afip_wsdl)
@@ -21,4 +38,146 @@ async def get_persona_controller(persona_data: dict) -> dict:
         return await client.service.getPersona(token, sign, cuit_representada, id_persona)
 
     persona_result = await consult_afip_wspci(get_persona, "getPersona")
+
+    if persona_result["status"] == "success":
+        entry = await asyncio.to_thread(persona_cache.put, cuit_representada, id_persona, "found", persona_result)
+        return entry.result
+
+    error = persona_result["error"]
+    if error["error_type"] == "SOAPFault" and is_not_found_message(error["details"]):
+        entry = await asyncio.to_thread(persona_cache.put, cuit_representada, id_persona, "not_found", persona_result)
+        return entry.result
+
+    # Transport errors, circuit open, etc. are not cached.
     return persona_result
+
+
+async def get_persona_controller(persona_data: dict) -> dict:
+
+    id_persona = persona_data["idPersona"]
+    cuit_representada = persona_data["cuitRepresentada"]
+    cached = await _cached_result(cuit_representada, id_persona)
+    if cached is not None:
+        logger.info(f"Persona idPersona={id_persona} served from cache")
+        return cached
+
+    logger.info(f"Querying persona data for idPersona={id_persona}")
+
+    token, sign = extract_wspci_token_and_sign_from_xml()
+
+    return await coalesce(
+        (cuit_representada, id_persona), lambda: _fetch_persona(token, sign, cuit_representada, id_persona)
+    )
+
+
+async def _persona_list_results(list_result: dict, cuit_representada: int, id_personas: list[int]) -> dict[int, dict]:
+    """Split a getPersonaList response into per-id results, caching the definitive ones."""
+    list_return = list_result["response"] or {}
+    metadata = list_return.get("metadata")
+
+    results: dict[int, dict] = {}
+    to_cache: list[tuple[int, str, dict]] = []
+    for persona in list_return.get("persona") or []:
+        if not persona:
+            continue
+        general = persona.get("datosGenerales") or {}
+        error_constancia = persona.get("errorConstancia") or {}
+        id_persona = general.get("idPersona") or error_constancia.get("idPersona")
+        if id_persona is None:
+            continue
+
+        if general:
+            # Same shape getPersona returns (personaReturn), so both share cache entries.
+            result = {"status": "success", "response": {**persona, "metadata": metadata}}
+            to_cache.append((id_persona, "found", result))
+        else:
+            message = "; ".join(e for e in error_constancia.get("error") or [] if e)
+            result = build_error_response("getPersona", "SOAPFault", message)
+            if is_not_found_message(message):
+                to_cache.append((id_persona, "not_found", result))
+        results[id_persona] = result
+
+    entries = await asyncio.to_thread(persona_cache.put_many, cuit_representada, to_cache)
+    for (id_persona, _, _), entry in zip(to_cache, entries):
+        results[id_persona] = entry.result
+
+    for id_persona in id_personas:
+        results.setdefault(
+            id_persona,
+            build_error_response("getPersonaList", "Invalid AFIP response", "idPersona missing from the response"),
+        )
+    return results
+
+
+async def _fetch_persona_list(token: str, sign: str, cuit_representada: int, id_personas: list[int]) -> dict[int, dict]:
+
+    async def get_persona_list():
+        manager = WSPCIClientManager(afip_wsdl)
+        client = manager.get_client()
+        return await client.service.getPersonaList(token, sign, cuit_representada, id_personas)
+
+    list_result = await consult_afip_wspci(get_persona_list, "getPersonaList")
+    if list_result["status"] != "success":
+        return {id_persona: list_result for id_persona in id_personas}
+    return await _persona_list_results(list_result, cuit_representada, id_personas)
+
+
+async def get_persona_list_controller(persona_list_data: dict) -> dict:
+
+    cuit_representada = persona_list_data["cuitRepresentada"]
+    id_personas = list(dict.fromkeys(persona_list_data["idPersonas"]))
+
+    results: dict[int, dict] = {}
+    for id_persona in id_personas:
+        cached = await _cached_result(cuit_representada, id_persona)
+        if cached is not None:
+            results[id_persona] = cached
+    missing = [id_persona for id_persona in id_personas if id_persona not in results]
+
+    logger.info(
+        f"Bulk persona lookup: {len(id_personas)} ids, {len(id_personas) - len(missing)} cached, "
+        f"{len(missing)} via {PERSONA_BULK_OPERATION}"
+    )
+
+    semaphore = asyncio.Semaphore(PERSONA_BULK_CONCURRENCY)
+
+    if missing and PERSONA_BULK_OPERATION == "getPersona":
+
+        async def lookup(id_persona: int) -> tuple[int, dict]:
+            async with semaphore:
+                return id_persona, await get_persona_controller(
+                    {"cuitRepresentada": cuit_representada, "idPersona": id_persona}
+                )
+
+        results.update(await asyncio.gather(*(lookup(id_persona) for id_persona in missing)))
+
+    elif missing:
+        persona_cache_lookups.labels("miss").inc(len(missing))
+        token, sign = extract_wspci_token_and_sign_from_xml()
+
+        async def lookup_batch(batch: list[int]) -> dict[int, dict]:
+            async with semaphore:
+                return await _fetch_persona_list(token, sign, cuit_representada, batch)
+
+        batches = [missing[i:i + PERSONA_LIST_BATCH_SIZE] for i in range(0, len(missing), PERSONA_LIST_BATCH_SIZE)]
+        for batch_results in await asyncio.gather(*(lookup_batch(batch) for batch in batches)):
+            results.update(batch_results)
+
+    found = sum(1 for result in results.values() if result["status"] == "success")
+    not_found = sum(
+        1 for result in results.values()
+        if result["status"] == "error" and is_not_found_message(result["error"]["details"])
+    )
+    errors = len(id_personas) - found - not_found
+
+    return {
+        "status": "success" if errors == 0 else ("error" if errors == len(id_personas) else "partial"),
+        "summary": {
+            "requested": len(id_personas),
+            "cached": len(id_personas) - len(missing),
+            "found": found,
+            "not_found": not_found,
+            "errors": errors,
+        },
+        "results": [{"idPersona": id_persona, **results[id_persona]} for id_persona in id_personas],
+    }
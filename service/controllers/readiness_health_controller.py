@@ -1,44 +1,122 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
 from zeep.helpers import serialize_object
 
 from service.soap_client.wsfe import wsfe_dummy
 from service.soap_client.wspci import wspci_dummy
+from service.time.clock import NTP_SERVER
 from service.time.time_management import request_ntp_for_readiness
 from service.utils.logger import logger
 
+HEALTH_CHECK_INTERVAL_SECONDS = int(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "30"))
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "10"))
+# Results older than this mean the background checker stopped running.
+HEALTH_MAX_STALENESS_SECONDS = int(os.getenv("HEALTH_MAX_STALENESS_SECONDS", "120"))
 
-async def readiness_health_check() -> dict:
-    logger.debug("Starting readiness health check")
-    ntp = ""
+# name -> last result, refreshed in the background by refresh_health_checks().
+_health_cache: dict[str, dict[str, Any]] = {}
 
-    ntp_status = request_ntp_for_readiness()
-    if ntp_status:
-        ntp = "OK"
-        logger.debug("NTP readiness check OK")
 
-    else:
-        ntp = {
-            "status": "error",
-            "message": "NTP query failed",
-            "server": "time.afip.gov.ar"
-        }
-        logger.warning("NTP readiness check FAILED")
+async def _check_ntp() -> Any:
+    if not request_ntp_for_readiness():
+        raise RuntimeError("NTP query failed")
+    return "OK"
 
-    # Check WSFE 
-    wsfe_health_info = await wsfe_dummy()
 
+async def _check_wsfe() -> Any:
     # Zeep returns an object of type '<class 'zeep.objects.[service response]'>'.
     # To work with the returned data, this object needs to be converted into a dictionary using serialize_object().
-    wsfe_health_info_parsed = serialize_object(wsfe_health_info)
-    logger.debug("WSFE dummy check OK")
+    return serialize_object(await wsfe_dummy())
+
+
+async def _check_wspci() -> Any:
+    return serialize_object(await wspci_dummy())
 
-    # Check WSPCI
-    wspci_health_info = await wspci_dummy()
-    wspci_health_info_parsed = serialize_object(wspci_health_info)
-    logger.debug("WSPCI dummy check OK")
 
-    logger.debug("Readiness health check finished")
+HEALTH_CHECKS: dict[str, Callable[[], Awaitable[Any]]] = {
+    "ntp": _check_ntp,
+    "wsfe_health": _check_wsfe,
+    "wspci_health": _check_wspci,
+}
+
+
+async def _run_check(name: str, check: Callable[[], Awaitable[Any]]) -> dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        detail = await asyncio.wait_for(check(), timeout=HEALTH_CHECK_TIMEOUT_SECONDS)
+        status, error = "ok", None
+    except asyncio.TimeoutError:
+        detail, status, error = None, "error", f"timed out after {HEALTH_CHECK_TIMEOUT_SECONDS}s"
+    except Exception as e:
+        detail, status, error = None, "error", str(e) or type(e).__name__
+
+    if status == "error":
+        logger.warning(f"Readiness check {name} FAILED: {error}")
     return {
-        "ntp" : ntp,
-        "wsfe_health" : wsfe_health_info_parsed,
-        "wspci_health" : wspci_health_info_parsed
-        }
\ No newline at end of file
+        "status": status,
+        "detail": detail,
+        "error": error,
+        "duration_ms": round((time.perf_counter() - started) * 1000.0, 3),
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+        "checked_monotonic": time.monotonic(),
+    }
+
+
+async def refresh_health_checks() -> dict[str, dict[str, Any]]:
+    logger.debug("Refreshing readiness health checks")
+    names = list(HEALTH_CHECKS)
+    results = await asyncio.gather(*(_run_check(name, HEALTH_CHECKS[name]) for name in names))
+    _health_cache.update(zip(names, results))
+    return _health_cache
+
+
+def _legacy_value(name: str, result: dict[str, Any]) -> Any:
+    # Same shape the probe returned before results were cached.
+    if result["status"] == "ok":
+        return result["detail"]
+    if name == "ntp":
+        return {"status": "error", "message": "NTP query failed", "server": NTP_SERVER}
+    return {"status": "error", "message": result["error"]}
+
+
+async def readiness_health_check() -> dict:
+    now = time.monotonic()
+    checks: dict[str, dict[str, Any]] = {}
+    response: dict[str, Any] = {}
+    stale = False
+
+    for name in HEALTH_CHECKS:
+        result = _health_cache.get(name)
+        if result is None:
+            stale = True
+            checks[name] = {"status": "unknown", "checked_at": None, "age_seconds": None, "stale": True}
+            response[name] = None
+            continue
+
+        age = now - result["checked_monotonic"]
+        is_stale = age > HEALTH_MAX_STALENESS_SECONDS
+        stale = stale or is_stale
+        checks[name] = {
+            "status": result["status"],
+            "checked_at": result["checked_at"],
+            "age_seconds": round(age, 3),
+            "stale": is_stale,
+            "duration_ms": result["duration_ms"],
+            "error": result["error"],
+        }
+        response[name] = _legacy_value(name, result)
+
+    if stale:
+        status = "stale"
+    elif all(check["status"] == "ok" for check in checks.values()):
+        status = "ok"
+    else:
+        status = "degraded"
+
+    response["status"] = status
+    response["checks"] = checks
+    return response
@@ -1,3 +1,9 @@
+from service.caea_resilience.contingency import (
+    FAILOVER_ERROR_TYPES, failover_enabled, failover_fecae_to_caea,
+    not_authorized_per_last_authorized, request_never_reached_afip)
+from service.controllers.request_last_authorized_controller import \
+    get_last_authorized_info
+from service.param_rules.engine import prevalidate_invoice
 from service.payload_builder.builder import add_auth_to_payload
 from service.soap_client.async_client import WSFEClientManager
 from service.soap_client.wsdl.wsdl_manager import get_wsfe_wsdl
@@ -10,13 +16,46 @@ afip_wsdl = get_wsfe_wsdl()
 async def request_invoice_controller(sale_data: dict) -> dict:
 
     logger.info("Generating invoice...")
+
+    # Values AFIP would refuse (unknown CbteTipo, DocTipo, MonId, IVA mismatches) never leave the process.
+    local_rejection = prevalidate_invoice(sale_data)
+    if local_rejection is not None:
+        return local_rejection
+
     token, sign = extract_token_and_sign_from_xml()
     invoice_with_auth = add_auth_to_payload(sale_data, token, sign)
 
+    attempt_errors: list[BaseException] = []
+
     async def fecae_solicitar():
         manager = WSFEClientManager(afip_wsdl)
         client = manager.get_client()
-        return await client.service.FECAESolicitar(invoice_with_auth['Auth'], invoice_with_auth['FeCAEReq'])
+        try:
+            return await client.service.FECAESolicitar(invoice_with_auth['Auth'], invoice_with_auth['FeCAEReq'])
+        except Exception as e:
+            attempt_errors.append(e)
+            raise
 
     invoice_result = await consult_afip_wsfe(fecae_solicitar, "FECAESolicitar")
+
+    # Opt-in: when AFIP is unreachable, issue the invoice with the active CAEA instead.
+    if failover_enabled() and invoice_result.get("error", {}).get("error_type") in FAILOVER_ERROR_TYPES:
+        if request_never_reached_afip(attempt_errors) or await _confirm_not_authorized(sale_data):
+            contingency_result = await failover_fecae_to_caea(sale_data, cause=invoice_result)
+            if contingency_result is not None:
+                return contingency_result
+
     return invoice_result
+
+
+async def _confirm_not_authorized(sale_data: dict) -> bool:
+    # The request may have reached AFIP (read timeout, 5xx): only fail over if
+    # AFIP's last authorized number shows it was not authorized.
+    cab_req = sale_data["FeCAEReq"]["FeCabReq"]
+    last_authorized = await get_last_authorized_info(
+        {"Cuit": sale_data["Auth"]["Cuit"], "PtoVta": cab_req["PtoVta"], "CbteTipo": cab_req["CbteTipo"]}
+    )
+    if not_authorized_per_last_authorized(sale_data, last_authorized):
+        return True
+    logger.warning("CAEA failover skipped: AFIP may have authorized the invoice (%s)", last_authorized)
+    return False
@@ -1,3 +1,4 @@
+from service.param_rules.tables import PARAM_TABLE_SOURCES, param_tables
 from service.payload_builder.builder import build_auth
 from service.soap_client.async_client import WSFEClientManager
 from service.soap_client.wsdl.wsdl_manager import get_wsfe_wsdl
@@ -27,17 +28,23 @@ async def get_max_records_per_request(comp_info: dict) -> dict:
 
 async def get_types_cbte(comp_info: dict) -> dict:
     logger.info("Consulting WSFE voucher types...")
-    return await _request_with_auth("FEParamGetTiposCbte", comp_info["Cuit"])
+    result = await _request_with_auth("FEParamGetTiposCbte", comp_info["Cuit"])
+    param_tables.update_from_result("tipos_cbte", result)
+    return result
 
 
 async def get_types_doc(comp_info: dict) -> dict:
     logger.info("Consulting WSFE document types...")
-    return await _request_with_auth("FEParamGetTiposDoc", comp_info["Cuit"])
+    result = await _request_with_auth("FEParamGetTiposDoc", comp_info["Cuit"])
+    param_tables.update_from_result("tipos_doc", result)
+    return result
 
 
 async def get_types_iva(comp_info: dict) -> dict:
     logger.info("Consulting WSFE VAT types...")
-    return await _request_with_auth("FEParamGetTiposIva", comp_info["Cuit"])
+    result = await _request_with_auth("FEParamGetTiposIva", comp_info["Cuit"])
+    param_tables.update_from_result("tipos_iva", result)
+    return result
 
 
 async def get_types_tributos(comp_info: dict) -> dict:
@@ -47,16 +54,22 @@ async def get_types_tributos(comp_info: dict) -> dict:
 
 async def get_types_monedas(comp_info: dict) -> dict:
     logger.info("Consulting WSFE currency types...")
-    return await _request_with_auth("FEParamGetTiposMonedas", comp_info["Cuit"])
+    result = await _request_with_auth("FEParamGetTiposMonedas", comp_info["Cuit"])
+    param_tables.update_from_result("monedas", result)
+    return result
 
 
 async def get_condicion_iva_receptor(comp_info: dict) -> dict:
     logger.info("Consulting WSFE receptor VAT conditions...")
-    return await _request_with_auth(
+    result = await _request_with_auth(
         "FEParamGetCondicionIvaReceptor",
         comp_info["Cuit"],
         comp_info.get("ClaseCmp"),
     )
+    # Filtered by ClaseCmp it is only part of the table.
+    if comp_info.get("ClaseCmp") is None:
+        param_tables.update_from_result("condiciones_iva_receptor", result)
+    return result
 
 
 async def get_puntos_venta(comp_info: dict) -> dict:
@@ -92,3 +105,13 @@ async def get_types_paises(comp_info: dict) -> dict:
 async def get_actividades(comp_info: dict) -> dict:
     logger.info("Consulting WSFE issuer activities...")
     return await _request_with_auth("FEParamGetActividades", comp_info["Cuit"])
+
+
+async def refresh_param_tables(cuit: int) -> dict[str, bool]:
+    """Reloads the tables the local FECAESolicitar rules use; True per table refreshed."""
+    refreshed = {}
+    for name, (method_name, _) in PARAM_TABLE_SOURCES.items():
+        args = (None,) if method_name == "FEParamGetCondicionIvaReceptor" else ()
+        result = await _request_with_auth(method_name, cuit, *args)
+        refreshed[name] = param_tables.update_from_result(name, result)
+    return refreshed
@@ -1,16 +1,34 @@
 import json
+import os
+import time
 import uuid
 import xml.etree.ElementTree as ET
-from contextvars import ContextVar
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 from config.paths import get_afip_paths
-from service.observability.models import DomainEventEntry, RequestLogEntry
+from service.observability.metrics import observe_afip_call
+from service.observability.models import (DomainEventEntry, RequestLogEntry,
+                                          Span)
+from service.observability.shared_store import SqliteObservabilityStore
 from service.observability.store import ObservabilityStore
+from service.observability.tracing import span
+from service.xml_management.xml_builder import read_cached
 
-_store = ObservabilityStore.from_env()
+
+def _create_store() -> ObservabilityStore:
+    # "sqlite" shares logs, events and token state across gunicorn workers;
+    # "memory" keeps them in per-process deques.
+    backend = os.getenv("OBS_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SqliteObservabilityStore.from_env()
+    return ObservabilityStore.from_env()
+
+
+_store = _create_store()
 _trace_id_context: ContextVar[str | None] = ContextVar("trace_id", default=None)
 
 
@@ -58,18 +76,65 @@ def _parse_json_body(raw_body: bytes | None) -> dict[str, Any] | None:
     return payload if isinstance(payload, dict) else None
 
 
-def _extract_cuit(request_payload: dict[str, Any] | None) -> int | None:
+def _extract_cuit(request_payload: Any) -> int | None:
+    """Reads Cuit or Auth.Cuit from a parsed JSON body or a pydantic request model."""
     if not request_payload:
         return None
-    cuit = request_payload.get("Cuit")
+    if isinstance(request_payload, dict):
+        cuit = request_payload.get("Cuit")
+        auth = request_payload.get("Auth")
+    else:
+        cuit = getattr(request_payload, "Cuit", None)
+        auth = getattr(request_payload, "Auth", None)
     if isinstance(cuit, int):
         return cuit
-    auth = request_payload.get("Auth")
-    if isinstance(auth, dict) and isinstance(auth.get("Cuit"), int):
-        return auth["Cuit"]
+    auth_cuit = auth.get("Cuit") if isinstance(auth, dict) else getattr(auth, "Cuit", None)
+    if isinstance(auth_cuit, int):
+        return auth_cuit
     return None
 
 
+@dataclass
+class ExchangeInfo:
+    """What the handler knows about the request, published for the access log."""
+
+    cuit: int | None = None
+    error_type: str | None = None
+
+
+_exchange_context: ContextVar[ExchangeInfo | None] = ContextVar("exchange_info", default=None)
+
+
+def start_exchange() -> tuple[ExchangeInfo, Token]:
+    info = ExchangeInfo()
+    return info, _exchange_context.set(info)
+
+
+def end_exchange(token: Token) -> None:
+    _exchange_context.reset(token)
+
+
+def publish_request_model(model: Any) -> None:
+    info = _exchange_context.get()
+    if info is not None and info.cuit is None:
+        info.cuit = _extract_cuit(model)
+
+
+def get_current_cuit() -> int | None:
+    info = _exchange_context.get()
+    return info.cuit if info is not None else None
+
+
+def publish_response(result: Any) -> None:
+    """Handlers return {"status": "error", "error": {...}} dicts on AFIP failures."""
+    info = _exchange_context.get()
+    if info is None or not isinstance(result, dict) or result.get("status") != "error":
+        return
+    error_obj = result.get("error")
+    error_type = error_obj.get("error_type") if isinstance(error_obj, dict) else None
+    info.error_type = error_type or "error"
+
+
 def record_http_exchange(
     *,
     method: str,
@@ -77,19 +142,18 @@ def record_http_exchange(
     status_code: int,
     duration_ms: float,
     trace_id: str,
+    cuit: int | None = None,
+    error_type: str | None = None,
     request_body: bytes | None = None,
-    response_body: bytes | None = None,
+    spans: list[Span] | None = None,
 ) -> None:
-    request_payload = _parse_json_body(request_body)
-    response_payload = _parse_json_body(response_body)
-
-    ok = status_code < 400
-    error_type = None
-    if response_payload and response_payload.get("status") == "error":
-        ok = False
-        error_obj = response_payload.get("error")
-        if isinstance(error_obj, dict):
-            error_type = error_obj.get("error_type")
+    if cuit is None and request_body:
+        # Only requests rejected before reaching a handler (e.g. 422) end up
+        # here; the body is the middleware's capped capture.
+        with span("record_exchange"):
+            cuit = _extract_cuit(_parse_json_body(request_body))
+
+    ok = status_code < 400 and error_type is None
     if not ok and not error_type:
         error_type = f"HTTP_{status_code}"
 
@@ -104,7 +168,8 @@ def record_http_exchange(
             duration_ms=duration_ms,
             service=service,
             error_type=error_type,
-            cuit=_extract_cuit(request_payload),
+            cuit=cuit,
+            spans=list(spans) if spans else [],
         )
     )
 
@@ -157,17 +222,42 @@ def emit_domain_event(
     )
 
 
+def record_soap_call(
+    *,
+    service: str,
+    method: str,
+    started: float,
+    error_type: str | None = None,
+) -> None:
+    """Times a consult_afip_* call (started from time.perf_counter()) into metrics and a soap_call event."""
+    duration_s = time.perf_counter() - started
+    observe_afip_call(service, method, error_type or "success", duration_s)
+    emit_domain_event(
+        event_type="soap_call",
+        service=service,
+        status="error" if error_type else "success",
+        entity_key=method,
+        payload={"duration_ms": round(duration_s * 1000.0, 3)},
+        error_type=error_type,
+    )
+
+
+def _read_expiration_time(path: Path) -> datetime | None:
+    expiration_node = ET.parse(path).getroot().find(".//expirationTime")
+    if expiration_node is None or not expiration_node.text:
+        return None
+    return datetime.fromisoformat(expiration_node.text)
+
+
 def _parse_token_xml(path: Path) -> dict[str, Any]:
     now = datetime.now(timezone.utc)
     if not path.exists():
         return {"valid": False, "expires_at": None, "last_error": "token_file_not_found"}
 
     try:
-        root = ET.parse(path).getroot()
-        expiration_node = root.find(".//expirationTime")
-        if expiration_node is None or not expiration_node.text:
+        expiration = read_cached(path, _read_expiration_time)
+        if expiration is None:
             return {"valid": False, "expires_at": None, "last_error": "missing_expiration_time"}
-        expiration = datetime.fromisoformat(expiration_node.text)
         return {
             "valid": now < expiration,
             "expires_at": expiration.astimezone(timezone.utc).isoformat(),
@@ -0,0 +1,185 @@
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Callable, Hashable, Iterator
+
+
+class SeqIndex:
+    """
+    Entries ordered by their monotonic seq. Appends go to the right and
+    evictions always remove the oldest entry, so the list is trimmed from
+    the left and cursor lookups are a bisect.
+    """
+
+    __slots__ = ("_items", "_head")
+
+    def __init__(self) -> None:
+        self._items: list[Any] = []
+        self._head = 0
+
+    def __len__(self) -> int:
+        return len(self._items) - self._head
+
+    def append(self, entry: Any) -> None:
+        self._items.append(entry)
+
+    def oldest(self) -> Any:
+        return self._items[self._head]
+
+    def discard_oldest(self, entry: Any) -> None:
+        if len(self) and self._items[self._head] is entry:
+            self._items[self._head] = None
+            self._head += 1
+            if self._head > 1024 and self._head * 2 > len(self._items):
+                del self._items[: self._head]
+                self._head = 0
+
+    def iter_before(self, cursor: int | None = None) -> Iterator[Any]:
+        """Newest first, only entries with seq < cursor when a cursor is given."""
+        hi = len(self._items)
+        if cursor is not None:
+            hi = bisect_left(self._items, cursor, lo=self._head, key=lambda e: e.seq)
+        for idx in range(hi - 1, self._head - 1, -1):
+            yield self._items[idx]
+
+    def iter_all(self) -> Iterator[Any]:
+        for idx in range(self._head, len(self._items)):
+            yield self._items[idx]
+
+    def tail_after(self, seq: int, limit: int) -> list[Any]:
+        """Oldest first, the newest `limit` entries with seq > seq."""
+        lo = bisect_left(self._items, seq + 1, lo=self._head, key=lambda e: e.seq)
+        return self._items[max(lo, len(self._items) - limit):]
+
+
+class IndexedBuffer:
+    """
+    Bounded buffer of entries with a secondary SeqIndex per field value.
+    Queries start from the smallest matching index instead of the whole
+    buffer and page backwards from a seq cursor.
+    """
+
+    def __init__(self, maxlen: int, fields: dict[str, Callable[[Any], Hashable | None]]) -> None:
+        self._maxlen = maxlen
+        self._fields = fields
+        self._seq = 0
+        self._all = SeqIndex()
+        self._indexes: dict[str, defaultdict[Hashable, SeqIndex]] = {
+            name: defaultdict(SeqIndex) for name in fields
+        }
+
+    def append(self, entry: Any) -> None:
+        if len(self._all) >= self._maxlen:
+            self._evict(self._all.oldest())
+        self._seq += 1
+        entry.seq = self._seq
+        self._all.append(entry)
+        for name, getter in self._fields.items():
+            value = getter(entry)
+            if value is not None:
+                self._indexes[name][value].append(entry)
+
+    def _evict(self, entry: Any) -> None:
+        self._all.discard_oldest(entry)
+        for name, getter in self._fields.items():
+            value = getter(entry)
+            index = self._indexes[name].get(value)
+            if index is None:
+                continue
+            index.discard_oldest(entry)
+            if not len(index):
+                del self._indexes[name][value]
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def tail_after(self, seq: int, limit: int) -> list[Any]:
+        return self._all.tail_after(seq, limit)
+
+    def lookup(self, name: str, value: Hashable) -> list[Any]:
+        index = self._indexes[name].get(value)
+        return list(index.iter_all()) if index else []
+
+    def values(self, name: str) -> list[Hashable]:
+        return list(self._indexes[name])
+
+    def query(
+        self,
+        equals: dict[str, Hashable],
+        contains: tuple[str, str] | None = None,
+        cursor: int | None = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> tuple[list[Any], int, int | None]:
+        """
+        Returns (page, total, next_cursor), newest first. equals filters are
+        served by their index; contains=(field, text) unions the indexes of
+        every distinct value of that field containing text. Only the smallest
+        candidate index is walked, the other filters are checked per entry.
+        """
+        candidates: list[tuple[int, Callable[[int | None], Iterator[Any]]]] = []
+        for name, value in equals.items():
+            index = self._indexes[name].get(value)
+            if index is None:
+                return [], 0, None
+            candidates.append((len(index), index.iter_before))
+
+        if contains is not None:
+            name, text = contains
+            matched = [index for value, index in self._indexes[name].items() if text in value]
+            if not matched:
+                return [], 0, None
+
+            def _merged(before: int | None, matched=matched) -> Iterator[Any]:
+                return heapq.merge(
+                    *(index.iter_before(before) for index in matched),
+                    key=lambda e: e.seq,
+                    reverse=True,
+                )
+
+            candidates.append((sum(len(index) for index in matched), _merged))
+
+        if not candidates:
+            candidates.append((len(self._all), self._all.iter_before))
+
+        candidates.sort(key=lambda c: c[0])
+        smallest_size, walk = candidates[0]
+        single_filter = len(candidates) == 1
+
+        def _matches(entry: Any) -> bool:
+            if single_filter:
+                return True
+            for name, value in equals.items():
+                if self._fields[name](entry) != value:
+                    return False
+            if contains is not None and contains[1] not in self._fields[contains[0]](entry):
+                return False
+            return True
+
+        # With a single filter the index size is the total; otherwise matches
+        # are counted while walking (page mode) or in a separate pass (cursor mode).
+        count_while_walking = not single_filter and cursor is None
+        page: list[Any] = []
+        next_cursor = None
+        matched_count = 0
+        for entry in walk(cursor):
+            if not _matches(entry):
+                continue
+            matched_count += 1
+            if matched_count <= offset:
+                continue
+            if len(page) < limit:
+                page.append(entry)
+                continue
+            next_cursor = page[-1].seq
+            if not count_while_walking:
+                break
+
+        if single_filter:
+            total = smallest_size
+        elif count_while_walking:
+            total = matched_count
+        else:
+            total = sum(1 for entry in walk(None) if _matches(entry))
+        return page, total, next_cursor
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any
+
+from service.observability.collector import emit_domain_event
+from service.observability.metrics import (event_loop_lag_seconds,
+                                           event_loop_stalls)
+from service.observability.profiler import format_stack, thread_stack
+from service.utils.logger import logger
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL_SECONDS = float(os.getenv("LOOP_MONITOR_INTERVAL_SECONDS", "0.25"))
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+
+
+class LoopLagMonitor:
+    """
+    A heartbeat task measures how late asyncio wakes it up (loop lag). A
+    watchdog thread notices when the heartbeat is overdue and captures the
+    loop thread's stack while it is still blocked, so the stall event names
+    the synchronous call (sqlite, etree.parse, ntplib...) that caused it.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL_SECONDS,
+        threshold_ms: float = LOOP_STALL_THRESHOLD_MS,
+        history: int = 50,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold_ms / 1000.0
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=history)
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._expected_wake = 0.0
+        self._blocked_stack: list[str] | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._expected_wake = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._expected_wake)
+            self._record(lag)
+
+    def _record(self, lag: float) -> None:
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        event_loop_lag_seconds.labels().observe(lag)
+        stack, self._blocked_stack = self._blocked_stack, None
+        if lag < self.threshold:
+            return
+
+        event_loop_stalls.labels().inc()
+        stall = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "lag_ms": round(lag * 1000.0, 3),
+            "stack": stack or [],
+        }
+        self.stalls.append(stall)
+        logger.warning(f"Event loop blocked for {stall['lag_ms']} ms at {stack[-1] if stack else 'unknown'}")
+        emit_domain_event(
+            event_type="event_loop_stall",
+            service="relay",
+            status="error",
+            entity_key=stack[-1] if stack else None,
+            payload=stall,
+        )
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.interval / 2):
+            expected = self._expected_wake
+            if not expected or self._blocked_stack is not None:
+                continue
+            if time.monotonic() - expected >= self.threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._blocked_stack = format_stack(thread_stack(frame))
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="afrelay-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        self._expected_wake = 0.0
+
+    @property
+    def loop_thread_id(self) -> int | None:
+        return self._loop_thread_id
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "threshold_ms": self.threshold * 1000.0,
+            "last_lag_ms": round(self.last_lag * 1000.0, 3),
+            "max_lag_ms": round(self.max_lag * 1000.0, 3),
+            "stalls": list(self.stalls),
+        }
+
+
+loop_monitor = LoopLagMonitor()
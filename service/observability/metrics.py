@@ -0,0 +1,318 @@
+import math
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Callable, Iterable
+
+# Text exposition format understood by Prometheus and OpenMetrics scrapers.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+AFIP_OPERATIONS = {
+    "wsfe": (
+        "FECAESolicitar",
+        "FECompConsultar",
+        "FECompUltimoAutorizado",
+        "FECompTotXRequest",
+        "FECAEASolicitar",
+        "FECAEAConsultar",
+        "FECAEARegInformativo",
+        "FECAEASinMovimientoConsultar",
+        "FECAEASinMovimientoInformar",
+        "FEParamGetActividades",
+        "FEParamGetCondicionIvaReceptor",
+        "FEParamGetCotizacion",
+        "FEParamGetPtosVenta",
+        "FEParamGetTiposCbte",
+        "FEParamGetTiposConcepto",
+        "FEParamGetTiposDoc",
+        "FEParamGetTiposIva",
+        "FEParamGetTiposMonedas",
+        "FEParamGetTiposOpcional",
+        "FEParamGetTiposPaises",
+        "FEParamGetTiposTributos",
+    ),
+    "wsaa": ("loginCms",),
+    "wspci": ("getPersona", "getPersonaList"),
+}
+
+AFIP_OUTCOMES = (
+    "success",
+    "Network error",
+    "HTTP Error",
+    "SOAPFault",
+    "Invalid AFIP response",
+    "Circuit open",
+    "Request abandoned",
+    "unknown",
+)
+
+AFIP_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = Lock()
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh value holder for one label combination."""
+
+    def labels(self, *values: str):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+    @abstractmethod
+    def _samples(self) -> Iterable[str]:
+        """Exposition lines for every child."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _samples(self) -> Iterable[str]:
+        for key, child in list(self._children.items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _samples(self) -> Iterable[str]:
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        idx = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                idx = i
+                break
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = AFIP_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def _samples(self) -> Iterable[str]:
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(child.sum)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    Metrics are updated in place when the event happens. Collectors run at
+    scrape time for the few values that live elsewhere (outbox rows, token
+    files, connection pools) and only set gauges.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+afip_requests = registry.register(
+    Counter(
+        "afrelay_afip_requests",
+        "SOAP calls to AFIP by service, method and outcome.",
+        ("service", "method", "outcome"),
+    )
+)
+afip_request_duration = registry.register(
+    Histogram(
+        "afrelay_afip_request_duration_seconds",
+        "Latency of SOAP calls to AFIP.",
+        ("service", "method", "outcome"),
+    )
+)
+afip_retries = registry.register(
+    Counter(
+        "afrelay_afip_retries",
+        "SOAP call attempts retried after a transient failure.",
+        ("service", "method"),
+    )
+)
+outbox_jobs = registry.register(
+    Gauge("afrelay_caea_outbox_jobs", "CAEA outbox jobs by status.", ("status",))
+)
+token_seconds_to_expiry = registry.register(
+    Gauge(
+        "afrelay_token_seconds_to_expiry",
+        "Seconds until the stored access ticket expires (negative once expired).",
+        ("service",),
+    )
+)
+http_in_flight = registry.register(
+    Gauge("afrelay_http_in_flight_requests", "AFIP HTTP requests currently in flight.", ("service",))
+)
+http_pool_limits = registry.register(
+    Gauge("afrelay_http_pool_limit", "Configured httpx connection limits of the AFIP clients.", ("service", "limit"))
+)
+circuit_state = registry.register(
+    Gauge(
+        "afrelay_afip_circuit_state",
+        "AFIP circuit breaker state (0 closed, 1 half-open, 2 open).",
+        ("service", "method"),
+    )
+)
+admission_rejections = registry.register(
+    Counter(
+        "afrelay_afip_admission_rejections",
+        "AFIP calls rejected by admission control before reaching AFIP.",
+        ("service", "reason"),
+    )
+)
+admission_slots = registry.register(
+    Gauge(
+        "afrelay_afip_admission_slots",
+        "AFIP calls holding (in_flight) or waiting for (queued) a concurrency slot.",
+        ("service", "state"),
+    )
+)
+persona_cache_lookups = registry.register(
+    Counter(
+        "afrelay_persona_cache_lookups",
+        "WSPCI persona lookups by cache result (hit, negative_hit, miss, coalesced).",
+        ("result",),
+    )
+)
+invoice_local_rejections = registry.register(
+    Counter(
+        "afrelay_invoice_local_rejections",
+        "FECAESolicitar requests rejected by the local parameter-table rules, by rule.",
+        ("rule",),
+    )
+)
+event_loop_lag_seconds = registry.register(
+    Histogram(
+        "afrelay_event_loop_lag_seconds",
+        "How late the event loop ran a timer scheduled by the lag monitor.",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    )
+)
+event_loop_stalls = registry.register(
+    Counter("afrelay_event_loop_stalls", "Times the event loop was blocked beyond LOOP_STALL_THRESHOLD_MS.")
+)
+clock_offset_seconds = registry.register(
+    Gauge("afrelay_clock_offset_seconds", "Offset of the local clock against the NTP server.")
+)
+clock_staleness_seconds = registry.register(
+    Gauge("afrelay_clock_staleness_seconds", "Seconds since the last successful NTP sync (-1 if never synced).")
+)
+
+for _service, _methods in AFIP_OPERATIONS.items():
+    for _method in _methods:
+        afip_retries.labels(_service, _method)
+        circuit_state.labels(_service, _method)
+        for _outcome in AFIP_OUTCOMES:
+            afip_requests.labels(_service, _method, _outcome)
+            afip_request_duration.labels(_service, _method, _outcome)
+
+
+def observe_afip_call(service: str, method: str, outcome: str, duration_s: float) -> None:
+    afip_requests.labels(service, method, outcome).inc()
+    afip_request_duration.labels(service, method, outcome).observe(duration_s)
@@ -3,6 +3,13 @@ from datetime import datetime, timezone
 from typing import Any
 
 
+@dataclass
+class Span:
+    name: str
+    start_ms: float
+    duration_ms: float
+
+
 @dataclass
 class RequestLogEntry:
     trace_id: str
@@ -15,6 +22,8 @@ class RequestLogEntry:
     timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     error_type: str | None = None
     cuit: int | None = None
+    seq: int = 0
+    spans: list[Span] = field(default_factory=list)
 
 
 @dataclass
@@ -27,3 +36,4 @@ class DomainEventEntry:
     error_type: str | None = None
     entity_key: str | None = None
     payload: dict[str, Any] | None = None
+    seq: int = 0
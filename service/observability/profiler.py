@@ -0,0 +1,126 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any
+
+MAX_PROFILE_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+
+
+class ProfilerBusyError(Exception):
+    pass
+
+
+def frame_label(frame: FrameType) -> tuple[str, str, int]:
+    code = frame.f_code
+    return code.co_name, code.co_filename, code.co_firstlineno
+
+
+def thread_stack(frame: FrameType | None) -> tuple[tuple[str, str, int], ...]:
+    """Root-first stack of (function, file, first line) for a thread's current frame."""
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def format_stack(stack: tuple[tuple[str, str, int], ...]) -> list[str]:
+    return [f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in stack]
+
+
+class SamplingProfiler:
+    """
+    Wall-clock stack sampler: a timer thread snapshots sys._current_frames()
+    every `interval` seconds. Blocking calls on the event loop thread show
+    up as the loop's leaf frames, which an async-unaware profiler would miss.
+    """
+
+    def __init__(self, interval: float = 0.01, thread_ids: set[int] | None = None) -> None:
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.samples: Counter[tuple[str, tuple[tuple[str, str, int], ...]]] = Counter()
+        self.sample_count = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        started = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                self.samples[(names.get(thread_id, str(thread_id)), thread_stack(frame))] += 1
+            self.sample_count += 1
+        self.duration = time.perf_counter() - started
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="afrelay-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format, one `thread;frame;frame count` line per stack."""
+        lines = [
+            ";".join([thread_name, *format_stack(stack)]) + f" {count}"
+            for (thread_name, stack), count in self.samples.most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "afrelay") -> dict[str, Any]:
+        frames: list[dict[str, Any]] = []
+        frame_index: dict[tuple[str, str, int], int] = {}
+        profiles: dict[str, dict[str, Any]] = {}
+
+        for (thread_name, stack), count in self.samples.items():
+            indexes = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label[0], "file": label[1], "line": label[2]})
+                indexes.append(frame_index[label])
+            profile = profiles.setdefault(
+                thread_name,
+                {
+                    "type": "sampled",
+                    "name": thread_name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(self.duration, 6),
+                    "samples": [],
+                    "weights": [],
+                },
+            )
+            profile["samples"].append(indexes)
+            profile["weights"].append(round(count * self.interval, 6))
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "afrelay",
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+
+_profile_lock = threading.Lock()
+
+
+def acquire_profile_slot() -> None:
+    """Only one profile runs at a time; sampling every thread is not free."""
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+
+
+def release_profile_slot() -> None:
+    _profile_lock.release()
@@ -0,0 +1,595 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Any, Callable
+
+from service.observability.models import (DomainEventEntry, RequestLogEntry,
+                                          Span)
+from service.observability.sketch import LatencySketch
+from service.observability.store import (BUCKET_RETENTION_MINUTES,
+                                         EventCounter, ObservabilityStore,
+                                         RequestCounter, _cutoff_minute,
+                                         _errors_from_counters, _event_to_dict,
+                                         _log_to_dict, _minute_of,
+                                         _operations_from_counters,
+                                         _summary_from_counters)
+from service.utils.logger import logger
+
+ZERO_BIN = -1_000_000
+
+# Rows are pruned in batches instead of on every insert, so each table holds
+# at most max_rows + PRUNE_EVERY + WRITE_BATCH_SIZE rows.
+PRUNE_EVERY = 100
+
+# Writes are queued to one writer thread per store and committed in batches,
+# so a request never waits on SQLite or on another worker's file lock.
+WRITE_QUEUE_SIZE = int(os.getenv("OBS_WRITE_QUEUE_SIZE", "10000"))
+WRITE_BATCH_SIZE = 500
+
+Write = Callable[[sqlite3.Connection], None]
+
+
+def _ts(value: datetime) -> float:
+    return value.timestamp()
+
+
+def _from_ts(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+class SqliteObservabilityStore(ObservabilityStore):
+    """
+    ObservabilityStore backed by a single SQLite file (WAL mode) that every
+    gunicorn worker appends to, so /ui endpoints see the whole fleet.
+    Tables are capped to max_logs / max_events rows; per-minute counters and
+    latency bins are upserted on insert so summaries read O(buckets).
+    Writes are committed by a background thread; reads first wait for this
+    store's queued writes, other workers' rows show up once they commit.
+    """
+
+    def __init__(self, db_path: Path, max_logs: int = 5000, max_events: int = 2000) -> None:
+        self._db_path = Path(db_path)
+        self._max_logs = max_logs
+        self._max_events = max_events
+        self._lock = Lock()
+        self._inserts_since_prune = 0
+        self._sketch = LatencySketch()
+
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self._db_path,
+            timeout=5.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._init_schema()
+
+        self._writes: queue.Queue[Write | Event | None] = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.dropped_writes = 0
+        self._writer = Thread(target=self._write_loop, name="obs-sqlite-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls) -> "SqliteObservabilityStore":
+        db_path = Path(os.getenv("OBS_DB_PATH", "service/state/afrelay_observability.db"))
+        max_logs = int(os.getenv("OBS_MAX_LOGS", "5000"))
+        max_events = int(os.getenv("OBS_MAX_EVENTS", "2000"))
+        return cls(db_path=db_path, max_logs=max_logs, max_events=max_events)
+
+    def _init_schema(self) -> None:
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS obs_request_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts REAL NOT NULL,
+                    trace_id TEXT NOT NULL,
+                    method TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    status_code INTEGER NOT NULL,
+                    ok INTEGER NOT NULL,
+                    duration_ms REAL NOT NULL,
+                    service TEXT NOT NULL,
+                    error_type TEXT,
+                    cuit INTEGER,
+                    spans_json TEXT
+                );
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_obs_request_log_ts ON obs_request_log (ts);")
+            for column in ("service", "error_type", "ok", "path", "trace_id", "cuit"):
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS ix_obs_request_log_{column} ON obs_request_log ({column}, id);"
+                )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS obs_domain_event (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts REAL NOT NULL,
+                    event_type TEXT NOT NULL,
+                    service TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    trace_id TEXT,
+                    error_type TEXT,
+                    entity_key TEXT,
+                    payload_json TEXT
+                );
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_obs_domain_event_ts ON obs_domain_event (ts);")
+            for column in ("service", "event_type", "status", "trace_id"):
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS ix_obs_domain_event_{column} ON obs_domain_event ({column}, id);"
+                )
+            # NULL error types are stored as '' so they take part in the upsert keys.
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS obs_request_minute (
+                    minute INTEGER NOT NULL,
+                    service TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    ok INTEGER NOT NULL,
+                    error_type TEXT NOT NULL,
+                    status_code INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    duration_ms REAL NOT NULL,
+                    last_ts REAL NOT NULL,
+                    PRIMARY KEY (minute, service, path, ok, error_type, status_code)
+                );
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS obs_latency_minute (
+                    minute INTEGER NOT NULL,
+                    bin INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (minute, bin)
+                );
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS obs_event_minute (
+                    minute INTEGER NOT NULL,
+                    event_type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error_type TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (minute, event_type, status, error_type)
+                );
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS obs_token_status (
+                    service TEXT PRIMARY KEY,
+                    value_json TEXT NOT NULL
+                );
+                """
+            )
+
+    def _submit(self, write: Write) -> None:
+        try:
+            self._writes.put_nowait(write)
+        except queue.Full:
+            # Like the log queue: drop telemetry rather than block the caller.
+            self.dropped_writes += 1
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            writes = [item for item in batch if item is not None and not isinstance(item, Event)]
+            if writes:
+                try:
+                    self._commit(writes)
+                except Exception as e:
+                    logger.error(f"Dropping {len(writes)} observability writes: {e}")
+            for item in batch:
+                if isinstance(item, Event):
+                    item.set()
+            if any(item is None for item in batch):
+                return
+
+    def _commit(self, writes: list[Write]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for write in writes:
+                    write(self._conn)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._prune_if_due(len(writes))
+
+    def flush(self) -> None:
+        """Blocks until every write queued before the call is committed."""
+        if not self._writer.is_alive():
+            return
+        done = Event()
+        self._writes.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._writes.put(None)
+            self._writer.join()
+
+    @contextmanager
+    def _reading(self):
+        self.flush()
+        with self._lock:
+            yield self._conn
+
+    def _prune_if_due(self, inserts: int) -> None:
+        self._inserts_since_prune += inserts
+        if self._inserts_since_prune < PRUNE_EVERY:
+            return
+        self._inserts_since_prune = 0
+        self._conn.execute(
+            "DELETE FROM obs_request_log WHERE id <= (SELECT MAX(id) FROM obs_request_log) - ?",
+            (self._max_logs,),
+        )
+        self._conn.execute(
+            "DELETE FROM obs_domain_event WHERE id <= (SELECT MAX(id) FROM obs_domain_event) - ?",
+            (self._max_events,),
+        )
+        oldest_minute = _minute_of(datetime.now(timezone.utc)) - BUCKET_RETENTION_MINUTES
+        for table in ("obs_request_minute", "obs_latency_minute", "obs_event_minute"):
+            self._conn.execute(f"DELETE FROM {table} WHERE minute <= ?", (oldest_minute,))
+
+    @staticmethod
+    def _row_to_log(row: sqlite3.Row) -> RequestLogEntry:
+        return RequestLogEntry(
+            trace_id=row["trace_id"],
+            method=row["method"],
+            path=row["path"],
+            status_code=row["status_code"],
+            ok=bool(row["ok"]),
+            duration_ms=row["duration_ms"],
+            service=row["service"],
+            timestamp=_from_ts(row["ts"]),
+            error_type=row["error_type"],
+            cuit=row["cuit"],
+            seq=row["id"],
+            spans=[Span(**item) for item in json.loads(row["spans_json"])] if row["spans_json"] else [],
+        )
+
+    @staticmethod
+    def _row_to_event(row: sqlite3.Row) -> DomainEventEntry:
+        return DomainEventEntry(
+            event_type=row["event_type"],
+            service=row["service"],
+            status=row["status"],
+            timestamp=_from_ts(row["ts"]),
+            trace_id=row["trace_id"],
+            error_type=row["error_type"],
+            entity_key=row["entity_key"],
+            payload=json.loads(row["payload_json"]) if row["payload_json"] else None,
+            seq=row["id"],
+        )
+
+    def add_request_log(self, entry: RequestLogEntry) -> None:
+        self._submit(lambda conn: self._insert_request_log(conn, entry))
+
+    def _insert_request_log(self, conn: sqlite3.Connection, entry: RequestLogEntry) -> None:
+        minute = _minute_of(entry.timestamp)
+        latency_bin = self._sketch.bin_index(entry.duration_ms)
+        conn.execute(
+            """
+            INSERT INTO obs_request_log
+                (ts, trace_id, method, path, status_code, ok, duration_ms, service, error_type, cuit, spans_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                _ts(entry.timestamp),
+                entry.trace_id,
+                entry.method,
+                entry.path,
+                entry.status_code,
+                int(entry.ok),
+                entry.duration_ms,
+                entry.service,
+                entry.error_type,
+                entry.cuit,
+                json.dumps([asdict(s) for s in entry.spans]) if entry.spans else None,
+            ),
+        )
+        conn.execute(
+            """
+            INSERT INTO obs_request_minute
+                (minute, service, path, ok, error_type, status_code, count, duration_ms, last_ts)
+            VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+            ON CONFLICT (minute, service, path, ok, error_type, status_code) DO UPDATE SET
+                count = count + 1,
+                duration_ms = duration_ms + excluded.duration_ms,
+                last_ts = MAX(last_ts, excluded.last_ts)
+            """,
+            (
+                minute,
+                entry.service,
+                entry.path,
+                int(entry.ok),
+                entry.error_type or "",
+                entry.status_code,
+                entry.duration_ms,
+                _ts(entry.timestamp),
+            ),
+        )
+        conn.execute(
+            """
+            INSERT INTO obs_latency_minute (minute, bin, count) VALUES (?, ?, 1)
+            ON CONFLICT (minute, bin) DO UPDATE SET count = count + 1
+            """,
+            (minute, ZERO_BIN if latency_bin is None else latency_bin),
+        )
+
+    def add_domain_event(self, event: DomainEventEntry) -> None:
+        # Payloads are serialised now: callers may reuse the dict once this returns.
+        payload_json = json.dumps(event.payload, default=str) if event.payload is not None else None
+        self._submit(lambda conn: self._insert_domain_event(conn, event, payload_json))
+
+    @staticmethod
+    def _insert_domain_event(conn: sqlite3.Connection, event: DomainEventEntry, payload_json: str | None) -> None:
+        conn.execute(
+            """
+            INSERT INTO obs_domain_event
+                (ts, event_type, service, status, trace_id, error_type, entity_key, payload_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                _ts(event.timestamp),
+                event.event_type,
+                event.service,
+                event.status,
+                event.trace_id,
+                event.error_type,
+                event.entity_key,
+                payload_json,
+            ),
+        )
+        conn.execute(
+            """
+            INSERT INTO obs_event_minute (minute, event_type, status, error_type, count)
+            VALUES (?, ?, ?, ?, 1)
+            ON CONFLICT (minute, event_type, status, error_type) DO UPDATE SET count = count + 1
+            """,
+            (_minute_of(event.timestamp), event.event_type, event.status, event.error_type or ""),
+        )
+
+    def update_token_status(self, service: str, value: dict[str, Any]) -> None:
+        params = (service, json.dumps(value, default=str))
+        self._submit(
+            lambda conn: conn.execute(
+                """
+                INSERT INTO obs_token_status (service, value_json) VALUES (?, ?)
+                ON CONFLICT(service) DO UPDATE SET value_json=excluded.value_json
+                """,
+                params,
+            )
+        )
+
+    def get_token_status(self) -> dict[str, dict[str, Any]]:
+        with self._reading():
+            rows = self._conn.execute("SELECT service, value_json FROM obs_token_status").fetchall()
+        return {row["service"]: json.loads(row["value_json"]) for row in rows}
+
+    def list_logs(
+        self,
+        page: int = 1,
+        page_size: int = 50,
+        endpoint: str | None = None,
+        status: str | None = None,
+        service: str | None = None,
+        error_type: str | None = None,
+        cuit: int | None = None,
+        trace_id: str | None = None,
+        cursor: int | None = None,
+    ) -> dict[str, Any]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if endpoint:
+            clauses.append("instr(path, ?) > 0")
+            params.append(endpoint)
+        if service:
+            clauses.append("service = ?")
+            params.append(service)
+        if status == "ok":
+            clauses.append("ok = 1")
+        elif status == "error":
+            clauses.append("ok = 0")
+        if error_type:
+            clauses.append("error_type = ?")
+            params.append(error_type)
+        if cuit is not None:
+            clauses.append("cuit = ?")
+            params.append(cuit)
+        if trace_id:
+            clauses.append("trace_id = ?")
+            params.append(trace_id)
+        return self._page("obs_request_log", clauses, params, page, page_size, cursor, self._row_to_log, _log_to_dict)
+
+    def _page(
+        self,
+        table: str,
+        clauses: list[str],
+        params: list[Any],
+        page: int,
+        page_size: int,
+        cursor: int | None,
+        row_to_entry: Callable[[sqlite3.Row], Any],
+        to_dict: Callable[[Any], dict[str, Any]],
+    ) -> dict[str, Any]:
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        page_clauses = list(clauses)
+        page_params = list(params)
+        if cursor is not None:
+            # Keyset pagination: the id is the seq and walks the (column, id) indexes backwards.
+            page_clauses.append("id < ?")
+            page_params.append(cursor)
+            offset = 0
+        else:
+            offset = max((page - 1) * page_size, 0)
+        page_where = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+
+        with self._reading():
+            total = self._conn.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM {table} {page_where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                [*page_params, page_size + 1, offset],
+            ).fetchall()
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        return {
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "next_cursor": rows[-1]["id"] if has_more else None,
+            "items": [to_dict(row_to_entry(row)) for row in rows],
+        }
+
+    def _since(
+        self,
+        table: str,
+        seq: int | None,
+        limit: int,
+        row_to_entry: Callable[[sqlite3.Row], Any],
+        to_dict: Callable[[Any], dict[str, Any]],
+    ) -> dict[str, Any]:
+        with self._reading():
+            cursor = self._conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            rows = [] if seq is None else self._conn.execute(
+                f"SELECT * FROM {table} WHERE id > ? AND id <= ? ORDER BY id DESC LIMIT ?",
+                (seq, cursor, limit),
+            ).fetchall()
+        return {"cursor": cursor, "items": [to_dict(row_to_entry(row)) for row in reversed(rows)]}
+
+    def logs_since(self, seq: int | None, limit: int = 200) -> dict[str, Any]:
+        # Rows from every worker, so each pod's stream sees the whole fleet.
+        return self._since("obs_request_log", seq, limit, self._row_to_log, _log_to_dict)
+
+    def events_since(self, seq: int | None, limit: int = 200) -> dict[str, Any]:
+        return self._since("obs_domain_event", seq, limit, self._row_to_event, _event_to_dict)
+
+    def _request_counters(self, window_minutes: int) -> tuple[list[RequestCounter], LatencySketch]:
+        cutoff = _cutoff_minute(window_minutes)
+        with self._reading():
+            rows = self._conn.execute(
+                """
+                SELECT service, path, ok, error_type, status_code,
+                       SUM(count) AS count, SUM(duration_ms) AS duration_ms, MAX(last_ts) AS last_ts
+                  FROM obs_request_minute
+                 WHERE minute >= ?
+                 GROUP BY service, path, ok, error_type, status_code
+                 ORDER BY MIN(minute) ASC
+                """,
+                (cutoff,),
+            ).fetchall()
+            bins = self._conn.execute(
+                "SELECT bin, SUM(count) AS count FROM obs_latency_minute WHERE minute >= ? GROUP BY bin",
+                (cutoff,),
+            ).fetchall()
+
+        sketch = LatencySketch()
+        for row in bins:
+            sketch.add_bin(None if row["bin"] == ZERO_BIN else row["bin"], row["count"])
+        counters = [
+            RequestCounter(
+                service=row["service"],
+                path=row["path"],
+                ok=bool(row["ok"]),
+                error_type=row["error_type"] or None,
+                status_code=row["status_code"],
+                count=row["count"],
+                duration_ms=row["duration_ms"],
+                last_seen=row["last_ts"],
+            )
+            for row in rows
+        ]
+        return counters, sketch
+
+    def _event_counters(self, window_minutes: int) -> list[EventCounter]:
+        with self._reading():
+            rows = self._conn.execute(
+                """
+                SELECT event_type, status, error_type, SUM(count) AS count
+                  FROM obs_event_minute
+                 WHERE minute >= ?
+                 GROUP BY event_type, status, error_type
+                """,
+                (_cutoff_minute(window_minutes),),
+            ).fetchall()
+        return [
+            EventCounter(row["event_type"], row["status"], row["error_type"] or None, row["count"])
+            for row in rows
+        ]
+
+    def get_summary(self, window_minutes: int = 60) -> dict[str, Any]:
+        counters, sketch = self._request_counters(window_minutes)
+        return _summary_from_counters(window_minutes, counters, sketch)
+
+    def get_errors(self, window_minutes: int = 60, group_by: str = "error_type") -> dict[str, Any]:
+        counters, _ = self._request_counters(window_minutes)
+        return _errors_from_counters(window_minutes, group_by, counters)
+
+    def get_operations_summary(self, window_minutes: int = 60) -> dict[str, Any]:
+        counters, _ = self._request_counters(window_minutes)
+        return _operations_from_counters(window_minutes, counters, self._event_counters(window_minutes))
+
+    def list_domain_events(
+        self,
+        page: int = 1,
+        page_size: int = 50,
+        service: str | None = None,
+        event_type: str | None = None,
+        status: str | None = None,
+        trace_id: str | None = None,
+        cursor: int | None = None,
+    ) -> dict[str, Any]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        for column, value in (
+            ("service", service),
+            ("event_type", event_type),
+            ("status", status),
+            ("trace_id", trace_id),
+        ):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return self._page(
+            "obs_domain_event", clauses, params, page, page_size, cursor, self._row_to_event, _event_to_dict
+        )
+
+    def get_trace(self, trace_id: str) -> dict[str, Any]:
+        with self._reading():
+            logs = self._conn.execute(
+                "SELECT * FROM obs_request_log WHERE trace_id = ? ORDER BY id ASC", (trace_id,)
+            ).fetchall()
+            events = self._conn.execute(
+                "SELECT * FROM obs_domain_event WHERE trace_id = ? ORDER BY id ASC", (trace_id,)
+            ).fetchall()
+        return {
+            "trace_id": trace_id,
+            "logs": [_log_to_dict(self._row_to_log(row)) for row in logs],
+            "events": [_event_to_dict(self._row_to_event(row)) for row in events],
+        }
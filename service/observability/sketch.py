@@ -0,0 +1,57 @@
+import math
+
+
+class LatencySketch:
+    """
+    Log-bucketed latency histogram (DDSketch-style). Quantiles are answered
+    from the bucket counts with a bounded relative error, so summaries never
+    need to keep or sort the raw durations. Sketches merge by adding counts.
+    """
+
+    MIN_VALUE_MS = 0.001
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def bin_index(self, value_ms: float) -> int | None:
+        if value_ms <= self.MIN_VALUE_MS:
+            return None
+        return math.ceil(math.log(value_ms) / self._log_gamma)
+
+    def bin_value(self, index: int) -> float:
+        return 2 * (self._gamma ** index) / (self._gamma + 1)
+
+    def add(self, value_ms: float, count: int = 1) -> None:
+        self.add_bin(self.bin_index(value_ms), count)
+
+    def add_bin(self, index: int | None, count: int = 1) -> None:
+        if index is None:
+            self.zero_count += count
+        else:
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+
+    def merge(self, other: "LatencySketch") -> None:
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        # Same rank rule as a nearest-rank percentile over the sorted values.
+        rank = max(0, min(self.count - 1, math.ceil(q * self.count) - 1))
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                return self.bin_value(index)
+        return self.bin_value(max(self.bins))
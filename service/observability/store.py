@@ -1,11 +1,15 @@
-import math
 import os
 from collections import Counter, deque
 from datetime import datetime, timedelta, timezone
 from threading import Lock
-from typing import Any
+from typing import Any, Iterable, NamedTuple
 
+from service.observability.index import IndexedBuffer
 from service.observability.models import DomainEventEntry, RequestLogEntry
+from service.observability.sketch import LatencySketch
+
+# Per-minute counters are kept for the widest window the /ui endpoints accept.
+BUCKET_RETENTION_MINUTES = 1440
 
 
 def _dt_to_iso(value: datetime | None) -> str | None:
@@ -14,18 +18,238 @@ def _dt_to_iso(value: datetime | None) -> str | None:
     return value.astimezone(timezone.utc).isoformat()
 
 
-def _percentile(values: list[float], p: float) -> float:
-    if not values:
-        return 0.0
-    ordered = sorted(values)
-    idx = max(0, min(len(ordered) - 1, math.ceil(p * len(ordered)) - 1))
-    return ordered[idx]
+def _minute_of(value: datetime) -> int:
+    return int(value.timestamp() // 60)
+
+
+def _cutoff_minute(window_minutes: int) -> int:
+    return _minute_of(datetime.now(timezone.utc) - timedelta(minutes=window_minutes))
+
+
+SERVICES = ("wsfe", "wsaa", "wspci", "ui", "health", "other")
+
+WSFE_PARAM_PATHS = {
+    "max_reg_x_request": "/wsfe/params/max-reg-x-request",
+    "types_cbte": "/wsfe/params/types-cbte",
+    "types_doc": "/wsfe/params/types-doc",
+    "types_iva": "/wsfe/params/types-iva",
+    "types_tributos": "/wsfe/params/types-tributos",
+    "types_monedas": "/wsfe/params/types-monedas",
+    "condicion_iva_receptor": "/wsfe/params/condicion-iva-receptor",
+    "puntos_venta": "/wsfe/params/puntos-venta",
+    "cotizacion": "/wsfe/params/cotizacion",
+    "types_concepto": "/wsfe/params/types-concepto",
+    "types_opcional": "/wsfe/params/types-opcional",
+    "types_paises": "/wsfe/params/types-paises",
+    "actividades": "/wsfe/params/actividades",
+}
+
+CAEA_PATHS = [
+    "/wsfe/caea/solicitar",
+    "/wsfe/caea/consultar",
+    "/wsfe/caea/informar",
+    "/wsfe/caea/sin-movimiento/consultar",
+    "/wsfe/caea/sin-movimiento/informar",
+]
+
+
+def _log_to_dict(entry: RequestLogEntry) -> dict[str, Any]:
+    return {
+        "seq": entry.seq,
+        "timestamp": _dt_to_iso(entry.timestamp),
+        "trace_id": entry.trace_id,
+        "method": entry.method,
+        "path": entry.path,
+        "status_code": entry.status_code,
+        "ok": entry.ok,
+        "duration_ms": round(entry.duration_ms, 3),
+        "service": entry.service,
+        "error_type": entry.error_type,
+        "cuit": entry.cuit,
+        "spans": [
+            {"name": s.name, "start_ms": s.start_ms, "duration_ms": s.duration_ms}
+            for s in entry.spans
+        ],
+    }
+
+
+def _event_to_dict(event: DomainEventEntry) -> dict[str, Any]:
+    return {
+        "seq": event.seq,
+        "timestamp": _dt_to_iso(event.timestamp),
+        "trace_id": event.trace_id,
+        "service": event.service,
+        "event_type": event.event_type,
+        "status": event.status,
+        "entity_key": event.entity_key,
+        "error_type": event.error_type,
+        "payload": event.payload,
+    }
+
+
+class RequestCounter(NamedTuple):
+    service: str
+    path: str
+    ok: bool
+    error_type: str | None
+    status_code: int
+    count: int
+    duration_ms: float
+    last_seen: float
+
+
+class EventCounter(NamedTuple):
+    event_type: str
+    status: str
+    error_type: str | None
+    count: int
+
+
+def _error_key(error_type: str | None, status_code: int, path: str, group_by: str) -> str:
+    if group_by == "error_type":
+        return error_type or f"HTTP_{status_code}"
+    return path
+
+
+def _summary_from_counters(
+    window_minutes: int,
+    counters: Iterable[RequestCounter],
+    sketch: LatencySketch,
+) -> dict[str, Any]:
+    service_counts: dict[str, list[int]] = {}
+    total_duration = 0.0
+    for counter in counters:
+        row = service_counts.setdefault(counter.service, [0, 0])
+        row[0] += counter.count
+        if not counter.ok:
+            row[1] += counter.count
+        total_duration += counter.duration_ms
+
+    total = sum(requests for requests, _ in service_counts.values())
+    errors = sum(service_errors for _, service_errors in service_counts.values())
+
+    by_service: dict[str, dict[str, Any]] = {}
+    for service_name in SERVICES:
+        service_total, service_errors = service_counts.get(service_name, (0, 0))
+        by_service[service_name] = {
+            "requests": service_total,
+            "errors": service_errors,
+            "error_rate": round((service_errors / service_total), 4) if service_total else 0.0,
+        }
+
+    return {
+        "window_minutes": window_minutes,
+        "total_requests": total,
+        "error_count": errors,
+        "error_rate": round((errors / total), 4) if total else 0.0,
+        "p95_ms": round(sketch.quantile(0.95), 3),
+        "p99_ms": round(sketch.quantile(0.99), 3),
+        "avg_ms": round((total_duration / total), 3) if total else 0.0,
+        "services": by_service,
+    }
+
+
+def _errors_from_counters(
+    window_minutes: int,
+    group_by: str,
+    counters: Iterable[RequestCounter],
+) -> dict[str, Any]:
+    grouped: Counter[str] = Counter()
+    last_seen: dict[str, float] = {}
+    sample: dict[str, str | None] = {}
+    for counter in counters:
+        if counter.ok:
+            continue
+        key = _error_key(counter.error_type, counter.status_code, counter.path, group_by)
+        grouped[key] += counter.count
+        if counter.last_seen >= last_seen.get(key, counter.last_seen):
+            last_seen[key] = counter.last_seen
+            sample[key] = counter.path if group_by == "error_type" else counter.error_type
+
+    rows = [
+        {
+            "key": key,
+            "count": count,
+            "last_seen": _dt_to_iso(datetime.fromtimestamp(last_seen[key], tz=timezone.utc)),
+            "sample": sample.get(key),
+        }
+        for key, count in grouped.most_common()
+    ]
+    return {"window_minutes": window_minutes, "group_by": group_by, "items": rows}
+
+
+def _operations_from_counters(
+    window_minutes: int,
+    counters: Iterable[RequestCounter],
+    event_counters: Iterable[EventCounter],
+) -> dict[str, Any]:
+    path_counts: Counter[tuple[str, bool]] = Counter()
+    for counter in counters:
+        path_counts[(counter.path, counter.ok)] += counter.count
+
+    domain_event_counts: Counter[str] = Counter()
+    domain_error_counts: Counter[str] = Counter()
+    for counter in event_counters:
+        domain_event_counts[counter.event_type] += counter.count
+        if counter.status == "error" and counter.error_type:
+            domain_error_counts[f"{counter.event_type}:{counter.error_type}"] += counter.count
+
+    def _outcomes(path: str) -> dict[str, int]:
+        return {"success": path_counts[(path, True)], "error": path_counts[(path, False)]}
+
+    return {
+        "window_minutes": window_minutes,
+        "fecae": _outcomes("/wsfe/invoices"),
+        "last_authorized": _outcomes("/wsfe/invoices/last-authorized"),
+        "invoice_query": _outcomes("/wsfe/invoices/query"),
+        "wsfe_params": {name: _outcomes(path) for name, path in WSFE_PARAM_PATHS.items()},
+        "caea": {
+            path.split("/wsfe/caea/")[1]: path_counts[(path, True)] + path_counts[(path, False)]
+            for path in CAEA_PATHS
+        },
+        "domain_events": {
+            "by_type": dict(domain_event_counts),
+            "error_signatures": dict(domain_error_counts),
+        },
+    }
+
+
+class _MinuteBucket:
+    __slots__ = ("minute", "requests", "latency", "events")
+
+    def __init__(self, minute: int) -> None:
+        self.minute = minute
+        # (service, path, ok, error_type, status_code) -> [count, duration_ms, last_seen]
+        self.requests: dict[tuple[str, str, bool, str | None, int], list] = {}
+        self.latency = LatencySketch()
+        # (event_type, status, error_type) -> count
+        self.events: Counter[tuple[str, str, str | None]] = Counter()
 
 
 class ObservabilityStore:
     def __init__(self, max_logs: int = 5000, max_events: int = 2000) -> None:
-        self._request_logs: deque[RequestLogEntry] = deque(maxlen=max_logs)
-        self._domain_events: deque[DomainEventEntry] = deque(maxlen=max_events)
+        self._request_logs = IndexedBuffer(
+            maxlen=max_logs,
+            fields={
+                "service": lambda e: e.service,
+                "error_type": lambda e: e.error_type,
+                "ok": lambda e: e.ok,
+                "path": lambda e: e.path,
+                "trace_id": lambda e: e.trace_id,
+                "cuit": lambda e: e.cuit,
+            },
+        )
+        self._domain_events = IndexedBuffer(
+            maxlen=max_events,
+            fields={
+                "service": lambda e: e.service,
+                "event_type": lambda e: e.event_type,
+                "status": lambda e: e.status,
+                "trace_id": lambda e: e.trace_id,
+            },
+        )
+        # Counters are updated on insert so summaries read O(buckets), not O(requests).
+        self._buckets: deque[_MinuteBucket] = deque()
         self._token_status: dict[str, dict[str, Any]] = {}
         self._lock = Lock()
 
@@ -35,13 +259,80 @@ class ObservabilityStore:
         max_events = int(os.getenv("OBS_MAX_EVENTS", "2000"))
         return cls(max_logs=max_logs, max_events=max_events)
 
+    def _bucket_for(self, timestamp: datetime) -> _MinuteBucket | None:
+        minute = _minute_of(timestamp)
+        if not self._buckets or minute > self._buckets[-1].minute:
+            self._buckets.append(_MinuteBucket(minute))
+            while self._buckets[0].minute <= minute - BUCKET_RETENTION_MINUTES:
+                self._buckets.popleft()
+            return self._buckets[-1]
+
+        # Entries can arrive slightly out of order; walk back to their minute.
+        for idx in range(len(self._buckets) - 1, -1, -1):
+            bucket = self._buckets[idx]
+            if bucket.minute == minute:
+                return bucket
+            if bucket.minute < minute:
+                new_bucket = _MinuteBucket(minute)
+                self._buckets.insert(idx + 1, new_bucket)
+                return new_bucket
+        return None
+
+    def _buckets_since(self, cutoff_minute: int) -> list[_MinuteBucket]:
+        selected = []
+        for bucket in reversed(self._buckets):
+            if bucket.minute < cutoff_minute:
+                break
+            selected.append(bucket)
+        selected.reverse()
+        return selected
+
     def add_request_log(self, entry: RequestLogEntry) -> None:
         with self._lock:
             self._request_logs.append(entry)
+            bucket = self._bucket_for(entry.timestamp)
+            if bucket is None:
+                return
+            key = (entry.service, entry.path, entry.ok, entry.error_type, entry.status_code)
+            counter = bucket.requests.get(key)
+            if counter is None:
+                bucket.requests[key] = [1, entry.duration_ms, entry.timestamp.timestamp()]
+            else:
+                counter[0] += 1
+                counter[1] += entry.duration_ms
+                counter[2] = max(counter[2], entry.timestamp.timestamp())
+            bucket.latency.add(entry.duration_ms)
 
     def add_domain_event(self, event: DomainEventEntry) -> None:
         with self._lock:
             self._domain_events.append(event)
+            bucket = self._bucket_for(event.timestamp)
+            if bucket is not None:
+                bucket.events[(event.event_type, event.status, event.error_type)] += 1
+
+    def _request_counters(self, window_minutes: int) -> tuple[list[RequestCounter], LatencySketch]:
+        sketch = LatencySketch()
+        merged: dict[tuple, list] = {}
+        with self._lock:
+            for bucket in self._buckets_since(_cutoff_minute(window_minutes)):
+                sketch.merge(bucket.latency)
+                for key, (count, duration_ms, last_seen) in bucket.requests.items():
+                    row = merged.get(key)
+                    if row is None:
+                        merged[key] = [count, duration_ms, last_seen]
+                    else:
+                        row[0] += count
+                        row[1] += duration_ms
+                        row[2] = max(row[2], last_seen)
+        counters = [RequestCounter(*key, *row) for key, row in merged.items()]
+        return counters, sketch
+
+    def _event_counters(self, window_minutes: int) -> list[EventCounter]:
+        merged: Counter[tuple[str, str, str | None]] = Counter()
+        with self._lock:
+            for bucket in self._buckets_since(_cutoff_minute(window_minutes)):
+                merged.update(bucket.events)
+        return [EventCounter(*key, count) for key, count in merged.items()]
 
     def update_token_status(self, service: str, value: dict[str, Any]) -> None:
         with self._lock:
@@ -59,202 +350,69 @@ class ObservabilityStore:
         status: str | None = None,
         service: str | None = None,
         error_type: str | None = None,
+        cuit: int | None = None,
+        trace_id: str | None = None,
+        cursor: int | None = None,
     ) -> dict[str, Any]:
-        with self._lock:
-            items = list(self._request_logs)
-
-        if endpoint:
-            items = [i for i in items if endpoint in i.path]
+        equals: dict[str, Any] = {}
         if service:
-            items = [i for i in items if i.service == service]
-        if status == "ok":
-            items = [i for i in items if i.ok]
-        elif status == "error":
-            items = [i for i in items if not i.ok]
+            equals["service"] = service
+        if status in ("ok", "error"):
+            equals["ok"] = status == "ok"
         if error_type:
-            items = [i for i in items if i.error_type == error_type]
-
-        items = list(reversed(items))
-        total = len(items)
-        start = max((page - 1) * page_size, 0)
-        end = start + page_size
-        paged = items[start:end]
+            equals["error_type"] = error_type
+        if cuit is not None:
+            equals["cuit"] = cuit
+        if trace_id:
+            equals["trace_id"] = trace_id
+
+        # Cursor pages ignore the page number: they continue right after the cursor seq.
+        offset = 0 if cursor is not None else max((page - 1) * page_size, 0)
+        with self._lock:
+            paged, total, next_cursor = self._request_logs.query(
+                equals,
+                contains=("path", endpoint) if endpoint else None,
+                cursor=cursor,
+                offset=offset,
+                limit=page_size,
+            )
 
         return {
             "page": page,
             "page_size": page_size,
             "total": total,
-            "items": [
-                {
-                    "timestamp": _dt_to_iso(i.timestamp),
-                    "trace_id": i.trace_id,
-                    "method": i.method,
-                    "path": i.path,
-                    "status_code": i.status_code,
-                    "ok": i.ok,
-                    "duration_ms": round(i.duration_ms, 3),
-                    "service": i.service,
-                    "error_type": i.error_type,
-                    "cuit": i.cuit,
-                }
-                for i in paged
-            ],
+            "next_cursor": next_cursor,
+            "items": [_log_to_dict(i) for i in paged],
         }
 
-    def get_summary(self, window_minutes: int = 60) -> dict[str, Any]:
-        cutoff = datetime.now(timezone.utc) - timedelta(minutes=window_minutes)
+    def logs_since(self, seq: int | None, limit: int = 200) -> dict[str, Any]:
+        """
+        Entries appended after `seq`, oldest first, capped to the newest
+        `limit`; "cursor" is the seq to pass next time. seq=None only
+        returns the current cursor.
+        """
         with self._lock:
-            items = [i for i in self._request_logs if i.timestamp >= cutoff]
-
-        total = len(items)
-        errors = sum(1 for i in items if not i.ok)
-        durations = [i.duration_ms for i in items]
-
-        by_service: dict[str, dict[str, Any]] = {}
-        for service_name in ("wsfe", "wsaa", "wspci", "ui", "health", "other"):
-            service_rows = [i for i in items if i.service == service_name]
-            service_total = len(service_rows)
-            service_errors = sum(1 for i in service_rows if not i.ok)
-            by_service[service_name] = {
-                "requests": service_total,
-                "errors": service_errors,
-                "error_rate": round((service_errors / service_total), 4) if service_total else 0.0,
-            }
+            cursor = self._request_logs.last_seq
+            items = [] if seq is None else self._request_logs.tail_after(seq, limit)
+        return {"cursor": cursor, "items": [_log_to_dict(i) for i in items]}
 
-        return {
-            "window_minutes": window_minutes,
-            "total_requests": total,
-            "error_count": errors,
-            "error_rate": round((errors / total), 4) if total else 0.0,
-            "p95_ms": round(_percentile(durations, 0.95), 3),
-            "avg_ms": round((sum(durations) / total), 3) if total else 0.0,
-            "services": by_service,
-        }
+    def events_since(self, seq: int | None, limit: int = 200) -> dict[str, Any]:
+        with self._lock:
+            cursor = self._domain_events.last_seq
+            items = [] if seq is None else self._domain_events.tail_after(seq, limit)
+        return {"cursor": cursor, "items": [_event_to_dict(i) for i in items]}
+
+    def get_summary(self, window_minutes: int = 60) -> dict[str, Any]:
+        counters, sketch = self._request_counters(window_minutes)
+        return _summary_from_counters(window_minutes, counters, sketch)
 
     def get_errors(self, window_minutes: int = 60, group_by: str = "error_type") -> dict[str, Any]:
-        cutoff = datetime.now(timezone.utc) - timedelta(minutes=window_minutes)
-        with self._lock:
-            items = [i for i in self._request_logs if i.timestamp >= cutoff and not i.ok]
-
-        grouped: Counter[str] = Counter()
-        last_seen: dict[str, datetime] = {}
-        sample: dict[str, str | None] = {}
-        for item in items:
-            key = item.error_type or f"HTTP_{item.status_code}" if group_by == "error_type" else item.path
-            grouped[key] += 1
-            last_seen[key] = max(last_seen.get(key, item.timestamp), item.timestamp)
-            sample[key] = item.path if group_by == "error_type" else item.error_type
-
-        rows = [
-            {
-                "key": key,
-                "count": count,
-                "last_seen": _dt_to_iso(last_seen[key]),
-                "sample": sample.get(key),
-            }
-            for key, count in grouped.most_common()
-        ]
-        return {"window_minutes": window_minutes, "group_by": group_by, "items": rows}
+        counters, _ = self._request_counters(window_minutes)
+        return _errors_from_counters(window_minutes, group_by, counters)
 
     def get_operations_summary(self, window_minutes: int = 60) -> dict[str, Any]:
-        cutoff = datetime.now(timezone.utc) - timedelta(minutes=window_minutes)
-        with self._lock:
-            logs = [i for i in self._request_logs if i.timestamp >= cutoff]
-            events = [e for e in self._domain_events if e.timestamp >= cutoff]
-
-        def _count(path: str, ok: bool | None = None) -> int:
-            rows = [i for i in logs if i.path == path]
-            if ok is None:
-                return len(rows)
-            return sum(1 for i in rows if i.ok == ok)
-
-        caea_paths = [
-            "/wsfe/caea/solicitar",
-            "/wsfe/caea/consultar",
-            "/wsfe/caea/informar",
-            "/wsfe/caea/sin-movimiento/consultar",
-            "/wsfe/caea/sin-movimiento/informar",
-        ]
-        caea_counts = {path.split("/wsfe/caea/")[1]: _count(path) for path in caea_paths}
-        domain_event_counts = Counter(e.event_type for e in events)
-        domain_error_counts = Counter(
-            f"{e.event_type}:{e.error_type}" for e in events if e.status == "error" and e.error_type
-        )
-
-        return {
-            "window_minutes": window_minutes,
-            "fecae": {
-                "success": _count("/wsfe/invoices", ok=True),
-                "error": _count("/wsfe/invoices", ok=False),
-            },
-            "last_authorized": {
-                "success": _count("/wsfe/invoices/last-authorized", ok=True),
-                "error": _count("/wsfe/invoices/last-authorized", ok=False),
-            },
-            "invoice_query": {
-                "success": _count("/wsfe/invoices/query", ok=True),
-                "error": _count("/wsfe/invoices/query", ok=False),
-            },
-            "wsfe_params": {
-                "max_reg_x_request": {
-                    "success": _count("/wsfe/params/max-reg-x-request", ok=True),
-                    "error": _count("/wsfe/params/max-reg-x-request", ok=False),
-                },
-                "types_cbte": {
-                    "success": _count("/wsfe/params/types-cbte", ok=True),
-                    "error": _count("/wsfe/params/types-cbte", ok=False),
-                },
-                "types_doc": {
-                    "success": _count("/wsfe/params/types-doc", ok=True),
-                    "error": _count("/wsfe/params/types-doc", ok=False),
-                },
-                "types_iva": {
-                    "success": _count("/wsfe/params/types-iva", ok=True),
-                    "error": _count("/wsfe/params/types-iva", ok=False),
-                },
-                "types_tributos": {
-                    "success": _count("/wsfe/params/types-tributos", ok=True),
-                    "error": _count("/wsfe/params/types-tributos", ok=False),
-                },
-                "types_monedas": {
-                    "success": _count("/wsfe/params/types-monedas", ok=True),
-                    "error": _count("/wsfe/params/types-monedas", ok=False),
-                },
-                "condicion_iva_receptor": {
-                    "success": _count("/wsfe/params/condicion-iva-receptor", ok=True),
-                    "error": _count("/wsfe/params/condicion-iva-receptor", ok=False),
-                },
-                "puntos_venta": {
-                    "success": _count("/wsfe/params/puntos-venta", ok=True),
-                    "error": _count("/wsfe/params/puntos-venta", ok=False),
-                },
-                "cotizacion": {
-                    "success": _count("/wsfe/params/cotizacion", ok=True),
-                    "error": _count("/wsfe/params/cotizacion", ok=False),
-                },
-                "types_concepto": {
-                    "success": _count("/wsfe/params/types-concepto", ok=True),
-                    "error": _count("/wsfe/params/types-concepto", ok=False),
-                },
-                "types_opcional": {
-                    "success": _count("/wsfe/params/types-opcional", ok=True),
-                    "error": _count("/wsfe/params/types-opcional", ok=False),
-                },
-                "types_paises": {
-                    "success": _count("/wsfe/params/types-paises", ok=True),
-                    "error": _count("/wsfe/params/types-paises", ok=False),
-                },
-                "actividades": {
-                    "success": _count("/wsfe/params/actividades", ok=True),
-                    "error": _count("/wsfe/params/actividades", ok=False),
-                },
-            },
-            "caea": caea_counts,
-            "domain_events": {
-                "by_type": dict(domain_event_counts),
-                "error_signatures": dict(domain_error_counts),
-            },
-        }
+        counters, _ = self._request_counters(window_minutes)
+        return _operations_from_counters(window_minutes, counters, self._event_counters(window_minutes))
 
     def list_domain_events(
         self,
@@ -263,40 +421,45 @@ class ObservabilityStore:
         service: str | None = None,
         event_type: str | None = None,
         status: str | None = None,
+        trace_id: str | None = None,
+        cursor: int | None = None,
     ) -> dict[str, Any]:
-        with self._lock:
-            items = list(self._domain_events)
+        equals = {
+            name: value
+            for name, value in (
+                ("service", service),
+                ("event_type", event_type),
+                ("status", status),
+                ("trace_id", trace_id),
+            )
+            if value
+        }
 
-        if service:
-            items = [i for i in items if i.service == service]
-        if event_type:
-            items = [i for i in items if i.event_type == event_type]
-        if status:
-            items = [i for i in items if i.status == status]
-
-        items = list(reversed(items))
-        total = len(items)
-        start = max((page - 1) * page_size, 0)
-        end = start + page_size
-        paged = items[start:end]
+        offset = 0 if cursor is not None else max((page - 1) * page_size, 0)
+        with self._lock:
+            paged, total, next_cursor = self._domain_events.query(
+                equals,
+                cursor=cursor,
+                offset=offset,
+                limit=page_size,
+            )
 
         return {
             "page": page,
             "page_size": page_size,
             "total": total,
-            "items": [
-                {
-                    "timestamp": _dt_to_iso(i.timestamp),
-                    "trace_id": i.trace_id,
-                    "service": i.service,
-                    "event_type": i.event_type,
-                    "status": i.status,
-                    "entity_key": i.entity_key,
-                    "error_type": i.error_type,
-                    "payload": i.payload,
-                }
-                for i in paged
-            ],
+            "next_cursor": next_cursor,
+            "items": [_event_to_dict(i) for i in paged],
+        }
+
+    def get_trace(self, trace_id: str) -> dict[str, Any]:
+        with self._lock:
+            logs = self._request_logs.lookup("trace_id", trace_id)
+            events = self._domain_events.lookup("trace_id", trace_id)
+        return {
+            "trace_id": trace_id,
+            "logs": [_log_to_dict(i) for i in logs],
+            "events": [_event_to_dict(i) for i in events],
         }
 
     def get_alerts(self) -> dict[str, Any]:
@@ -0,0 +1,126 @@
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Callable, Iterator
+
+from service.observability.models import Span
+
+SERVER_TIMING_ENABLED = os.getenv("OBS_SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+
+
+class _Trace:
+    """
+    Spans of the current request. The object is shared by reference, so
+    spans recorded in child tasks or threadpool workers still land here.
+    """
+
+    __slots__ = ("origin", "spans", "marks")
+
+    def __init__(self, origin: float) -> None:
+        self.origin = origin
+        self.spans: list[Span] = []
+        self.marks: dict[str, float] = {}
+
+
+_trace_context: ContextVar[_Trace | None] = ContextVar("trace_spans", default=None)
+
+
+def start_trace(origin: float | None = None) -> Token:
+    return _trace_context.set(_Trace(time.perf_counter() if origin is None else origin))
+
+
+def finish_trace(token: Token) -> list[Span]:
+    trace = _trace_context.get()
+    _trace_context.reset(token)
+    return trace.spans if trace else []
+
+
+def current_spans() -> list[Span]:
+    trace = _trace_context.get()
+    return trace.spans if trace else []
+
+
+def record_span(name: str, started: float, ended: float | None = None) -> None:
+    """started/ended are time.perf_counter() values; no-op outside a request."""
+    trace = _trace_context.get()
+    if trace is None:
+        return
+    ended = time.perf_counter() if ended is None else ended
+    trace.spans.append(
+        Span(
+            name=name,
+            start_ms=round((started - trace.origin) * 1000.0, 3),
+            duration_ms=round((ended - started) * 1000.0, 3),
+        )
+    )
+
+
+def mark(name: str) -> None:
+    trace = _trace_context.get()
+    if trace is not None:
+        trace.marks[name] = time.perf_counter()
+
+
+def get_mark(name: str) -> float | None:
+    trace = _trace_context.get()
+    return trace.marks.get(name) if trace else None
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, started)
+
+
+def split_span(outer_started: float, inner: str, before: str, after: str) -> None:
+    """
+    Splits the time since outer_started around the last `inner` span, e.g.
+    zeep envelope building and response parsing around the network round-trip.
+    """
+    trace = _trace_context.get()
+    if trace is None:
+        return
+    ended = time.perf_counter()
+    outer_start_ms = (outer_started - trace.origin) * 1000.0
+    inner_span = next((s for s in reversed(trace.spans) if s.name == inner and s.start_ms >= outer_start_ms), None)
+    if inner_span is None:
+        return
+    inner_started = trace.origin + inner_span.start_ms / 1000.0
+    inner_ended = inner_started + inner_span.duration_ms / 1000.0
+    record_span(before, outer_started, inner_started)
+    record_span(after, inner_ended, ended)
+
+
+def traced(name: str) -> Callable:
+    """Decorator recording one span per call, for sync and async functions."""
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def server_timing_header(spans: list[Span], total_ms: float) -> str:
+    parts = [f"{s.name};dur={s.duration_ms:.1f}" for s in spans]
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from typing import Any, AsyncIterator
+
+from fastapi.encoders import jsonable_encoder
+
+from service.caea_resilience import repository as caea_repo
+from service.observability.collector import (get_store,
+                                             refresh_token_state_from_files)
+from service.utils.logger import logger
+
+UI_STREAM_INTERVAL_SECONDS = float(os.getenv("UI_STREAM_INTERVAL_SECONDS", "2"))
+# Window aggregates and alerts also change as time passes, not only on new
+# entries: recompute them at least this often.
+UI_STREAM_AGGREGATE_SECONDS = float(os.getenv("UI_STREAM_AGGREGATE_SECONDS", "30"))
+UI_STREAM_QUEUE_SIZE = int(os.getenv("UI_STREAM_QUEUE_SIZE", "64"))
+UI_STREAM_HEARTBEAT_SECONDS = float(os.getenv("UI_STREAM_HEARTBEAT_SECONDS", "15"))
+UI_STREAM_BATCH_LIMIT = 200
+
+DROPPED = object()
+
+
+class Subscriber:
+    def __init__(self, window_minutes: int, queue_size: int) -> None:
+        self.window_minutes = window_minutes
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class UiStreamHub:
+    """
+    One producer per process scans the observability store and the outbox
+    every UI_STREAM_INTERVAL_SECONDS and fans the deltas out to every /ui/stream
+    subscriber, so N dashboards cost one scan instead of N full refreshes.
+    A subscriber whose queue fills up is dropped; the UI reconnects and
+    reloads its snapshot.
+    """
+
+    def __init__(
+        self,
+        interval: float = UI_STREAM_INTERVAL_SECONDS,
+        aggregate_every: float = UI_STREAM_AGGREGATE_SECONDS,
+        queue_size: int = UI_STREAM_QUEUE_SIZE,
+    ) -> None:
+        self.interval = interval
+        self.aggregate_every = aggregate_every
+        self.queue_size = queue_size
+        self._subscribers: set[Subscriber] = set()
+        self._task: asyncio.Task | None = None
+        self._event_id = 0
+        self._log_cursor: int | None = None
+        self._event_cursor: int | None = None
+        self._outbox_cursor: tuple[str, int] | None = None
+        self._aggregates: dict[int, tuple[float, dict[str, Any]]] = {}
+        self._alert_ids: set[str] | None = None
+        self._alerts_at = 0.0
+        self._tokens: dict[str, Any] | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, window_minutes: int = 60) -> Subscriber:
+        subscriber = Subscriber(window_minutes, self.queue_size)
+        self._subscribers.add(subscriber)
+        if self._task is None:
+            self.reset_cursors()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        self._subscribers.clear()
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def reset_cursors(self) -> None:
+        # New subscribers load a snapshot over the regular /ui endpoints;
+        # the stream starts from "now".
+        self._log_cursor = self._event_cursor = self._outbox_cursor = None
+        self._aggregates.clear()
+        self._alert_ids = None
+        self._tokens = None
+
+    def publish(self, event_type: str, data: Any, window_minutes: int | None = None) -> None:
+        self._event_id += 1
+        message = (self._event_id, event_type, data)
+        for subscriber in list(self._subscribers):
+            if window_minutes is not None and subscriber.window_minutes != window_minutes:
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: Subscriber) -> None:
+        logger.warning(f"Dropping slow /ui/stream subscriber ({subscriber.queue.qsize()} messages behind)")
+        subscriber.dropped = True
+        self._subscribers.discard(subscriber)
+        # Discard the backlog so the consumer sees the drop on its next read.
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(DROPPED)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                windows = {subscriber.window_minutes for subscriber in self._subscribers}
+                for event_type, data, window in await asyncio.to_thread(self.collect, windows):
+                    self.publish(event_type, data, window)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"UI stream producer failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def collect(self, windows: set[int]) -> list[tuple[str, Any, int | None]]:
+        """One scan of every source; returns (event_type, data, window or None) deltas."""
+        store = get_store()
+        deltas: list[tuple[str, Any, int | None]] = []
+        now = time.monotonic()
+
+        logs = store.logs_since(self._log_cursor, UI_STREAM_BATCH_LIMIT)
+        events = store.events_since(self._event_cursor, UI_STREAM_BATCH_LIMIT)
+        changed = bool(logs["items"] or events["items"])
+        if self._log_cursor is not None and logs["items"]:
+            deltas.append(("logs", {"items": logs["items"]}, None))
+        if self._event_cursor is not None and events["items"]:
+            deltas.append(("events", {"items": events["items"]}, None))
+        self._log_cursor, self._event_cursor = logs["cursor"], events["cursor"]
+
+        for window in windows:
+            computed_at, previous = self._aggregates.get(window, (0.0, None))
+            if previous is not None and not changed and now - computed_at < self.aggregate_every:
+                continue
+            aggregates = {
+                "summary": store.get_summary(window_minutes=window),
+                "errors": store.get_errors(window_minutes=window, group_by="error_type"),
+                "operations": store.get_operations_summary(window_minutes=window),
+            }
+            self._aggregates[window] = (now, aggregates)
+            if aggregates != previous:
+                deltas.append(("metrics", aggregates, window))
+
+        if changed or self._alert_ids is None or now - self._alerts_at >= self.aggregate_every:
+            deltas.extend(self._collect_alerts_and_tokens(store))
+            self._alerts_at = now
+
+        deltas.extend(self._collect_outbox())
+        return [(event_type, jsonable_encoder(data), window) for event_type, data, window in deltas]
+
+    def _collect_alerts_and_tokens(self, store) -> list[tuple[str, Any, None]]:
+        deltas: list[tuple[str, Any, None]] = []
+        refresh_token_state_from_files()
+        tokens = store.get_token_status()
+        if tokens != self._tokens:
+            deltas.append(("tokens", tokens, None))
+            self._tokens = tokens
+
+        active = store.get_alerts()["active"]
+        alert_ids = {alert["rule_id"] for alert in active}
+        previous = self._alert_ids
+        if previous is None or alert_ids != previous:
+            deltas.append(
+                (
+                    "alerts",
+                    {
+                        "active": active,
+                        "raised": sorted(alert_ids - (previous or set())),
+                        "resolved": sorted((previous or set()) - alert_ids),
+                    },
+                    None,
+                )
+            )
+            self._alert_ids = alert_ids
+        return deltas
+
+    def _collect_outbox(self) -> list[tuple[str, Any, None]]:
+        try:
+            changed, cursor = caea_repo.list_outbox_changes(self._outbox_cursor)
+            counts = caea_repo.count_outbox_by_status() if changed else None
+        except sqlite3.OperationalError:
+            # State DB not initialised yet in this process.
+            return []
+        first_scan = self._outbox_cursor is None
+        self._outbox_cursor = cursor
+        if first_scan or not changed:
+            return []
+        return [("outbox", {"changed": changed, "summary": counts}, None)]
+
+
+def format_sse(event_id: int, event_type: str, data: Any) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def sse_messages(
+    hub: UiStreamHub,
+    subscriber: Subscriber,
+    heartbeat: float = UI_STREAM_HEARTBEAT_SECONDS,
+) -> AsyncIterator[str]:
+    try:
+        yield f"retry: {int(hub.interval * 2500)}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection.
+                yield ": keepalive\n\n"
+                continue
+            if message is DROPPED:
+                yield format_sse(0, "dropped", {"reason": "slow consumer"})
+                return
+            yield format_sse(*message)
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+ui_stream_hub = UiStreamHub()
@@ -0,0 +1,191 @@
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from service.observability.metrics import invoice_local_rejections
+from service.param_rules.tables import ParamTables, param_tables
+from service.utils.logger import logger
+
+LOCAL_RULES_ENABLED = os.getenv("WSFE_LOCAL_RULES", "true").lower() in ("1", "true", "yes")
+# Rules listed here are never applied, e.g. WSFE_LOCAL_RULES_DISABLED="iva_rate".
+DISABLED_RULES = frozenset(rule.strip() for rule in os.getenv("WSFE_LOCAL_RULES_DISABLED", "").split(",") if rule.strip())
+AMOUNT_TOLERANCE = 0.01
+# IVA rounded per line item drifts from BaseImp * rate on the aggregate by up
+# to half a cent per line, so the rate check allows the larger of an absolute
+# bound and a share of BaseImp. The relative default stays well under the
+# smallest gap between AFIP rates (2.5% of BaseImp), so a wrong rate is caught.
+IVA_RATE_TOLERANCE = float(os.getenv("WSFE_LOCAL_IVA_RATE_TOLERANCE", "1.0"))
+IVA_RATE_RELATIVE_TOLERANCE = float(os.getenv("WSFE_LOCAL_IVA_RATE_RELATIVE_TOLERANCE", "0.01"))
+
+# Codes AFIP answers FECAESolicitar with for the same checks (WSFEv1 manual),
+# so clients handle a local rejection exactly like a remote one.
+RULE_CODES = {
+    "cbte_tipo": 10007,
+    "doc_tipo": 10015,
+    "iva_total": 10018,
+    "iva_id": 10019,
+    "iva_rate": 10051,
+    "iva_base": 10061,
+    "iva_required": 10070,
+    "mon_id": 10119,
+    "condicion_iva_receptor": 10243,
+}
+
+
+@dataclass(frozen=True)
+class RuleViolation:
+    rule: str
+    message: str
+    detail_index: int | None = None  # None: header-level (FeCabReq)
+
+    @property
+    def code(self) -> int:
+        return RULE_CODES[self.rule]
+
+    def as_afip(self) -> dict[str, Any]:
+        return {"Code": self.code, "Msg": self.message}
+
+
+def _check_iva(detail: dict[str, Any], index: int, tables: ParamTables) -> list[RuleViolation]:
+    alicuotas = (detail.get("Iva") or {}).get("AlicIva") or []
+    if not alicuotas:
+        if detail["ImpIVA"] > 0:
+            return [RuleViolation("iva_required", "ImpIVA is greater than 0, so Iva is required", index)]
+        return []
+
+    violations = []
+    iva_sum = base_sum = 0.0
+    for alicuota in alicuotas:
+        iva_sum += alicuota["Importe"]
+        base_sum += alicuota["BaseImp"]
+        if tables.iva_rates is None:
+            continue
+        alic_id = alicuota["Id"]
+        if alic_id not in tables.iva_rates:
+            violations.append(RuleViolation("iva_id", f"AlicIva Id {alic_id} is not a valid VAT rate", index))
+            continue
+        rate = tables.iva_rates[alic_id]
+        tolerance = max(IVA_RATE_TOLERANCE, alicuota["BaseImp"] * IVA_RATE_RELATIVE_TOLERANCE)
+        if rate is not None and abs(alicuota["BaseImp"] * rate - alicuota["Importe"]) > tolerance:
+            violations.append(
+                RuleViolation(
+                    "iva_rate",
+                    f"AlicIva Id {alic_id}: Importe {alicuota['Importe']} is not {rate:.2%} of BaseImp {alicuota['BaseImp']}",
+                    index,
+                )
+            )
+
+    if abs(iva_sum - detail["ImpIVA"]) > AMOUNT_TOLERANCE:
+        violations.append(RuleViolation("iva_total", f"ImpIVA {detail['ImpIVA']} must equal the AlicIva Importe sum {iva_sum:.2f}", index))
+    if abs(base_sum - detail["ImpNeto"]) > AMOUNT_TOLERANCE:
+        violations.append(RuleViolation("iva_base", f"ImpNeto {detail['ImpNeto']} must equal the AlicIva BaseImp sum {base_sum:.2f}", index))
+    return violations
+
+
+def check_invoice(sale_data: dict[str, Any], tables: ParamTables) -> list[RuleViolation]:
+    """
+    FECAESolicitar checks that need no AFIP round trip: parameter table
+    membership and IVA arithmetic. Rules whose table is not loaded are skipped.
+    """
+    fe_cae_req = sale_data["FeCAEReq"]
+    cbte_tipo = fe_cae_req["FeCabReq"]["CbteTipo"]
+    violations: list[RuleViolation] = []
+
+    cbte_class = ""
+    if tables.cbte_classes is not None:
+        if cbte_tipo not in tables.cbte_classes:
+            violations.append(RuleViolation("cbte_tipo", f"CbteTipo {cbte_tipo} is not a valid voucher type"))
+        else:
+            cbte_class = tables.cbte_classes[cbte_tipo]
+
+    for index, detail in enumerate(fe_cae_req["FeDetReq"]["FECAEDetRequest"]):
+        if tables.doc_tipos is not None and detail["DocTipo"] not in tables.doc_tipos:
+            violations.append(RuleViolation("doc_tipo", f"DocTipo {detail['DocTipo']} is not a valid document type", index))
+
+        if tables.monedas is not None and detail["MonId"] not in tables.monedas:
+            violations.append(RuleViolation("mon_id", f"MonId {detail['MonId']} is not a valid currency", index))
+
+        if tables.condiciones_iva_receptor is not None:
+            condicion = detail["CondicionIVAReceptorId"]
+            classes = tables.condiciones_iva_receptor.get(condicion)
+            if classes is None:
+                violations.append(
+                    RuleViolation("condicion_iva_receptor", f"CondicionIVAReceptorId {condicion} is not valid", index)
+                )
+            elif cbte_class and classes and cbte_class not in classes:
+                violations.append(
+                    RuleViolation(
+                        "condicion_iva_receptor",
+                        f"CondicionIVAReceptorId {condicion} is not valid for class {cbte_class} vouchers",
+                        index,
+                    )
+                )
+
+        violations.extend(_check_iva(detail, index, tables))
+
+    return violations
+
+
+def rejection_response(sale_data: dict[str, Any], violations: list[RuleViolation]) -> dict[str, Any]:
+    """A FECAESolicitarResult with Resultado "R", as AFIP would have answered."""
+    fe_cae_req = sale_data["FeCAEReq"]
+    cab_req = fe_cae_req["FeCabReq"]
+    header_errors = [violation.as_afip() for violation in violations if violation.detail_index is None]
+
+    detail_responses = []
+    for index, detail in enumerate(fe_cae_req["FeDetReq"]["FECAEDetRequest"]):
+        observations = [violation.as_afip() for violation in violations if violation.detail_index == index]
+        detail_responses.append(
+            {
+                "Concepto": detail["Concepto"],
+                "DocTipo": detail["DocTipo"],
+                "DocNro": detail["DocNro"],
+                "CbteDesde": detail["CbteDesde"],
+                "CbteHasta": detail["CbteHasta"],
+                "CbteFch": detail["CbteFch"],
+                "Resultado": "R",
+                "Observaciones": {"Obs": observations} if observations else None,
+                "CAE": None,
+                "CAEFchVto": None,
+            }
+        )
+
+    return {
+        "status": "success",
+        "response": {
+            "FeCabResp": {
+                "Cuit": sale_data["Auth"]["Cuit"],
+                "PtoVta": cab_req["PtoVta"],
+                "CbteTipo": cab_req["CbteTipo"],
+                "FchProceso": datetime.now().strftime("%Y%m%d%H%M%S"),
+                "CantReg": cab_req["CantReg"],
+                "Resultado": "R",
+                "Reproceso": "N",
+            },
+            "FeDetResp": {"FECAEDetResponse": detail_responses},
+            "Events": None,
+            "Errors": {"Err": header_errors} if header_errors else None,
+        },
+        # Not sent to AFIP: rejected against the cached parameter tables.
+        "local_validation": True,
+    }
+
+
+def prevalidate_invoice(sale_data: dict[str, Any]) -> dict[str, Any] | None:
+    """The local rejection for an invoice AFIP would refuse, or None to send it."""
+    if not LOCAL_RULES_ENABLED:
+        return None
+    violations = [
+        violation for violation in check_invoice(sale_data, param_tables.get()) if violation.rule not in DISABLED_RULES
+    ]
+    if not violations:
+        return None
+
+    for violation in violations:
+        invoice_local_rejections.labels(violation.rule).inc()
+    logger.info(
+        "FECAESolicitar rejected locally: %s",
+        ", ".join(f"{violation.code} {violation.rule}" for violation in violations),
+    )
+    return rejection_response(sale_data, violations)
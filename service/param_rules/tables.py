@@ -0,0 +1,190 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from service.caea_resilience.db import get_connection
+from service.utils.logger import logger
+
+PARAM_TABLES_REFRESH_HOURS = float(os.getenv("WSFE_PARAM_TABLES_REFRESH_HOURS", "12"))
+# Older tables are ignored: the rules fail open rather than reject on stale data.
+PARAM_TABLES_MAX_AGE_HOURS = float(os.getenv("WSFE_PARAM_TABLES_MAX_AGE_HOURS", "72"))
+
+# table name -> (FEParamGet* method, item element under ResultGet)
+PARAM_TABLE_SOURCES = {
+    "tipos_cbte": ("FEParamGetTiposCbte", "CbteTipo"),
+    "tipos_doc": ("FEParamGetTiposDoc", "DocTipo"),
+    "tipos_iva": ("FEParamGetTiposIva", "IvaTipo"),
+    "monedas": ("FEParamGetTiposMonedas", "Moneda"),
+    "condiciones_iva_receptor": ("FEParamGetCondicionIvaReceptor", "CondicionIvaReceptor"),
+}
+
+IVA_RATE_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*%")
+CBTE_CLASS_RE = re.compile(r"\b([ABCEMT])$")
+
+
+@dataclass(frozen=True)
+class ParamTables:
+    """
+    Lookup form of the cached FEParamGet* tables. A table that is not loaded
+    (or too old) is None and its rules are skipped.
+    """
+
+    cbte_classes: dict[int, str] | None = None  # CbteTipo -> "A", "B", "C", "M"... ("" if unknown)
+    doc_tipos: frozenset[int] | None = None
+    iva_rates: dict[int, float | None] | None = None  # AlicIva Id -> rate (0.21), None if unparseable
+    monedas: frozenset[str] | None = None
+    condiciones_iva_receptor: dict[int, frozenset[str]] | None = None  # Id -> Cmp_Clase letters
+
+
+def _is_active(row: dict[str, Any], today: str) -> bool:
+    fch_hasta = row.get("FchHasta")
+    return not fch_hasta or fch_hasta == "NULL" or fch_hasta >= today
+
+
+def _iva_rate(desc: str | None) -> float | None:
+    match = IVA_RATE_RE.search(desc or "")
+    return float(match.group(1).replace(",", ".")) / 100 if match else None
+
+
+def compile_tables(rows_by_name: dict[str, list[dict[str, Any]]]) -> ParamTables:
+    today = datetime.now().strftime("%Y%m%d")
+
+    def active(name: str) -> list[dict[str, Any]] | None:
+        rows = rows_by_name.get(name)
+        return None if rows is None else [row for row in rows if _is_active(row, today)]
+
+    cbte = active("tipos_cbte")
+    doc = active("tipos_doc")
+    iva = active("tipos_iva")
+    monedas = active("monedas")
+    condiciones = rows_by_name.get("condiciones_iva_receptor")
+
+    return ParamTables(
+        cbte_classes=None if cbte is None else {
+            int(row["Id"]): (match.group(1) if (match := CBTE_CLASS_RE.search((row.get("Desc") or "").strip())) else "")
+            for row in cbte
+        },
+        doc_tipos=None if doc is None else frozenset(int(row["Id"]) for row in doc),
+        iva_rates=None if iva is None else {int(row["Id"]): _iva_rate(row.get("Desc")) for row in iva},
+        monedas=None if monedas is None else frozenset(row["Id"] for row in monedas),
+        condiciones_iva_receptor=None if condiciones is None else {
+            int(row["Id"]): frozenset(part.strip() for part in (row.get("Cmp_Clase") or "").split("/") if part.strip())
+            for row in condiciones
+        },
+    )
+
+
+def result_rows(name: str, afip_result: dict[str, Any]) -> list[dict[str, Any]] | None:
+    """ResultGet items of a successful FEParamGet* result, or None if it carries none."""
+    if afip_result.get("status") != "success":
+        return None
+    result_get = (afip_result.get("response") or {}).get("ResultGet") or {}
+    rows = result_get.get(PARAM_TABLE_SOURCES[name][1])
+    return [dict(row) for row in rows if row] if rows else None
+
+
+class ParamTableStore:
+    """
+    FEParamGet* tables in memory, persisted in the wsfe_param_tables table so
+    a restart (or another worker) starts with the last known values.
+    """
+
+    def __init__(self, max_age: float = PARAM_TABLES_MAX_AGE_HOURS * 3600) -> None:
+        self.max_age = max_age
+        self._rows: dict[str, tuple[list[dict[str, Any]], float]] = {}
+        self._compiled: ParamTables | None = None
+        self._compiled_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> ParamTables:
+        """Memory only: load() reads the persisted tables, at startup and off the event loop."""
+        now = time.time()
+        compiled = self._compiled
+        # Recompiled hourly so FchHasta and max_age cut-offs are applied as time passes.
+        if compiled is None or now - self._compiled_at > 3600:
+            with self._lock:
+                fresh = {name: rows for name, (rows, fetched_at) in self._rows.items() if now - fetched_at <= self.max_age}
+                compiled = self._compiled = compile_tables(fresh)
+                self._compiled_at = now
+        return compiled
+
+    def update(self, name: str, rows: list[dict[str, Any]]) -> None:
+        fetched_at = time.time()
+        with self._lock:
+            self._rows[name] = (rows, fetched_at)
+            self._compiled = None
+        try:
+            conn = get_connection()
+            try:
+                conn.execute(
+                    """
+                    INSERT INTO wsfe_param_tables (name, payload_json, fetched_at) VALUES (?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET payload_json=excluded.payload_json, fetched_at=excluded.fetched_at
+                    """,
+                    (name, json.dumps(rows, default=str), fetched_at),
+                )
+            finally:
+                conn.close()
+        except sqlite3.OperationalError as e:
+            logger.debug("Param table write skipped: %s", e)
+
+    def update_from_result(self, name: str, afip_result: dict[str, Any]) -> bool:
+        rows = result_rows(name, afip_result)
+        if rows is None:
+            return False
+        self.update(name, rows)
+        return True
+
+    def status(self) -> dict[str, Any]:
+        now = time.time()
+        return {
+            name: {"rows": len(rows), "age_seconds": round(now - fetched_at, 1), "stale": now - fetched_at > self.max_age}
+            for name, (rows, fetched_at) in sorted(self._rows.items())
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self._compiled = None
+            self._loaded = True
+        try:
+            conn = get_connection()
+            try:
+                conn.execute("DELETE FROM wsfe_param_tables")
+            finally:
+                conn.close()
+        except sqlite3.OperationalError:
+            pass
+
+    def load(self) -> None:
+        """Reads the tables persisted by any process; blocking, so run it in a thread."""
+        try:
+            conn = get_connection()
+            try:
+                rows = conn.execute("SELECT name, payload_json, fetched_at FROM wsfe_param_tables").fetchall()
+            finally:
+                conn.close()
+        except sqlite3.OperationalError as e:
+            # State DB not initialised yet in this process: try again next time.
+            logger.debug("Param table read skipped: %s", e)
+            return
+        with self._lock:
+            for row in rows:
+                if row["name"] in PARAM_TABLE_SOURCES and row["name"] not in self._rows:
+                    self._rows[row["name"]] = (json.loads(row["payload_json"]), row["fetched_at"])
+            self._compiled = None
+            self._loaded = True
+
+
+param_tables = ParamTableStore()
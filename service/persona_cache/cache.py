@@ -0,0 +1,214 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+from fastapi.encoders import jsonable_encoder
+
+from service.caea_resilience.db import get_connection
+from service.observability.metrics import persona_cache_lookups
+from service.utils.deadline import detached_context, run_within_deadline
+from service.utils.logger import logger
+
+PERSONA_CACHE_TTL_SECONDS = float(os.getenv("WSPCI_PERSONA_CACHE_TTL_SECONDS", "86400"))
+PERSONA_NEGATIVE_TTL_SECONDS = float(os.getenv("WSPCI_PERSONA_NEGATIVE_TTL_SECONDS", "300"))
+PERSONA_CACHE_MAX_ENTRIES = int(os.getenv("WSPCI_PERSONA_CACHE_MAX_ENTRIES", "10000"))
+
+# AFIP answers getPersona for an unknown id with a SOAP fault, and
+# getPersonaList with an errorConstancia, both carrying this message.
+NOT_FOUND_MARKERS = ("no existe persona",)
+
+
+def is_not_found_message(message: str | None) -> bool:
+    return bool(message) and any(marker in message.lower() for marker in NOT_FOUND_MARKERS)
+
+
+# (cuitRepresentada, idPersona): AFIP authorizes each lookup for the
+# represented CUIT, so an answer given to one is never reused for another.
+PersonaKey = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class CachedPersona:
+    kind: str  # "found" | "not_found"
+    result: dict[str, Any]
+    expires_at: float
+
+
+class PersonaCache:
+    """
+    Two-level cache of WSPCI lookups keyed by (cuitRepresentada, idPersona):
+    an in-process LRU in front of the wspci_persona_cache table, so entries
+    survive restarts. "Not found" answers are cached too, with a shorter TTL.
+    get() and put_many() may touch SQLite; async callers run them in a thread
+    and use peek() for the in-memory lookup.
+    """
+
+    def __init__(
+        self,
+        ttl: float = PERSONA_CACHE_TTL_SECONDS,
+        negative_ttl: float = PERSONA_NEGATIVE_TTL_SECONDS,
+        max_entries: int = PERSONA_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._memory: OrderedDict[PersonaKey, CachedPersona] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key: PersonaKey, entry: CachedPersona) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def peek(self, key: PersonaKey) -> CachedPersona | None:
+        """In-memory lookup only; never blocks on SQLite."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._memory.move_to_end(key)
+                    return entry
+                del self._memory[key]
+        return None
+
+    def get(self, key: PersonaKey) -> CachedPersona | None:
+        entry = self.peek(key)
+        if entry is not None:
+            return entry
+        entry = self._load(key, time.time())
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, cuit_representada: int, id_persona: int, kind: str, result: dict[str, Any]) -> CachedPersona:
+        return self.put_many(cuit_representada, [(id_persona, kind, result)])[0]
+
+    def put_many(self, cuit_representada: int, items: list[tuple[int, str, dict[str, Any]]]) -> list[CachedPersona]:
+        now = time.time()
+        entries = []
+        rows = []
+        for id_persona, kind, result in items:
+            ttl = self.ttl if kind == "found" else self.negative_ttl
+            # Same JSON form from memory and from SQLite (datetimes as ISO strings).
+            entry = CachedPersona(kind=kind, result=jsonable_encoder(result), expires_at=now + ttl)
+            self._remember((cuit_representada, id_persona), entry)
+            entries.append(entry)
+            rows.append(
+                (
+                    cuit_representada,
+                    id_persona,
+                    kind,
+                    json.dumps(entry.result),
+                    datetime.now(timezone.utc).isoformat(),
+                    entry.expires_at,
+                )
+            )
+        self._store(rows)
+        return entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        try:
+            conn = get_connection()
+            try:
+                conn.execute("DELETE FROM wspci_persona_cache")
+            finally:
+                conn.close()
+        except sqlite3.OperationalError:
+            pass
+
+    def _load(self, key: PersonaKey, now: float) -> CachedPersona | None:
+        try:
+            conn = get_connection()
+            try:
+                row = conn.execute(
+                    """
+                    SELECT kind, result_json, expires_at FROM wspci_persona_cache
+                    WHERE cuit_representada=? AND id_persona=? AND expires_at>?
+                    """,
+                    (*key, now),
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.OperationalError as e:
+            # State DB not initialised yet in this process: memory only.
+            logger.debug("Persona cache read skipped: %s", e)
+            return None
+        if row is None:
+            return None
+        return CachedPersona(kind=row["kind"], result=json.loads(row["result_json"]), expires_at=row["expires_at"])
+
+    def _store(self, rows: list[tuple]) -> None:
+        if not rows:
+            return
+        try:
+            conn = get_connection()
+            try:
+                conn.executemany(
+                    """
+                    INSERT INTO wspci_persona_cache (cuit_representada, id_persona, kind, result_json, fetched_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(cuit_representada, id_persona) DO UPDATE SET
+                        kind=excluded.kind,
+                        result_json=excluded.result_json,
+                        fetched_at=excluded.fetched_at,
+                        expires_at=excluded.expires_at
+                    """,
+                    rows,
+                )
+            finally:
+                conn.close()
+        except sqlite3.OperationalError as e:
+            logger.debug("Persona cache write skipped: %s", e)
+
+
+persona_cache = PersonaCache()
+
+
+# ===================
+# === COALESCING ====
+# ===================
+
+_inflight: dict[PersonaKey, asyncio.Task] = {}
+
+
+def _forget(key: PersonaKey, task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        # Retrieved here so a lookup nobody awaits anymore does not log "never retrieved".
+        task.exception()
+
+
+async def coalesce(key: PersonaKey, fetch: Callable[[], Awaitable[dict[str, Any]]]) -> dict[str, Any]:
+    """
+    Concurrent lookups of the same idPersona for the same cuitRepresentada
+    share one AFIP call. The call runs outside any request deadline and each
+    caller waits on it under its own, so a caller that disconnects or runs out
+    of time gives up alone while the others keep waiting.
+    """
+    task = _inflight.get(key)
+    if task is not None:
+        persona_cache_lookups.labels("coalesced").inc()
+    else:
+        persona_cache_lookups.labels("miss").inc()
+        task = asyncio.get_running_loop().create_task(fetch(), context=detached_context())
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _forget(key, done))
+    return await run_within_deadline(lambda: asyncio.shield(task))
+
+
+def reset_persona_cache() -> None:
+    persona_cache.clear()
+    _inflight.clear()
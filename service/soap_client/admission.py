@@ -0,0 +1,259 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, TypeVar
+
+from service.observability.collector import get_current_cuit
+from service.observability.metrics import admission_rejections
+from service.utils.deadline import remaining_seconds
+from service.utils.logger import logger
+
+AFIP_ADMISSION_MAX_QUEUE = int(os.getenv("AFIP_ADMISSION_MAX_QUEUE", "64"))
+AFIP_ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("AFIP_ADMISSION_MAX_WAIT_SECONDS", "5"))
+AFIP_CUIT_MAX_CONCURRENCY = int(os.getenv("AFIP_CUIT_MAX_CONCURRENCY", "4"))
+AFIP_CUIT_RATE_PER_SECOND = float(os.getenv("AFIP_CUIT_RATE_PER_SECOND", "0"))
+# CUITs come from request bodies: per-CUIT state is capped and idle entries are dropped first.
+AFIP_CUIT_MAX_TRACKED = int(os.getenv("AFIP_CUIT_MAX_TRACKED", "1024"))
+
+# Per-service defaults, overridable with AFIP_<SERVICE>_MAX_CONCURRENCY,
+# AFIP_<SERVICE>_RATE_PER_SECOND and AFIP_<SERVICE>_BURST. A rate of 0 disables the bucket.
+SERVICE_MAX_CONCURRENCY = {"wsfe": 16, "wspci": 8, "wsaa": 2}
+
+PRIORITY_CRITICAL, PRIORITY_STANDARD, PRIORITY_BACKGROUND = 0, 1, 2
+CRITICAL_METHODS = ("loginCms", "FECAESolicitar", "FECAEASolicitar", "FECAEARegInformativo")
+
+
+class AdmissionRejected(Exception):
+    """Raised instead of calling AFIP; surfaced to clients as 429/503 with Retry-After."""
+
+    def __init__(self, service: str, method: str, reason: str, retry_after: float, status_code: int) -> None:
+        self.service = service
+        self.method = method
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status_code = status_code
+        super().__init__(f"{service}.{method} rejected ({reason}), retry in {retry_after:.1f}s")
+
+
+def priority_for(method: str) -> int:
+    if method in CRITICAL_METHODS:
+        return PRIORITY_CRITICAL
+    if method.startswith("FEParamGet") or "dummy" in method.lower():
+        return PRIORITY_BACKGROUND
+    return PRIORITY_STANDARD
+
+
+class TokenBucket:
+    """
+    Reservation-style bucket: take() may drive tokens negative, so callers
+    that sleep delay() before taking are spaced out at `rate` per second.
+    """
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+    def is_idle(self) -> bool:
+        # A full bucket is the same as a new one.
+        self._refill()
+        return self.tokens >= self.burst
+
+
+class QueueFull(Exception):
+    pass
+
+
+class PriorityLimiter:
+    """
+    Counting semaphore whose waiters are woken by priority, then FIFO.
+    Background calls may only use half of the wait queue, so they are the
+    first to be shed when the relay is overloaded.
+    """
+
+    def __init__(self, limit: int, max_queue: int = AFIP_ADMISSION_MAX_QUEUE) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.queued = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority: int, timeout: float) -> None:
+        if self.in_flight < self.limit and not self.queued:
+            self.in_flight += 1
+            return
+
+        queue_limit = self.max_queue // 2 if priority == PRIORITY_BACKGROUND else self.max_queue
+        if self.queued >= queue_limit or timeout <= 0:
+            raise QueueFull()
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.queued += 1
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up: pass it on.
+                self.release()
+            else:
+                self.queued -= 1
+            raise
+
+    def is_idle(self) -> bool:
+        return self.in_flight == 0 and self.queued == 0
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            # Hand the slot straight to the next waiter; in_flight is unchanged.
+            self.queued -= 1
+            future.set_result(None)
+            return
+        self.in_flight -= 1
+
+
+_service_limiters: dict[str, PriorityLimiter] = {}
+_service_buckets: dict[str, TokenBucket | None] = {}
+_cuit_limiters: OrderedDict[int, PriorityLimiter] = OrderedDict()
+_cuit_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+
+T = TypeVar("T", PriorityLimiter, TokenBucket)
+
+
+def _service_limiter(service: str) -> PriorityLimiter:
+    limiter = _service_limiters.get(service)
+    if limiter is None:
+        default = SERVICE_MAX_CONCURRENCY.get(service, 8)
+        limit = int(os.getenv(f"AFIP_{service.upper()}_MAX_CONCURRENCY", str(default)))
+        limiter = _service_limiters[service] = PriorityLimiter(limit)
+    return limiter
+
+
+def _service_bucket(service: str) -> TokenBucket | None:
+    if service not in _service_buckets:
+        rate = float(os.getenv(f"AFIP_{service.upper()}_RATE_PER_SECOND", "0"))
+        burst = float(os.getenv(f"AFIP_{service.upper()}_BURST", str(max(1.0, rate))))
+        _service_buckets[service] = TokenBucket(rate, burst) if rate > 0 else None
+    return _service_buckets[service]
+
+
+def _per_cuit(entries: OrderedDict[int, T], cuit: int, factory: Callable[[], T]) -> T:
+    """LRU lookup; at the cap, idle entries go first, then the least recently used."""
+    entry = entries.get(cuit)
+    if entry is not None:
+        entries.move_to_end(cuit)
+        return entry
+    if len(entries) >= AFIP_CUIT_MAX_TRACKED:
+        for idle in [key for key, value in entries.items() if value.is_idle()]:
+            del entries[idle]
+        while len(entries) >= AFIP_CUIT_MAX_TRACKED:
+            # Holders keep their reference and release on it; only new calls get a fresh entry.
+            entries.popitem(last=False)
+    entry = entries[cuit] = factory()
+    return entry
+
+
+def _cuit_limiter(cuit: int | None) -> PriorityLimiter | None:
+    if cuit is None or AFIP_CUIT_MAX_CONCURRENCY <= 0:
+        return None
+    return _per_cuit(_cuit_limiters, cuit, lambda: PriorityLimiter(AFIP_CUIT_MAX_CONCURRENCY))
+
+
+def _cuit_bucket(cuit: int | None) -> TokenBucket | None:
+    if cuit is None or AFIP_CUIT_RATE_PER_SECOND <= 0:
+        return None
+    return _per_cuit(
+        _cuit_buckets, cuit, lambda: TokenBucket(AFIP_CUIT_RATE_PER_SECOND, max(1.0, AFIP_CUIT_RATE_PER_SECOND))
+    )
+
+
+def snapshot() -> dict[str, dict[str, int]]:
+    return {
+        service: {"in_flight": limiter.in_flight, "queued": limiter.queued}
+        for service, limiter in _service_limiters.items()
+    }
+
+
+def reset_admission() -> None:
+    _service_limiters.clear()
+    _service_buckets.clear()
+    _cuit_limiters.clear()
+    _cuit_buckets.clear()
+
+
+def _reject(service: str, method: str, reason: str, retry_after: float, status_code: int) -> AdmissionRejected:
+    admission_rejections.labels(service, reason).inc()
+    logger.warning(f"Admission rejected {service}.{method}: {reason} (retry after {retry_after:.1f}s)")
+    return AdmissionRejected(service, method, reason, retry_after, status_code)
+
+
+@asynccontextmanager
+async def admit(
+    service: str,
+    method: str,
+    cuit: int | None = None,
+    max_wait: float | None = None,
+) -> AsyncIterator[None]:
+    """
+    Holds a per-CUIT and a per-service concurrency slot for the duration of
+    the AFIP call, after pacing it through the matching token buckets.
+    Raises AdmissionRejected when the call cannot start within max_wait,
+    which never exceeds the time left before the request deadline.
+    """
+    cuit = get_current_cuit() if cuit is None else cuit
+    priority = priority_for(method)
+    max_wait = AFIP_ADMISSION_MAX_WAIT_SECONDS if max_wait is None else max_wait
+    remaining = remaining_seconds()
+    if remaining is not None:
+        max_wait = min(max_wait, remaining)
+    deadline = time.monotonic() + max_wait
+
+    # Rate limits first: nothing is held yet if the call is rejected.
+    buckets = [bucket for bucket in (_cuit_bucket(cuit), _service_bucket(service)) if bucket is not None]
+    if buckets:
+        delay = max(bucket.delay() for bucket in buckets)
+        if delay > deadline - time.monotonic():
+            raise _reject(service, method, "rate_limited", delay, 429)
+        for bucket in buckets:
+            bucket.take()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    acquired: list[PriorityLimiter] = []
+    try:
+        for limiter, reason in ((_cuit_limiter(cuit), "cuit_busy"), (_service_limiter(service), "overloaded")):
+            if limiter is None:
+                continue
+            try:
+                await limiter.acquire(priority, deadline - time.monotonic())
+            except (QueueFull, asyncio.TimeoutError):
+                status_code = 429 if reason == "cuit_busy" else 503
+                raise _reject(service, method, reason, math.ceil(AFIP_ADMISSION_MAX_WAIT_SECONDS), status_code) from None
+            acquired.append(limiter)
+        yield
+    finally:
+        for limiter in reversed(acquired):
+            limiter.release()
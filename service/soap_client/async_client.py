@@ -2,8 +2,36 @@ import httpx
 from zeep import AsyncClient
 from zeep.transports import AsyncTransport
 
+from service.observability.metrics import http_in_flight
+from service.observability.tracing import span
+
+# httpx's defaults, spelled out so /metrics can report them.
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+HTTP_SERVICES = ("wsfe", "wspci", "wsaa")
+
+
+class TracedAsyncTransport(AsyncTransport):
+    """
+    Records the AFIP round-trip as a "network" span of the current request
+    and counts the requests in flight per service.
+    """
+
+    def __init__(self, *args, service: str, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.service = service
+
+    async def post(self, address, message, headers):
+        in_flight = http_in_flight.labels(self.service)
+        in_flight.inc()
+        try:
+            with span("network"):
+                return await super().post(address, message, headers)
+        finally:
+            in_flight.inc(-1)
+
 
 class WSFEClientManager:
+    service = "wsfe"
     _instance = None
     _client = None
 
@@ -15,8 +43,8 @@ class WSFEClientManager:
     def __init__(self, wsdl):
         if self.__class__._client is None:
 
-            self.httpx_client = httpx.AsyncClient(timeout=20.0)
-            self.transport = AsyncTransport(client=self.httpx_client)
+            self.httpx_client = httpx.AsyncClient(timeout=20.0, limits=HTTP_LIMITS)
+            self.transport = TracedAsyncTransport(client=self.httpx_client, service=self.service)
             self.__class__._client = AsyncClient(wsdl=wsdl, transport=self.transport)
 
     def get_client(self): 
@@ -33,6 +61,7 @@ class WSFEClientManager:
 
 
 class WSPCIClientManager:
+    service = "wspci"
     _instance = None
     _client = None
 
@@ -44,8 +73,8 @@ class WSPCIClientManager:
     def __init__(self, wsdl):
         if self.__class__._client is None:
 
-            self.httpx_client = httpx.AsyncClient(timeout=20.0)
-            self.transport = AsyncTransport(client=self.httpx_client)
+            self.httpx_client = httpx.AsyncClient(timeout=20.0, limits=HTTP_LIMITS)
+            self.transport = TracedAsyncTransport(client=self.httpx_client, service=self.service)
             self.__class__._client = AsyncClient(wsdl=wsdl, transport=self.transport)
 
     def get_client(self):
@@ -62,8 +91,8 @@ class WSPCIClientManager:
 
 
 def wsaa_client(afip_wsdl):
-    httpx_client = httpx.AsyncClient(timeout=30.0)
-    transport = AsyncTransport(client=httpx_client)
+    httpx_client = httpx.AsyncClient(timeout=30.0, limits=HTTP_LIMITS)
+    transport = TracedAsyncTransport(client=httpx_client, service="wsaa")
     client = AsyncClient(wsdl=afip_wsdl, transport=transport)
 
     return client, httpx_client
\ No newline at end of file
@@ -0,0 +1,223 @@
+import logging
+import os
+import time
+from builtins import ConnectionResetError
+from threading import Lock
+from typing import Any, Awaitable, Callable
+
+import httpx
+from tenacity import (AsyncRetrying, RetryCallState, before_sleep_log,
+                      retry_if_exception, stop_after_attempt,
+                      wait_random_exponential)
+from zeep.exceptions import Fault, TransportError, XMLSyntaxError
+
+from service.observability.metrics import afip_retries, circuit_state
+from service.soap_client.admission import admit
+from service.utils.deadline import (check_deadline, remaining_seconds,
+                                    run_within_deadline)
+from service.utils.logger import logger
+
+AFIP_MAX_ATTEMPTS = int(os.getenv("AFIP_MAX_ATTEMPTS", "3"))
+AFIP_BACKOFF_BASE_SECONDS = float(os.getenv("AFIP_BACKOFF_BASE_SECONDS", "0.25"))
+AFIP_BACKOFF_MAX_SECONDS = float(os.getenv("AFIP_BACKOFF_MAX_SECONDS", "4"))
+AFIP_BREAKER_FAILURES = int(os.getenv("AFIP_BREAKER_FAILURES", "5"))
+AFIP_BREAKER_OPEN_SECONDS = float(os.getenv("AFIP_BREAKER_OPEN_SECONDS", "30"))
+# Retries may add at most this fraction of extra load on top of first attempts.
+AFIP_RETRY_BUDGET_RATIO = float(os.getenv("AFIP_RETRY_BUDGET_RATIO", "0.2"))
+AFIP_RETRY_BUDGET_MIN = float(os.getenv("AFIP_RETRY_BUDGET_MIN", "10"))
+# A retry is only worth it if at least this much time is left before the request deadline.
+AFIP_MIN_ATTEMPT_SECONDS = float(os.getenv("AFIP_MIN_ATTEMPT_SECONDS", "1"))
+
+# Failures that mean "the request never made it" or "AFIP is unhealthy".
+RETRYABLE_ERRORS = (ConnectionResetError, httpx.ConnectError, TransportError)
+# SOAP Faults are answers from a healthy service and never trip the breaker.
+BREAKER_ERRORS = (ConnectionResetError, httpx.ConnectError, httpx.TimeoutException, TransportError, XMLSyntaxError)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, service: str, method: str, retry_after: float) -> None:
+        self.service = service
+        self.method = method
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open for {service}.{method}, retry in {retry_after:.1f}s")
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive infrastructure failures and
+    fails fast for `open_seconds`. Then a single probe call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        method: str,
+        failure_threshold: int = AFIP_BREAKER_FAILURES,
+        open_seconds: float = AFIP_BREAKER_OPEN_SECONDS,
+    ) -> None:
+        self.service = service
+        self.method = method
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = Lock()
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"Circuit {self.service}.{self.method}: {self.state} -> {state}")
+        self.state = state
+        circuit_state.labels(self.service, self.method).set(_STATE_VALUES[state])
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == OPEN:
+                if self.retry_after() > 0:
+                    raise CircuitOpenError(self.service, self.method, self.retry_after())
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError(self.service, self.method, self.open_seconds)
+                self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probe_in_flight = False
+            self._set_state(CLOSED)
+
+    def release(self) -> None:
+        """Neither success nor failure (e.g. cancelled call): frees the half-open probe slot."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == OPEN and self.retry_after() > 0
+
+
+class RetryBudget:
+    """
+    Every first attempt deposits `ratio` tokens and every retry withdraws
+    one, so during an outage retries stay a bounded fraction of traffic
+    instead of multiplying it. `minimum` tokens allow retries at low volume.
+    """
+
+    def __init__(self, ratio: float = AFIP_RETRY_BUDGET_RATIO, minimum: float = AFIP_RETRY_BUDGET_MIN) -> None:
+        self.ratio = ratio
+        self.minimum = minimum
+        self.tokens = minimum
+        self._lock = Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio, self.minimum)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+_breakers: dict[tuple[str, str], CircuitBreaker] = {}
+_breakers_lock = Lock()
+retry_budget = RetryBudget()
+
+
+def get_breaker(service: str, method: str) -> CircuitBreaker:
+    key = (service, method)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(key, CircuitBreaker(service, method))
+    return breaker
+
+
+def reset_resilience() -> None:
+    global retry_budget
+    with _breakers_lock:
+        _breakers.clear()
+    retry_budget = RetryBudget()
+
+
+def _should_retry(exc: BaseException) -> bool:
+    return isinstance(exc, RETRYABLE_ERRORS)
+
+
+def _stop_before_deadline(retry_state: RetryCallState) -> bool:
+    remaining = remaining_seconds()
+    return remaining is not None and remaining < (retry_state.upcoming_sleep or 0) + AFIP_MIN_ATTEMPT_SECONDS
+
+
+def _budget_exhausted(retry_state: RetryCallState) -> bool:
+    # Last stop condition: a token is only spent when a retry will really happen.
+    return not retry_budget.try_withdraw()
+
+
+async def call_afip(service: str, method: str, make_request: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Runs make_request behind admission control and the (service, method)
+    circuit breaker, retrying transient failures with full-jitter
+    exponential backoff while the retry budget allows. Raises
+    CircuitOpenError without calling AFIP when open, AdmissionRejected
+    when the relay is saturated, and RequestAbandoned once the request
+    deadline passes or the client disconnects.
+    """
+    check_deadline()
+    breaker = get_breaker(service, method)
+    retry_budget.deposit()
+
+    log_retry = before_sleep_log(logger, logging.WARNING)
+
+    def _before_sleep(retry_state) -> None:
+        afip_retries.labels(service, method).inc()
+        log_retry(retry_state)
+
+    retrying = AsyncRetrying(
+        retry=retry_if_exception(_should_retry),
+        stop=stop_after_attempt(AFIP_MAX_ATTEMPTS) | _stop_before_deadline | _budget_exhausted,
+        wait=wait_random_exponential(multiplier=AFIP_BACKOFF_BASE_SECONDS, max=AFIP_BACKOFF_MAX_SECONDS),
+        before_sleep=_before_sleep,
+        reraise=True,
+    )
+    # Fail fast on an open circuit instead of queueing for a slot first.
+    if breaker.is_open:
+        raise CircuitOpenError(service, method, breaker.retry_after())
+    # Retries keep the admission slot: they are load on AFIP too.
+    async with admit(service, method):
+        async for attempt in retrying:
+            with attempt:
+                breaker.before_call()
+                try:
+                    result = await run_within_deadline(make_request)
+                except BREAKER_ERRORS:
+                    breaker.record_failure()
+                    raise
+                except Fault:
+                    # AFIP answered: the service is up even if the request was rejected.
+                    breaker.record_success()
+                    raise
+                except BaseException:
+                    breaker.release()
+                    raise
+                breaker.record_success()
+                return result
@@ -1,59 +1,43 @@
-import logging
-from builtins import ConnectionResetError
+import time
 
 import httpx
-from tenacity import (before_sleep_log, retry, retry_if_exception_type,
-                      stop_after_attempt, wait_fixed)
 from zeep.exceptions import Fault, TransportError, XMLSyntaxError
 
-from service.observability.collector import emit_domain_event
+from service.observability.collector import record_soap_call
+from service.observability.tracing import split_span
+from service.soap_client.admission import AdmissionRejected
 from service.soap_client.format_error import build_error_response
+from service.soap_client.resilience import CircuitOpenError, call_afip
+from service.utils.deadline import RequestAbandoned
 from service.utils.logger import logger
 
 
-@retry(
-        retry=retry_if_exception_type(( ConnectionResetError, httpx.ConnectError, TransportError )),
-        stop=stop_after_attempt(3),
-        wait=wait_fixed(0.5),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-    )
 async def consult_afip_wsaa(make_request, METHOD) -> dict:
 
     logger.info("Starting CMS login request to AFIP")
 
+    started = time.perf_counter()
     try:
-        login_ticket_response = await make_request()
+        login_ticket_response = await call_afip("wsaa", METHOD, make_request)
+        split_span(started, "network", before="soap_build", after="soap_parse")
         logger.info("CMS login request to AFIP ended successfully.")
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsaa",
-            status="success",
-            entity_key=METHOD,
-        )
+        record_soap_call(service="wsaa", method=METHOD, started=started)
 
         return {
                 "status" : "success",
                 "response" : login_ticket_response
                 }
     
+    except CircuitOpenError as e:
+        record_soap_call(service="wsaa", method=METHOD, started=started, error_type="Circuit open")
+        return build_error_response(METHOD, "Circuit open", str(e))
+
     except (httpx.ConnectError, httpx.TimeoutException) as e:
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsaa",
-            status="error",
-            entity_key=METHOD,
-            error_type="Network error",
-        )
+        record_soap_call(service="wsaa", method=METHOD, started=started, error_type="Network error")
         return build_error_response(METHOD, "Network error", str(e))
     
     except TransportError as e:
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsaa",
-            status="error",
-            entity_key=METHOD,
-            error_type="HTTP Error",
-        )
+        record_soap_call(service="wsaa", method=METHOD, started=started, error_type="HTTP Error")
         return build_error_response(METHOD, "HTTP Error", str(e))
 
     except Fault as e:
@@ -61,33 +45,24 @@ async def consult_afip_wsaa(make_request, METHOD) -> dict:
         # often due to invalid input, datatype mismatches, or business rule violations. 
         # These errors are the caller's responsibility to handle.
 
-        logger.debug(f"SOAP FAULT in {METHOD}: {e}")
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsaa",
-            status="error",
-            entity_key=METHOD,
-            error_type="SOAPFault",
-        )
+        logger.debug("SOAP FAULT in %s: %s", METHOD, e)
+        record_soap_call(service="wsaa", method=METHOD, started=started, error_type="SOAPFault")
         return build_error_response(METHOD, "SOAPFault", str(e))
     
     except XMLSyntaxError as e:
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsaa",
-            status="error",
-            entity_key=METHOD,
-            error_type="Invalid AFIP response",
-        )
+        record_soap_call(service="wsaa", method=METHOD, started=started, error_type="Invalid AFIP response")
         return build_error_response(METHOD, "Invalid AFIP response", str(e))
 
+    except AdmissionRejected:
+        # Not an AFIP error: the API answers 429/503 with Retry-After.
+        raise
+
+    except RequestAbandoned:
+        # Deadline passed or client gone: the in-flight call was cancelled.
+        record_soap_call(service="wsaa", method=METHOD, started=started, error_type="Request abandoned")
+        raise
+
     except Exception as e:
         logger.error(f"General exception in {METHOD}: {e}")
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsaa",
-            status="error",
-            entity_key=METHOD,
-            error_type="unknown",
-        )
+        record_soap_call(service="wsaa", method=METHOD, started=started, error_type="unknown")
         return build_error_response(METHOD, "unknown", str(e))
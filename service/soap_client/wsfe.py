@@ -1,64 +1,49 @@
-import logging
-from builtins import ConnectionResetError
+import time
 
 import httpx
-from tenacity import (before_sleep_log, retry, retry_if_exception_type,
-                      stop_after_attempt, wait_fixed)
 from zeep.exceptions import Fault, TransportError, XMLSyntaxError
 from zeep.helpers import serialize_object
 
-from service.observability.collector import emit_domain_event
+from service.observability.collector import record_soap_call
+from service.observability.tracing import span, split_span
+from service.soap_client.admission import AdmissionRejected
 from service.soap_client.async_client import WSFEClientManager
 from service.soap_client.format_error import build_error_response
+from service.soap_client.resilience import CircuitOpenError, call_afip
 from service.soap_client.wsdl.wsdl_manager import get_wsfe_wsdl
+from service.utils.deadline import RequestAbandoned
 from service.utils.logger import logger
 
 
-@retry(
-        retry=retry_if_exception_type(( ConnectionResetError, httpx.ConnectError, TransportError )),
-        stop=stop_after_attempt(3),
-        wait=wait_fixed(0.5),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-    )
 async def consult_afip_wsfe(make_request, METHOD: str) -> dict:
         
+    started = time.perf_counter()
     try:
-        afip_response = await make_request()
-        logger.debug(f"Response: {afip_response}")
+        afip_response = await call_afip("wsfe", METHOD, make_request)
+        split_span(started, "network", before="soap_build", after="soap_parse")
+        logger.debug("Response: %s", afip_response)
 
         # Zeep returns an object of type '<class 'zeep.objects.[service response]'>'.
         # To work with the returned data, this object needs to be converted into a dictionary using serialize_object().
-        afip_response = serialize_object(afip_response)
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsfe",
-            status="success",
-            entity_key=METHOD,
-        )
+        with span("serialize_object"):
+            afip_response = serialize_object(afip_response)
+        record_soap_call(service="wsfe", method=METHOD, started=started)
 
         return {
                 "status" : "success",
                 "response" : afip_response
                 }
     
+    except CircuitOpenError as e:
+        record_soap_call(service="wsfe", method=METHOD, started=started, error_type="Circuit open")
+        return build_error_response(METHOD, "Circuit open", str(e))
+
     except (httpx.ConnectError, httpx.TimeoutException) as e:
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsfe",
-            status="error",
-            entity_key=METHOD,
-            error_type="Network error",
-        )
+        record_soap_call(service="wsfe", method=METHOD, started=started, error_type="Network error")
         return build_error_response(METHOD, "Network error", str(e))
     
     except TransportError as e:
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsfe",
-            status="error",
-            entity_key=METHOD,
-            error_type="HTTP Error",
-        )
+        record_soap_call(service="wsfe", method=METHOD, started=started, error_type="HTTP Error")
         return build_error_response(METHOD, "HTTP Error", str(e))
 
     except Fault as e:
@@ -66,35 +51,26 @@ async def consult_afip_wsfe(make_request, METHOD: str) -> dict:
         # Zeep owns the XML generation, so any structural or datatype issue leading to a
         # SOAP Fault originates from Zeep or the remote service, not from this layer.
         
-        logger.debug(f"SOAP FAULT in {METHOD}: {e}")
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsfe",
-            status="error",
-            entity_key=METHOD,
-            error_type="SOAPFault",
-        )
+        logger.debug("SOAP FAULT in %s: %s", METHOD, e)
+        record_soap_call(service="wsfe", method=METHOD, started=started, error_type="SOAPFault")
         return build_error_response(METHOD, "SOAPFault", str(e))
     
     except XMLSyntaxError as e:
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsfe",
-            status="error",
-            entity_key=METHOD,
-            error_type="Invalid AFIP response",
-        )
+        record_soap_call(service="wsfe", method=METHOD, started=started, error_type="Invalid AFIP response")
         return build_error_response(METHOD, "Invalid AFIP response", str(e))
 
+    except AdmissionRejected:
+        # Not an AFIP error: the API answers 429/503 with Retry-After.
+        raise
+
+    except RequestAbandoned:
+        # Deadline passed or client gone: the in-flight call was cancelled.
+        record_soap_call(service="wsfe", method=METHOD, started=started, error_type="Request abandoned")
+        raise
+
     except Exception as e:
         logger.error(f"General exception in {METHOD}: {e}")
-        emit_domain_event(
-            event_type="soap_call",
-            service="wsfe",
-            status="error",
-            entity_key=METHOD,
-            error_type="unknown",
-        )
+        record_soap_call(service="wsfe", method=METHOD, started=started, error_type="unknown")
         return build_error_response(METHOD, "unknown", str(e))
 
 
@@ -117,4 +93,4 @@ async def wsfe_dummy():
 
     except Exception as e:
         logger.error(f"General exception in wsfe_dummy: {e}")
-        return health_info
+        raise
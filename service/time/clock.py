@@ -0,0 +1,119 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+import ntplib
+
+from service.utils.logger import logger
+
+NTP_SERVER = os.getenv("NTP_SERVER", "time.afip.gov.ar")
+NTP_TIMEOUT_SECONDS = float(os.getenv("NTP_TIMEOUT_SECONDS", "5"))
+CLOCK_REFRESH_SECONDS = int(os.getenv("CLOCK_REFRESH_SECONDS", "300"))
+# Readiness reports NTP as failing once the last good sync is older than this.
+CLOCK_MAX_STALENESS_SECONDS = int(os.getenv("CLOCK_MAX_STALENESS_SECONDS", "1800"))
+
+
+class _NTPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, response: asyncio.Future) -> None:
+        self.response = response
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if not self.response.done():
+            self.response.set_result((data, ntplib.system_to_ntp_time(time.time())))
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.response.done():
+            self.response.set_exception(exc)
+
+
+async def query_ntp(server: str = NTP_SERVER, timeout: float = NTP_TIMEOUT_SECONDS) -> ntplib.NTPStats:
+    """Single NTP client exchange over an asyncio datagram endpoint."""
+    loop = asyncio.get_running_loop()
+    response: asyncio.Future = loop.create_future()
+    transport, _ = await asyncio.wait_for(
+        loop.create_datagram_endpoint(lambda: _NTPProtocol(response), remote_addr=(server, 123)),
+        timeout=timeout,
+    )
+    try:
+        packet = ntplib.NTPPacket(mode=3, version=3, tx_timestamp=ntplib.system_to_ntp_time(time.time()))
+        transport.sendto(packet.to_data())
+        data, dest_timestamp = await asyncio.wait_for(response, timeout=timeout)
+    finally:
+        transport.close()
+
+    stats = ntplib.NTPStats()
+    stats.from_data(data)
+    stats.dest_timestamp = dest_timestamp
+    return stats
+
+
+class ClockService:
+    """
+    Keeps the offset between the local clock and AFIP's NTP server. now() is
+    answered from a monotonic anchor taken at the last sync, so it never
+    blocks and is not affected by local clock steps between refreshes.
+    Before the first successful sync it falls back to the system clock.
+    """
+
+    def __init__(self, server: str = NTP_SERVER) -> None:
+        self.server = server
+        self.offset_seconds = 0.0
+        self.last_error: str | None = None
+        self._anchor_monotonic: float | None = None
+        self._anchor_epoch: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self) -> bool:
+        async with self._lock:
+            try:
+                stats = await query_ntp(self.server)
+            except (OSError, asyncio.TimeoutError, ntplib.NTPException) as e:
+                self.last_error = str(e) or type(e).__name__
+                logger.warning(f"NTP sync with {self.server} failed: {self.last_error}")
+                return False
+
+            self.offset_seconds = stats.offset
+            self._anchor_monotonic = time.monotonic()
+            self._anchor_epoch = time.time() + stats.offset
+            self.last_error = None
+            logger.debug("NTP offset against %s: %.6fs", self.server, stats.offset)
+            return True
+
+    @property
+    def synced(self) -> bool:
+        return self._anchor_monotonic is not None
+
+    def staleness_seconds(self) -> float | None:
+        if self._anchor_monotonic is None:
+            return None
+        return time.monotonic() - self._anchor_monotonic
+
+    def is_fresh(self) -> bool:
+        staleness = self.staleness_seconds()
+        return staleness is not None and staleness <= CLOCK_MAX_STALENESS_SECONDS
+
+    def epoch(self) -> float:
+        if self._anchor_monotonic is None:
+            return time.time()
+        return self._anchor_epoch + (time.monotonic() - self._anchor_monotonic)
+
+    def now(self) -> datetime:
+        """Corrected UTC time with microsecond resolution."""
+        return datetime.fromtimestamp(self.epoch(), tz=timezone.utc)
+
+    def set_offset(self, offset_seconds: float) -> None:
+        """Anchors the clock without a network query (tests, manual override)."""
+        self.offset_seconds = offset_seconds
+        self._anchor_monotonic = time.monotonic()
+        self._anchor_epoch = time.time() + offset_seconds
+        self.last_error = None
+
+    def reset(self) -> None:
+        self.offset_seconds = 0.0
+        self.last_error = None
+        self._anchor_monotonic = None
+        self._anchor_epoch = None
+
+
+clock = ClockService()
@@ -1,28 +1,17 @@
-import socket
-from datetime import datetime, timedelta, timezone
-
-import ntplib
+from datetime import timedelta
 
+from service.time.clock import clock
 from service.utils.logger import logger
 
 
 def generate_ntp_timestamp() -> tuple[int, str, str]:
 
-    logger.debug("Consulting NTP for get the datetime...")
-
-    try:
-        client = ntplib.NTPClient()
-        response = client.request('time.afip.gov.ar', timeout=5)
+    logger.debug("Reading NTP-corrected datetime from the clock service...")
 
-    except socket.timeout:
-        logger.warning("NTP request timed out")
-        return False, False, False
+    if not clock.synced:
+        logger.warning("Clock not synced with NTP yet, using the system clock")
 
-    except Exception as e:
-        logger.warning(f"NTP readiness check failed: {e}")
-        return False, False, False
-
-    generation_dt = datetime.fromtimestamp(response.tx_time, tz=timezone.utc)
+    generation_dt = clock.now()
 
     actual_time_epoch = int(generation_dt.timestamp())
 
@@ -31,22 +20,15 @@ def generate_ntp_timestamp() -> tuple[int, str, str]:
     generation_time = generation_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
     expiration_time = expiration_dte.strftime('%Y-%m-%dT%H:%M:%SZ')
 
-    logger.debug(f"Datetime values: epoch: {actual_time_epoch} | gentime: {generation_time} | exptime: {expiration_time}")
+    logger.debug("Datetime values: epoch: %s | gentime: %s | exptime: %s", actual_time_epoch, generation_time, expiration_time)
 
     return actual_time_epoch, generation_time, expiration_time
 
 
 def request_ntp_for_readiness() -> bool:
-    try:
-        logger.debug("Checking NTP availability for readiness...")
-        client = ntplib.NTPClient()
-        client.request("time.afip.gov.ar", timeout=5)
+    # Answered from the last background sync; the probe never waits on NTP.
+    if clock.is_fresh():
         return True
-    
-    except socket.timeout:
-        logger.warning("NTP request timed out")
-        return False
-    
-    except Exception as e:
-        logger.warning(f"NTP readiness check failed: {e}")
-        return False
\ No newline at end of file
+
+    logger.warning(f"NTP readiness check failed: {clock.last_error or 'no recent sync'}")
+    return False
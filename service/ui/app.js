@@ -379,6 +379,28 @@ function buildSeries(logItems, selectedWindowMinutes) {
   return { requests, errors };
 }
 
+// Snapshot loaded by refreshAll() and extended by /ui/stream deltas.
+let liveLogs = [];
+let liveEvents = [];
+const LIVE_LOGS_LIMIT = 300;
+const LIVE_EVENTS_LIMIT = 200;
+
+function renderMetrics(data) {
+  const summary = data.summary;
+  metricRequests.textContent = summary.total_requests;
+  metricErrors.textContent = summary.error_count;
+  metricP95.textContent = `${summary.p95_ms} ms`;
+  metricAvg.textContent = `${summary.avg_ms} ms`;
+  renderErrors(data.errors.items || []);
+  operationsJson.textContent = JSON.stringify(data.operations, null, 2);
+}
+
+function renderSparklines(selectedWindowMinutes) {
+  const series = buildSeries(liveLogs, selectedWindowMinutes);
+  drawSparkline(trafficSparkline, series.requests, "#2f6f5e", "rgba(47,111,94,0.14)");
+  drawSparkline(errorSparkline, series.errors, "#b22f25", "rgba(178,47,37,0.14)");
+}
+
 async function refreshAll() {
   const filters = getFilters();
   try {
@@ -410,36 +432,155 @@ async function refreshAll() {
       apiGet("/ui/caea/assignments?limit=200"),
     ]);
 
-    metricRequests.textContent = summary.total_requests;
-    metricErrors.textContent = summary.error_count;
-    metricP95.textContent = `${summary.p95_ms} ms`;
-    metricAvg.textContent = `${summary.avg_ms} ms`;
+    renderMetrics({ summary, errors, operations: ops });
     setTokenState(wsaaTokenStatus, wsaaTokenExpiry, tokens.wsaa);
     setTokenState(wspciTokenStatus, wspciTokenExpiry, tokens.wspci);
-    renderLogs(logs.items || []);
-    renderEvents(events.items || []);
-    renderErrors(errors.items || []);
+    liveLogs = logs.items || [];
+    liveEvents = events.items || [];
+    renderLogs(liveLogs);
+    renderEvents(liveEvents);
     renderAlerts(alerts.active || []);
     renderQueue(queue);
     renderAssignments(assignments);
     renderPosList(assignments.items || []);
-    operationsJson.textContent = JSON.stringify(ops, null, 2);
-
-    const series = buildSeries(logs.items || [], filters.window);
-    drawSparkline(trafficSparkline, series.requests, "#2f6f5e", "rgba(47,111,94,0.14)");
-    drawSparkline(errorSparkline, series.errors, "#b22f25", "rgba(178,47,37,0.14)");
+    renderSparklines(filters.window);
   } catch (error) {
     console.error(error);
     operationsJson.textContent = `Monitor refresh failed: ${error.message}`;
   }
 }
 
+function logMatchesFilters(row, filters) {
+  if (filters.service && row.service !== filters.service) return false;
+  if (filters.status === "ok" && !row.ok) return false;
+  if (filters.status === "error" && row.ok) return false;
+  if (filters.logEndpoint && row.path !== filters.logEndpoint) return false;
+  if (filters.logErrorType && row.error_type !== filters.logErrorType) return false;
+  return true;
+}
+
+function eventMatchesFilters(row, filters) {
+  if (filters.service && row.service !== filters.service) return false;
+  const status = filters.status === "ok" ? "success" : filters.status;
+  return !status || row.status === status;
+}
+
+// Deltas arrive oldest first; the tables are newest first.
+function prependLive(current, items, matches, limit) {
+  const filters = getFilters();
+  const fresh = items.filter((row) => matches(row, filters)).reverse();
+  return fresh.concat(current).slice(0, limit);
+}
+
+async function refreshOutbox() {
+  const [queue, assignments] = await Promise.all([
+    apiGet("/ui/caea/queue?limit=200"),
+    apiGet("/ui/caea/assignments?limit=200"),
+  ]);
+  renderQueue(queue);
+  renderAssignments(assignments);
+  renderPosList(assignments.items || []);
+}
+
+const streamHandlers = {
+  logs(data) {
+    liveLogs = prependLive(liveLogs, data.items, logMatchesFilters, LIVE_LOGS_LIMIT);
+    renderLogs(liveLogs);
+    renderSparklines(getFilters().window);
+  },
+  events(data) {
+    liveEvents = prependLive(liveEvents, data.items, eventMatchesFilters, LIVE_EVENTS_LIMIT);
+    renderEvents(liveEvents);
+  },
+  metrics(data) {
+    renderMetrics(data);
+  },
+  alerts(data) {
+    renderAlerts(data.active || []);
+  },
+  tokens(data) {
+    setTokenState(wsaaTokenStatus, wsaaTokenExpiry, data.wsaa);
+    setTokenState(wspciTokenStatus, wspciTokenExpiry, data.wspci);
+  },
+  outbox() {
+    refreshOutbox().catch((error) => console.error(error));
+  },
+};
+
+const STREAM_RECONNECT_MS = 3000;
+const POLL_INTERVAL_MS = 15000;
+let streamController = null;
+let pollTimer = null;
+
+function dispatchStreamMessage(block) {
+  let eventType = "message";
+  const data = [];
+  block.split("\n").forEach((line) => {
+    if (line.startsWith("event:")) eventType = line.slice(6).trim();
+    else if (line.startsWith("data:")) data.push(line.slice(5).trim());
+  });
+  if (eventType === "dropped") throw new Error("stream dropped by server");
+  const handler = streamHandlers[eventType];
+  if (handler && data.length) handler(JSON.parse(data.join("\n")));
+}
+
+// EventSource cannot send the Authorization header, so read the SSE body with fetch.
+async function consumeStream(signal) {
+  const token = getToken();
+  const headers = token ? { Authorization: `Bearer ${token}` } : {};
+  const query = buildQuery({ window_minutes: getFilters().window });
+  const response = await fetch(`/ui/stream${query}`, { headers, signal });
+  if (!response.ok || !response.body) {
+    throw new Error(`${response.status} ${response.statusText}`);
+  }
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+    let split = buffer.indexOf("\n\n");
+    while (split >= 0) {
+      dispatchStreamMessage(buffer.slice(0, split));
+      buffer = buffer.slice(split + 2);
+      split = buffer.indexOf("\n\n");
+    }
+  }
+}
+
+function startPolling() {
+  if (!pollTimer) pollTimer = setInterval(refreshAll, POLL_INTERVAL_MS);
+}
+
+async function connectLive() {
+  if (streamController) streamController.abort();
+  const controller = new AbortController();
+  streamController = controller;
+  await refreshAll();
+  try {
+    await consumeStream(controller.signal);
+  } catch (error) {
+    if (controller.signal.aborted) return;
+    console.error(error);
+    if (typeof TextDecoderStream === "undefined") {
+      startPolling();
+      return;
+    }
+  }
+  if (streamController === controller) {
+    setTimeout(() => {
+      if (streamController === controller) connectLive();
+    }, STREAM_RECONNECT_MS);
+  }
+}
+
 saveTokenBtn.addEventListener("click", () => {
   saveToken();
-  refreshAll();
+  connectLive();
 });
 
-applyFiltersBtn.addEventListener("click", () => refreshAll());
+// The stream is scoped to the metrics window, so a new window reconnects.
+applyFiltersBtn.addEventListener("click", () => connectLive());
 applyLogFiltersBtn.addEventListener("click", () => refreshAll());
 
 refreshLogsBtn.addEventListener("click", async () => {
@@ -493,5 +634,4 @@ refreshPosParamsBtn.addEventListener("click", refreshWsfePosParams);
 refreshWsfeParamsBtn.addEventListener("click", refreshWsfeParamsSnapshot);
 
 tokenInput.value = getToken();
-refreshAll();
-setInterval(refreshAll, 15000);
+connectLive();
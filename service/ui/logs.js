@@ -38,6 +38,11 @@ function fmtDate(value) {
   return d.toLocaleString();
 }
 
+function fmtSpans(spans) {
+  if (!spans || !spans.length) return "-";
+  return spans.map((span) => `${span.name} ${span.duration_ms}`).join(" · ");
+}
+
 function renderLogs(items) {
   logsTable.innerHTML = "";
   items.forEach((row) => {
@@ -48,6 +53,7 @@ function renderLogs(items) {
       <td>${row.path}</td>
       <td class="${row.ok ? "status-ok" : "status-error"}">${row.status_code}</td>
       <td>${row.duration_ms}</td>
+      <td class="spans">${fmtSpans(row.spans)}</td>
       <td>${row.service || "-"}</td>
       <td>${row.error_type || "-"}</td>
       <td>${row.cuit || "-"}</td>
@@ -1,59 +1,38 @@
+import asyncio
 import os
 from datetime import datetime, timezone
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from service.controllers.readiness_health_controller import (
+    HEALTH_CHECK_INTERVAL_SECONDS, refresh_health_checks)
 from service.controllers.request_access_token_controller import \
     generate_afip_access_token
 from service.controllers.request_wspci_access_token_controller import \
     generate_wspci_access_token
 from service.caea_resilience.bootstrap import bootstrap_caea_cycles_once
 from service.caea_resilience.outbox_worker import process_pending_outbox_jobs
-from service.time.time_management import \
-    generate_ntp_timestamp as time_provider
+from service.controllers.wsfe_params_controller import refresh_param_tables
+from service.param_rules.tables import PARAM_TABLES_REFRESH_HOURS, param_tables
+from service.time.clock import CLOCK_REFRESH_SECONDS, clock
 from service.utils.logger import logger
-from service.xml_management.xml_builder import is_expiring_soon, xml_exists
+from service.utils.token_lifecycle import TokenLifecycle
 
 scheduler = AsyncIOScheduler()
 
-async def run_job():
-    logger.info("Starting job: verifying WSFE token expiration")
-    renew_before_minutes = int(os.getenv("WSFE_TOKEN_RENEW_BEFORE_MINUTES", "15"))
-
-    if xml_exists("loginTicketResponse.xml") and not is_expiring_soon(
-        "loginTicketResponse.xml",
-        time_provider,
-        renew_before_minutes=renew_before_minutes,
-    ):
-        logger.info("WSFE token still valid and not expiring soon. Job finished.")
-        return
-
-    token_generation_status = await generate_afip_access_token()
-
-    if token_generation_status["status"] == "success":
-        logger.info("WSFE token generated successfully. Job finished.")
-    else:
-        logger.info("Couldn't generate WSFE token by scheduler.")
-
-
-async def run_wspci_job():
-    logger.info("Starting job: verifying WSPCI token expiration")
-    renew_before_minutes = int(os.getenv("WSPCI_TOKEN_RENEW_BEFORE_MINUTES", "15"))
-
-    if xml_exists("wspci_loginTicketResponse.xml") and not is_expiring_soon(
-        "wspci_loginTicketResponse.xml",
-        time_provider,
-        renew_before_minutes=renew_before_minutes,
-    ):
-        logger.info("WSPCI token still valid and not expiring soon. Job finished.")
-        return
-
-    token_generation_status = await generate_wspci_access_token()
-
-    if token_generation_status["status"] == "success":
-        logger.info("WSPCI token generated successfully. Job finished.")
-    else:
-        logger.info("Couldn't generate WSPCI token by scheduler.")
+# One-shot renewal jobs per ticket; they reschedule themselves (see TokenLifecycle).
+wsaa_token_lifecycle = TokenLifecycle(
+    "wsaa",
+    "loginTicketResponse.xml",
+    generate_afip_access_token,
+    margin_seconds=int(os.getenv("WSFE_TOKEN_RENEW_BEFORE_MINUTES", "15")) * 60,
+)
+wspci_token_lifecycle = TokenLifecycle(
+    "wspci",
+    "wspci_loginTicketResponse.xml",
+    generate_wspci_access_token,
+    margin_seconds=int(os.getenv("WSPCI_TOKEN_RENEW_BEFORE_MINUTES", "15")) * 60,
+)
 
 
 async def run_caea_outbox_job():
@@ -74,45 +53,81 @@ async def run_caea_bootstrap_job():
     logger.info("CAEA bootstrap job finished: %s", result)
 
 
+async def run_param_tables_job():
+    if not param_tables.loaded:
+        # The startup load found no state DB; pick up what other workers stored.
+        await asyncio.to_thread(param_tables.load)
+    # Parameter tables are the same for every CUIT; any authorized one can read them.
+    cuit = os.getenv("WSFE_PARAM_TABLES_CUIT") or os.getenv("CAEA_BOOTSTRAP_CUITS", "").split(",")[0].strip()
+    if not cuit:
+        logger.debug("Param tables job skipped: set WSFE_PARAM_TABLES_CUIT to enable local invoice rules")
+        return
+    try:
+        result = await refresh_param_tables(int(cuit))
+    except Exception as e:
+        logger.warning("Param tables refresh failed: %s", e)
+        return
+    logger.info("Param tables refresh finished: %s", result)
+
+
+async def run_clock_sync_job():
+    logger.debug("Starting job: refreshing NTP clock offset")
+    await clock.refresh()
+
+
+async def run_health_checks_job():
+    await refresh_health_checks()
+
+
 def start_scheduler():
-    watchdog_minutes = int(os.getenv("AFIP_TOKEN_WATCHDOG_MINUTES", "5"))
-    logger.info("Scheduler starting: token watchdog jobs configured every %s minutes", watchdog_minutes)
+    logger.info("Scheduler starting")
 
+    wsaa_token_lifecycle.start(scheduler)
+    wspci_token_lifecycle.start(scheduler)
     scheduler.add_job(
-        run_job,
+        run_caea_outbox_job,
         trigger="interval",
-        minutes=watchdog_minutes,
-        id="afip_token_watchdog",
+        minutes=1,
+        id="caea_outbox_watchdog",
         replace_existing=True,
         max_instances=1,
         coalesce=True,
-        next_run_time=datetime.now(timezone.utc)
+        next_run_time=datetime.now(timezone.utc),
     )
     scheduler.add_job(
-        run_wspci_job,
+        run_caea_bootstrap_job,
         trigger="interval",
-        minutes=watchdog_minutes,
-        id="afip_wspci_token_watchdog",
+        hours=6,
+        id="caea_bootstrap_watchdog",
         replace_existing=True,
         max_instances=1,
         coalesce=True,
-        next_run_time=datetime.now(timezone.utc)
+        next_run_time=datetime.now(timezone.utc),
     )
     scheduler.add_job(
-        run_caea_outbox_job,
+        run_param_tables_job,
         trigger="interval",
-        minutes=1,
-        id="caea_outbox_watchdog",
+        hours=PARAM_TABLES_REFRESH_HOURS,
+        id="wsfe_param_tables_refresh",
         replace_existing=True,
         max_instances=1,
         coalesce=True,
         next_run_time=datetime.now(timezone.utc),
     )
     scheduler.add_job(
-        run_caea_bootstrap_job,
+        run_clock_sync_job,
         trigger="interval",
-        hours=6,
-        id="caea_bootstrap_watchdog",
+        seconds=CLOCK_REFRESH_SECONDS,
+        id="ntp_clock_sync",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.add_job(
+        run_health_checks_job,
+        trigger="interval",
+        seconds=HEALTH_CHECK_INTERVAL_SECONDS,
+        id="readiness_health_checks",
         replace_existing=True,
         max_instances=1,
         coalesce=True,
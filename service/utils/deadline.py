@@ -0,0 +1,121 @@
+import asyncio
+import time
+from contextlib import suppress
+from contextvars import Context, ContextVar, Token, copy_context
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+
+class RequestAbandoned(Exception):
+    """The client will not use the result: stop working on the request."""
+
+
+class DeadlineExceeded(RequestAbandoned):
+    pass
+
+
+class ClientDisconnected(RequestAbandoned):
+    pass
+
+
+@dataclass
+class RequestDeadline:
+    # time.monotonic() value, None when the client sent no deadline.
+    expires_at: float | None = None
+    disconnected: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def remaining(self) -> float | None:
+        return None if self.expires_at is None else self.expires_at - time.monotonic()
+
+
+_deadline_context: ContextVar[RequestDeadline | None] = ContextVar("request_deadline", default=None)
+
+
+def set_request_deadline(deadline: RequestDeadline) -> Token:
+    return _deadline_context.set(deadline)
+
+
+def reset_request_deadline(token: Token) -> None:
+    _deadline_context.reset(token)
+
+
+def detached_context() -> Context:
+    """Copy of the current context without the request deadline, for work shared by several requests."""
+    context = copy_context()
+    context.run(_deadline_context.set, None)
+    return context
+
+
+def remaining_seconds() -> float | None:
+    deadline = _deadline_context.get()
+    return deadline.remaining() if deadline is not None else None
+
+
+def parse_timeout(deadline_header: str | None, timeout_header: str | None) -> float | None:
+    """
+    Seconds left for the request. X-Request-Timeout is relative seconds;
+    X-Request-Deadline is absolute, as epoch seconds or an ISO 8601
+    timestamp with offset. The earlier of both wins; invalid values are ignored.
+    """
+    candidates = []
+    if timeout_header:
+        with suppress(ValueError):
+            candidates.append(float(timeout_header))
+    if deadline_header:
+        try:
+            epoch = float(deadline_header)
+        except ValueError:
+            try:
+                epoch = datetime.fromisoformat(deadline_header.replace("Z", "+00:00")).timestamp()
+            except ValueError:
+                epoch = None
+        if epoch is not None:
+            candidates.append(epoch - time.time())
+    return min(candidates) if candidates else None
+
+
+def check_deadline() -> None:
+    deadline = _deadline_context.get()
+    if deadline is None:
+        return
+    if deadline.disconnected.is_set():
+        raise ClientDisconnected("Client disconnected")
+    remaining = deadline.remaining()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+async def run_within_deadline(make_request: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Awaits make_request, cancelling it as soon as the request deadline
+    passes or the client disconnects. Outside a request it just awaits.
+    """
+    deadline = _deadline_context.get()
+    if deadline is None:
+        return await make_request()
+    check_deadline()
+
+    task = asyncio.ensure_future(make_request())
+    disconnect = asyncio.ensure_future(deadline.disconnected.wait())
+    try:
+        done, _ = await asyncio.wait(
+            {task, disconnect},
+            timeout=deadline.remaining(),
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    except BaseException:
+        task.cancel()
+        raise
+    finally:
+        disconnect.cancel()
+
+    if task in done:
+        return task.result()
+
+    task.cancel()
+    # Let the transport close the connection before reporting.
+    await asyncio.wait({task})
+    if deadline.disconnected.is_set():
+        raise ClientDisconnected("Client disconnected")
+    raise DeadlineExceeded("Request deadline exceeded")
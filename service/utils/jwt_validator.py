@@ -1,3 +1,4 @@
+import secrets
 from os import getenv
 
 from fastapi import Depends, HTTPException
@@ -5,9 +6,20 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 security = HTTPBearer()
 SECRET = getenv("JWT_SECRET_KEY", "default-secret-change-me")
+# Admin endpoints (profiler) stay disabled unless a separate secret is set.
+ADMIN_SECRET = getenv("ADMIN_JWT_SECRET_KEY")
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
 
     if credentials.credentials != SECRET:
         raise HTTPException(status_code=401, detail="Invalid JWT")
-    return credentials.credentials
\ No newline at end of file
+    return credentials.credentials
+
+
+def verify_admin_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+
+    if not ADMIN_SECRET:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not secrets.compare_digest(credentials.credentials, ADMIN_SECRET):
+        raise HTTPException(status_code=401, detail="Invalid JWT")
+    return credentials.credentials
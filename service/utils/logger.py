@@ -1,15 +1,178 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+LOG_LEVEL = os.getenv("AFRELAY_LOG_LEVEL", "DEBUG").upper()
+# "json" writes one structured record per line; "text" keeps the classic layout.
+LOG_FORMAT = os.getenv("AFRELAY_LOG_FORMAT", "json").lower()
+# Messages longer than this (full AFIP responses, login tickets) are cut in the file.
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("AFRELAY_LOG_MAX_MESSAGE_CHARS", "4000"))
+LOG_QUEUE_SIZE = int(os.getenv("AFRELAY_LOG_QUEUE_SIZE", "10000"))
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 logger.propagate = False
 
+
+@lru_cache(maxsize=512)
+def module_name(pathname: str) -> str:
+    """Dotted module path for a source file, e.g. "service.soap_client.wsfe"."""
+    path = Path(pathname)
+    try:
+        path = path.resolve().relative_to(PROJECT_ROOT)
+    except ValueError:
+        return path.stem
+    return ".".join(path.with_suffix("").parts)
+
+
+def _trace_id() -> str | None:
+    # Imported late: the collector (and everything it imports) logs through this module.
+    try:
+        from service.observability.collector import get_current_trace_id
+    except ImportError:
+        return None
+    return get_current_trace_id()
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    Per-module level overrides on top of the base level. The most specific
+    dotted prefix wins, so "service.soap_client=WARNING" with
+    "service.soap_client.wsfe=DEBUG" keeps DEBUG for wsfe only.
+    """
+
+    def __init__(self, base_level: int, overrides: dict[str, int] | None = None) -> None:
+        super().__init__()
+        self.base_level = base_level
+        self.overrides = dict(overrides or {})
+
+    def level_for(self, module: str) -> int:
+        name = module
+        while name:
+            if name in self.overrides:
+                return self.overrides[name]
+            name = name.rpartition(".")[0]
+        return self.base_level
+
+    def threshold(self) -> int:
+        """Lowest level any module may log at; the logger drops everything below it."""
+        return min([self.base_level, *self.overrides.values()])
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.module_name = module_name(record.pathname)
+        if record.levelno < self.level_for(record.module_name):
+            return False
+        # Captured here, on the logging thread, while the request context is current.
+        record.trace_id = _trace_id()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "module": getattr(record, "module_name", record.module),
+            "trace_id": getattr(record, "trace_id", None),
+            "message": truncate(record.getMessage()),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TruncatingFormatter(logging.Formatter):
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message)
+        return super().formatMessage(record)
+
+
+def truncate(message: str, limit: int | None = None) -> str:
+    limit = LOG_MAX_MESSAGE_CHARS if limit is None else limit
+    if limit <= 0 or len(message) <= limit:
+        return message
+    return f"{message[:limit]}... [truncated {len(message) - limit} chars]"
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread without formatting them: %-style
+    arguments are rendered there, off the event loop. When the queue is full
+    the record is dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+level_filter = ModuleLevelFilter(logging.getLevelName(LOG_LEVEL))
+_lock = threading.Lock()
+
+
+def _parse_overrides(spec: str) -> dict[str, int]:
+    # AFRELAY_LOG_LEVELS="service.soap_client=INFO,service.time=WARNING"
+    overrides = {}
+    for item in spec.split(","):
+        module, _, level = item.partition("=")
+        if module.strip() and level.strip():
+            overrides[module.strip()] = _level_number(level)
+    return overrides
+
+
+def _level_number(level: str) -> int:
+    number = logging.getLevelName(level.strip().upper())
+    if not isinstance(number, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return number
+
+
+def get_log_levels() -> dict[str, Any]:
+    return {
+        "level": logging.getLevelName(level_filter.base_level),
+        "modules": {module: logging.getLevelName(level) for module, level in sorted(level_filter.overrides.items())},
+        "dropped_records": queue_handler.dropped if queue_handler is not None else 0,
+    }
+
+
+def set_log_level(level: str, module: str | None = None) -> dict[str, Any]:
+    """Sets the base level, or a module's override; module with level "NOTSET" clears it."""
+    with _lock:
+        if module is None:
+            level_filter.base_level = _level_number(level)
+        elif level.strip().upper() == "NOTSET":
+            level_filter.overrides.pop(module, None)
+        else:
+            level_filter.overrides[module] = _level_number(level)
+        logger.setLevel(level_filter.threshold())
+    return get_log_levels()
+
+
+queue_handler: DroppingQueueHandler | None = None
+listener: QueueListener | None = None
+
 if not logger.hasHandlers():
-    project_root = Path(__file__).resolve().parents[2]
-    log_dir = Path(os.getenv("AFRELAY_LOG_DIR", str(project_root / "logs")))
+    log_dir = Path(os.getenv("AFRELAY_LOG_DIR", str(PROJECT_ROOT / "logs")))
     log_dir.mkdir(parents=True, exist_ok=True)
 
     log_file_name = os.getenv("AFRELAY_LOG_FILE", "afrelay.log")
@@ -24,8 +187,21 @@ if not logger.hasHandlers():
         backupCount=backup_count,
         encoding="utf-8",
     )
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(TruncatingFormatter("%(asctime)s - %(levelname)s - %(trace_id)s - %(message)s"))
+
+    level_filter.overrides.update(_parse_overrides(os.getenv("AFRELAY_LOG_LEVELS", "")))
+    logger.setLevel(level_filter.threshold())
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    queue_handler.addFilter(level_filter)
+    logger.addHandler(queue_handler)
+
+    # The listener thread formats and writes; rotation happens there too.
+    listener = QueueListener(queue_handler.queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
 
-__all__ = ["logger"]
+__all__ = ["logger", "get_log_levels", "set_log_level"]
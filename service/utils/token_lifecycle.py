@@ -0,0 +1,146 @@
+import os
+import random
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+
+from lxml import etree
+
+from service.observability.collector import emit_domain_event
+from service.time.clock import clock
+from service.utils.logger import logger
+from service.xml_management.xml_builder import expiration_utc, xml_exists
+
+# Renewals are spread over +/- this many seconds around expiration - margin, so
+# replicas sharing a certificate do not all call WSAA at the same moment.
+TOKEN_RENEW_JITTER_SECONDS = float(os.getenv("AFIP_TOKEN_RENEW_JITTER_SECONDS", "300"))
+TOKEN_RETRY_BASE_SECONDS = float(os.getenv("AFIP_TOKEN_RETRY_BASE_SECONDS", "30"))
+TOKEN_RETRY_MAX_SECONDS = float(os.getenv("AFIP_TOKEN_RETRY_MAX_SECONDS", "600"))
+
+
+class TokenLifecycle:
+    """
+    Keeps one access ticket renewed with a single one-shot job at
+    expirationTime - margin +/- jitter. The expiration is kept in memory and
+    only read from disk at start, after a renewal and when the job fires.
+    Failed renewals are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        xml_name: str,
+        renew: Callable[[], Awaitable[dict]],
+        margin_seconds: float,
+        jitter_seconds: float = TOKEN_RENEW_JITTER_SECONDS,
+        retry_base_seconds: float = TOKEN_RETRY_BASE_SECONDS,
+        retry_max_seconds: float = TOKEN_RETRY_MAX_SECONDS,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.service = service
+        self.xml_name = xml_name
+        self.renew = renew
+        self.margin_seconds = margin_seconds
+        # Never jitter a renewal past the expiration itself.
+        self.jitter_seconds = min(jitter_seconds, margin_seconds / 2)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.rng = rng
+        self.expires_at: datetime | None = None
+        self.renew_at: datetime | None = None
+        self.failures = 0
+        self.scheduler = None
+
+    @property
+    def job_id(self) -> str:
+        return f"{self.service}_token_renewal"
+
+    def load_expiration(self) -> datetime | None:
+        if not xml_exists(self.xml_name):
+            return None
+        try:
+            return expiration_utc(self.xml_name)
+        except (OSError, etree.XMLSyntaxError, AttributeError, TypeError, ValueError) as e:
+            logger.warning("Could not read the expiration of %s: %s", self.xml_name, e)
+            return None
+
+    def next_renewal(self, now: datetime) -> datetime:
+        if self.expires_at is None:
+            return now
+        jitter = (self.rng() * 2 - 1) * self.jitter_seconds
+        return max(now, self.expires_at - timedelta(seconds=self.margin_seconds - jitter))
+
+    def retry_delay(self) -> float:
+        return min(self.retry_base_seconds * 2 ** (self.failures - 1), self.retry_max_seconds)
+
+    def start(self, scheduler) -> None:
+        self.scheduler = scheduler
+        self.expires_at = self.load_expiration()
+        self._schedule(self.next_renewal(clock.now()), status="scheduled")
+
+    async def run(self) -> None:
+        now = clock.now()
+        on_disk = self.load_expiration()
+        if on_disk is not None and (self.expires_at is None or on_disk > self.expires_at):
+            # Renewed outside this job (e.g. POST to the token endpoint): follow the new ticket.
+            self.expires_at = on_disk
+            self.failures = 0
+            renew_at = self.next_renewal(now)
+            if renew_at > now:
+                self._schedule(renew_at, status="scheduled")
+                return
+
+        logger.info("Renewing %s access ticket (attempt %s)", self.service, self.failures + 1)
+        try:
+            result = await self.renew()
+            renewed = result.get("status") == "success"
+        except Exception as e:
+            logger.error("%s token renewal raised: %s", self.service, e)
+            renewed = False
+
+        expires_at = self.load_expiration() if renewed else None
+        if expires_at is not None:
+            self.expires_at = expires_at
+            self.failures = 0
+            self._schedule(self.next_renewal(clock.now()), status="renewed")
+            return
+
+        self.failures += 1
+        delay = self.retry_delay()
+        logger.warning("%s token renewal failed; retrying in %.0fs", self.service, delay)
+        self._schedule(clock.now() + timedelta(seconds=delay), status="retry_scheduled")
+
+    def _schedule(self, run_at: datetime, status: str) -> None:
+        self.renew_at = run_at
+        if self.scheduler is not None:
+            self.scheduler.add_job(
+                self.run,
+                trigger="date",
+                run_date=run_at,
+                id=self.job_id,
+                replace_existing=True,
+                # A renewal delayed by a busy loop or a suspended host must still run.
+                misfire_grace_time=None,
+            )
+
+        seconds_to_expiry = None
+        if self.expires_at is not None:
+            seconds_to_expiry = round((self.expires_at - clock.now()).total_seconds(), 1)
+        logger.info(
+            "%s token renewal at %s (expires %s, %s failed attempts)",
+            self.service,
+            run_at.isoformat(),
+            self.expires_at.isoformat() if self.expires_at else None,
+            self.failures,
+        )
+        emit_domain_event(
+            event_type="token_lifecycle",
+            service=self.service,
+            status=status,
+            entity_key=self.xml_name,
+            payload={
+                "renew_at": run_at.isoformat(),
+                "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+                "seconds_to_expiry": seconds_to_expiry,
+                "failures": self.failures,
+            },
+        )
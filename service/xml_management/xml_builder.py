@@ -1,11 +1,19 @@
+import contextlib
 import os
+import shutil
+import tempfile
 from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, TypeVar
 
 from lxml import etree
 
 from config import paths
+from service.observability.tracing import traced
 from service.utils.logger import logger
 
+T = TypeVar("T")
+
 
 def build_login_ticket_request(time_provider, service_name="wsfe") -> "etree._Element":
 
@@ -41,94 +49,101 @@ def parse_and_save_loginticketresponse(login_ticket_response: str, xml_saver, xm
 
     xml_saver(root, xml_name)
 
-def extract_token_and_sign_from_xml() -> tuple[str, str]:
+def file_generation(path: Path) -> tuple[int, int, int]:
+    """
+    Identity of the file's current contents. save_xml renames a new file into
+    place, so every save changes it, also for readers in other processes.
+    """
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
 
-    path = paths.get_afip_paths().login_response
-    tree = etree.parse(path)
-    root = tree.getroot()
 
-    token_label = root.find(".//token")
-    sign_label = root.find(".//sign")
+_generation_cache: dict[tuple[Path, Callable], tuple[tuple[int, int, int], Any]] = {}
 
-    token = token_label.text
-    sign = sign_label.text
 
-    return token, sign
+def read_cached(path: Path, parse: Callable[[Path], T]) -> T:
+    """parse(path), parsed again only when the file has a new generation."""
+    generation = file_generation(path)
+    cached = _generation_cache.get((path, parse))
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    value = parse(path)
+    _generation_cache[(path, parse)] = (generation, value)
+    return value
 
-def extract_wspci_token_and_sign_from_xml() -> tuple[str, str]:
 
-    path = paths.get_afip_paths().wspci_login_response
-    tree = etree.parse(path)
-    root = tree.getroot()
+def _parse_token_and_sign(path: Path) -> tuple[str, str]:
+    root = etree.parse(path).getroot()
+    return root.find(".//token").text, root.find(".//sign").text
 
-    token_label = root.find(".//token")
-    sign_label = root.find(".//sign")
 
-    token = token_label.text
-    sign = sign_label.text
+def _parse_expiration(path: Path) -> datetime:
+    expiration_time_str = etree.parse(path).getroot().find(".//expirationTime").text
+    return datetime.fromisoformat(expiration_time_str).astimezone(timezone.utc)
+
 
-    return token, sign
+@traced("auth_load")
+def extract_token_and_sign_from_xml() -> tuple[str, str]:
+    return read_cached(paths.get_afip_paths().login_response, _parse_token_and_sign)
+
+@traced("auth_load")
+def extract_wspci_token_and_sign_from_xml() -> tuple[str, str]:
+    return read_cached(paths.get_afip_paths().wspci_login_response, _parse_token_and_sign)
 
 def is_expired(xml_name: str, time_provider) -> bool:
 
-    logger.debug(f"Running is_expired() function for {xml_name}")
+    logger.debug("Running is_expired() function for %s", xml_name)
 
     _, actual_hour, _ = time_provider()
 
     actual_dt = datetime.strptime(str(actual_hour), "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
 
-    path = paths.get_afip_paths().base_xml / xml_name
-    tree = etree.parse(path)
-    root = tree.getroot()
-    expiration_time_label = root.find(".//expirationTime")
-    expiration_time_str = expiration_time_label.text
+    return actual_dt >= expiration_utc(xml_name)
 
-    expiration_dt_raw = datetime.fromisoformat(expiration_time_str)
-    expiration_dt = expiration_dt_raw.astimezone(timezone.utc)
-
-    if actual_dt >= expiration_dt:
-        return True
-    else:
-        return False
-
-
-def _now_utc_from_provider(time_provider) -> datetime:
-    _, actual_hour, _ = time_provider()
-    if actual_hour:
-        try:
-            return datetime.strptime(str(actual_hour), "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
-        except Exception:
-            logger.warning("Invalid NTP timestamp format from provider. Falling back to system UTC.")
-    return datetime.now(timezone.utc)
 
-
-def _expiration_utc(xml_name: str) -> datetime:
-    path = paths.get_afip_paths().base_xml / xml_name
-    tree = etree.parse(path)
-    root = tree.getroot()
-    expiration_time_label = root.find(".//expirationTime")
-    expiration_time_str = expiration_time_label.text
-    return datetime.fromisoformat(expiration_time_str).astimezone(timezone.utc)
+def expiration_utc(xml_name: str) -> datetime:
+    return read_cached(paths.get_afip_paths().base_xml / xml_name, _parse_expiration)
 
 
-def is_expiring_soon(xml_name: str, time_provider, renew_before_minutes: int = 15) -> bool:
-    logger.debug(
-        "Running is_expiring_soon() for %s with renew_before_minutes=%s",
-        xml_name,
-        renew_before_minutes,
-    )
-    now_utc = _now_utc_from_provider(time_provider)
-    expiration_utc = _expiration_utc(xml_name)
-    remaining_seconds = (expiration_utc - now_utc).total_seconds()
-    return remaining_seconds <= (renew_before_minutes * 60)
-
 def save_xml(root, xml_name: str) -> None:
-    
+    """
+    Writes to a temporary file in the same directory, fsyncs it and renames
+    it over the target. Readers see the previous file or the complete new
+    one, never a partial write, and a crash leaves the previous file intact.
+    """
     path = paths.get_afip_paths().base_xml / xml_name
     os.makedirs(os.path.dirname(path), exist_ok=True)
     tree = etree.ElementTree(root)
-    tree.write(path, pretty_print=True, xml_declaration=True, encoding="UTF-8")
-    logger.info(f"{xml_name} successfully saved.")
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{xml_name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            tree.write(file, pretty_print=True, xml_declaration=True, encoding="UTF-8")
+            file.flush()
+            os.fsync(file.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+    _fsync_directory(path.parent)
+    logger.info("%s successfully saved (generation %s).", xml_name, file_generation(path))
+
+
+def _fsync_directory(directory: Path) -> None:
+    # Makes the rename itself durable; not supported on every platform.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
 def xml_exists(xml_name: str) -> bool:
     xml_path = paths.get_afip_paths().base_xml / xml_name
@@ -17,6 +17,9 @@ from zeep.transports import AsyncTransport
 
 from config.paths import AfipPaths
 from service.api.app import app
+from service.param_rules.tables import param_tables
+from service.persona_cache.cache import reset_persona_cache
+from service.soap_client import admission, resilience
 from service.soap_client.async_client import WSFEClientManager, WSPCIClientManager, wsaa_client
 from service.utils.jwt_validator import verify_token
 
@@ -56,6 +59,34 @@ def override_afip_paths(afip_paths, monkeypatch):
     monkeypatch.setattr("config.paths.get_afip_paths", lambda: afip_paths)
 
 
+# Fresh circuit breakers / retry budget / admission limiters per test, and no real backoff sleeps
+@pytest.fixture(autouse=True)
+def reset_afip_resilience(monkeypatch):
+    monkeypatch.setattr(resilience, "AFIP_BACKOFF_BASE_SECONDS", 0)
+    monkeypatch.setattr(resilience, "AFIP_BACKOFF_MAX_SECONDS", 0)
+    resilience.reset_resilience()
+    admission.reset_admission()
+    yield
+    resilience.reset_resilience()
+    admission.reset_admission()
+
+
+# Persona lookups are cached across requests; start every test cold
+@pytest.fixture(autouse=True)
+def reset_persona_lookup_cache():
+    reset_persona_cache()
+    yield
+    reset_persona_cache()
+
+
+# Parameter tables feed the local invoice rules; tests that need them seed their own
+@pytest.fixture(autouse=True)
+def reset_wsfe_param_tables():
+    param_tables.clear()
+    yield
+    param_tables.clear()
+
+
 # Create FastAPI testing client
 @pytest.fixture
 def client() -> httpxAsyncClient:
@@ -1,5 +1,11 @@
+import json
+import re
+
 import pytest
 from httpx import AsyncClient
+from werkzeug import Request, Response
+
+from service.soap_client import resilience
 
 SOAP_RESPONSE = """<?xml version='1.0' encoding='UTF-8'?>
 <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
@@ -57,6 +63,39 @@ async def test_consult_invoice_success(client: AsyncClient, wsfe_httpserver_fixe
     assert data["status"] == "success"
 
 
+@pytest.mark.asyncio
+async def test_consult_invoice_is_timed_in_metrics(client: AsyncClient, wsfe_httpserver_fixed_port, wsfe_manager, override_auth):
+
+    wsfe_httpserver_fixed_port.expect_request("/soap", method="POST").respond_with_data(
+        SOAP_RESPONSE, content_type="text/xml"
+    )
+
+    labels = 'service="wsfe",method="FECompConsultar",outcome="success"'
+    before = await client.get("/metrics")
+    count_line = f"afrelay_afip_request_duration_seconds_count{{{labels}}}"
+    before_count = int(next(line for line in before.text.splitlines() if line.startswith(count_line)).split()[-1])
+
+    resp = await client.post("/wsfe/invoices/query", json={"Cuit": 30740253022, "PtoVta": 1, "CbteTipo": 6, "CbteNro": 100})
+    assert resp.status_code == 200
+
+    after = await client.get("/metrics")
+    assert after.status_code == 200
+    assert after.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after_count = int(next(line for line in after.text.splitlines() if line.startswith(count_line)).split()[-1])
+    assert after_count == before_count + 1
+    assert 'afrelay_caea_outbox_jobs{status="pending"}' in after.text
+
+    stages = [part.split(";")[0] for part in resp.headers["Server-Timing"].split(", ")]
+    for stage in ("validation", "auth_load", "soap_build", "network", "soap_parse", "serialize_object", "serialize"):
+        assert stage in stages
+    assert stages[-1] == "total"
+
+    trace = (await client.get(f"/ui/traces/{resp.headers['X-Trace-Id']}")).json()
+    assert "network" in [span["name"] for span in trace["logs"][0]["spans"]]
+    soap_event = next(event for event in trace["events"] if event["event_type"] == "soap_call")
+    assert soap_event["payload"]["duration_ms"] >= 0
+
+
 # Generic error only for test the API behavior in error cases. Exceptions are already tested in unit tests.
 @pytest.mark.asyncio
 async def test_consult_invoice_error(client: AsyncClient, wsfe_httpserver_fixed_port, wsfe_manager, override_auth):
@@ -82,4 +121,77 @@ async def test_consult_invoice_error(client: AsyncClient, wsfe_httpserver_fixed_
     assert resp.status_code == 200 # 200 its for FastAPI endpoint
     data = resp.json()
     assert data["status"] == "error"
-    assert data["error"]["error_type"] == "HTTP Error"
\ No newline at end of file
+    assert data["error"]["error_type"] == "HTTP Error"
+
+    # The handler publishes the CUIT and AFIP error type; nothing is re-parsed.
+    trace = (await client.get(f"/ui/traces/{resp.headers['X-Trace-Id']}")).json()
+    log = trace["logs"][0]
+    assert log["ok"] is False
+    assert log["error_type"] == "HTTP Error"
+    assert log["cuit"] == 30740253022
+
+
+def _batch_handler(failing: set[int]):
+    def handler(request: Request) -> Response:
+        cbte_nro = int(re.search(r"CbteNro>(\d+)<", request.get_data(as_text=True)).group(1))
+        if cbte_nro in failing:
+            return Response("Service Unavailable", status=503, content_type="text/plain")
+        body = SOAP_RESPONSE.replace("<CbteDesde>100</CbteDesde>", f"<CbteDesde>{cbte_nro}</CbteDesde>")
+        return Response(body, content_type="text/xml")
+
+    return handler
+
+
+def _ndjson_lines(resp) -> list[dict]:
+    return [json.loads(line) for line in resp.text.splitlines() if line]
+
+
+@pytest.mark.asyncio
+async def test_consult_invoice_batch_streams_and_resumes(client: AsyncClient, wsfe_httpserver_fixed_port, wsfe_manager, override_auth, monkeypatch):
+
+    monkeypatch.setattr(resilience, "AFIP_MAX_ATTEMPTS", 1)
+    wsfe_httpserver_fixed_port.expect_request("/soap", method="POST").respond_with_handler(_batch_handler({102}))
+
+    payload = {"Cuit": 30740253022, "PtoVta": 1, "CbteTipo": 6, "CbteDesde": 100, "CbteHasta": 104}
+    resp = await client.post("/wsfe/invoices/query/batch", json=payload)
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = _ndjson_lines(resp)
+    items, summary = lines[:-1], lines[-1]
+    assert sorted(item["CbteNro"] for item in items) == [100, 101, 102, 103, 104]
+    failed = next(item for item in items if item["CbteNro"] == 102)
+    assert failed["error"]["error_type"] == "HTTP Error"
+    assert summary["summary"] == {
+        "status": "partial", "requested": 5, "found": 4, "afip_errors": 0, "failed": 1, "unprocessed": 0,
+    }
+    assert summary["resume"]["CbteNros"] == [102]
+
+    # The resume body retries only what failed.
+    wsfe_httpserver_fixed_port.clear()
+    wsfe_httpserver_fixed_port.expect_request("/soap", method="POST").respond_with_handler(_batch_handler(set()))
+    resp = await client.post("/wsfe/invoices/query/batch", json=summary["resume"])
+
+    lines = _ndjson_lines(resp)
+    assert [line["CbteNro"] for line in lines[:-1]] == [102]
+    assert lines[-1]["summary"]["status"] == "complete"
+    assert lines[-1]["resume"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "selection",
+    [
+        {"CbteDesde": 1, "CbteHasta": 2, "CbteNros": [1]},
+        {"CbteDesde": 5, "CbteHasta": 1},
+        {"CbteDesde": 1},
+        {},
+        {"CbteDesde": 1, "CbteHasta": 20000},
+    ],
+)
+async def test_consult_invoice_batch_rejects_invalid_selection(client: AsyncClient, override_auth, selection):
+
+    payload = {"Cuit": 30740253022, "PtoVta": 1, "CbteTipo": 6, **selection}
+    resp = await client.post("/wsfe/invoices/query/batch", json=payload)
+
+    assert resp.status_code == 422
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from httpx import AsyncClient
 
@@ -71,3 +73,139 @@ async def test_get_persona_error(client: AsyncClient, wspci_httpserver_fixed_por
     data = resp.json()
     assert data["status"] == "error"
     assert data["error"]["error_type"] == "HTTP Error"
+
+
+NOT_FOUND_FAULT = """
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+    <soap:Body>
+        <soap:Fault>
+            <faultcode>soap:Server</faultcode>
+            <faultstring>No existe persona con ese Id</faultstring>
+        </soap:Fault>
+    </soap:Body>
+</soap:Envelope>
+"""
+
+PERSONA_LIST_RESPONSE = """
+<soap:Envelope
+    xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"
+    xmlns:ns2="http://a5.soap.ws.server.puc.sr/">
+    <soap:Body>
+        <ns2:getPersonaListResponse>
+            <personaListReturn>
+                <metadata>
+                    <fechaHora>2026-01-07T12:00:00.000-03:00</fechaHora>
+                    <servidor>srv1</servidor>
+                </metadata>
+                <persona>
+                    <datosGenerales>
+                        <apellido>GOMEZ</apellido>
+                        <idPersona>20222222223</idPersona>
+                        <tipoPersona>FISICA</tipoPersona>
+                    </datosGenerales>
+                </persona>
+                <persona>
+                    <errorConstancia>
+                        <error>No existe persona con ese Id</error>
+                        <idPersona>20333333334</idPersona>
+                    </errorConstancia>
+                </persona>
+            </personaListReturn>
+        </ns2:getPersonaListResponse>
+    </soap:Body>
+</soap:Envelope>
+"""
+
+
+def _afip_calls(server) -> int:
+    return sum(1 for request, _ in server.log if request.path == "/soap")
+
+
+@pytest.mark.asyncio
+async def test_get_persona_is_cached(client: AsyncClient, wspci_httpserver_fixed_port, wspci_manager, override_auth):
+
+    wspci_httpserver_fixed_port.expect_request("/soap", method="POST").respond_with_data(
+        SOAP_RESPONSE, content_type="text/xml"
+    )
+    payload = {"cuitRepresentada": 30740253022, "idPersona": 20111111112}
+
+    first = await client.post("/wspci/persona", json=payload)
+    second = await client.post("/wspci/persona", json=payload)
+
+    assert first.json() == second.json()
+    assert second.json()["response"]["datosGenerales"]["apellido"] == "PEREZ"
+    assert _afip_calls(wspci_httpserver_fixed_port) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_persona_cache_is_not_shared_across_represented_cuits(client: AsyncClient, wspci_httpserver_fixed_port, wspci_manager, override_auth):
+
+    wspci_httpserver_fixed_port.expect_request("/soap", method="POST").respond_with_data(
+        SOAP_RESPONSE, content_type="text/xml"
+    )
+
+    await client.post("/wspci/persona", json={"cuitRepresentada": 30740253022, "idPersona": 20111111112})
+    await client.post("/wspci/persona", json={"cuitRepresentada": 30999999994, "idPersona": 20111111112})
+
+    # AFIP authorizes each represented CUIT separately, so the second one is asked again.
+    assert _afip_calls(wspci_httpserver_fixed_port) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_persona_caches_not_found(client: AsyncClient, wspci_httpserver_fixed_port, wspci_manager, override_auth):
+
+    wspci_httpserver_fixed_port.expect_request("/soap", method="POST").respond_with_data(
+        NOT_FOUND_FAULT, status=500, content_type="text/xml"
+    )
+    payload = {"cuitRepresentada": 30740253022, "idPersona": 20999999999}
+
+    for _ in range(2):
+        resp = await client.post("/wspci/persona", json=payload)
+        assert resp.json()["error"]["error_type"] == "SOAPFault"
+
+    assert _afip_calls(wspci_httpserver_fixed_port) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_get_persona_is_coalesced(client: AsyncClient, wspci_httpserver_fixed_port, wspci_manager, override_auth):
+
+    wspci_httpserver_fixed_port.expect_request("/soap", method="POST").respond_with_data(
+        SOAP_RESPONSE, content_type="text/xml"
+    )
+    payload = {"cuitRepresentada": 30740253022, "idPersona": 20111111112}
+
+    responses = await asyncio.gather(*(client.post("/wspci/persona", json=payload) for _ in range(5)))
+
+    assert all(resp.json()["status"] == "success" for resp in responses)
+    assert _afip_calls(wspci_httpserver_fixed_port) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_persona_list_uses_cache_and_bulk_call(client: AsyncClient, wspci_httpserver_fixed_port, wspci_manager, override_auth):
+
+    wspci_httpserver_fixed_port.expect_ordered_request("/soap", method="POST").respond_with_data(
+        SOAP_RESPONSE, content_type="text/xml"
+    )
+    wspci_httpserver_fixed_port.expect_ordered_request("/soap", method="POST").respond_with_data(
+        PERSONA_LIST_RESPONSE, content_type="text/xml"
+    )
+    await client.post("/wspci/persona", json={"cuitRepresentada": 30740253022, "idPersona": 20111111112})
+
+    payload = {"cuitRepresentada": 30740253022, "idPersonas": [20111111112, 20222222223, 20333333334, 20222222223]}
+    resp = await client.post("/wspci/personas", json=payload)
+
+    data = resp.json()
+    assert data["status"] == "success"
+    assert data["summary"] == {"requested": 3, "cached": 1, "found": 2, "not_found": 1, "errors": 0}
+    assert [item["idPersona"] for item in data["results"]] == [20111111112, 20222222223, 20333333334]
+    assert data["results"][1]["response"]["datosGenerales"]["apellido"] == "GOMEZ"
+    assert data["results"][2]["error"]["error_type"] == "SOAPFault"
+
+    list_request = wspci_httpserver_fixed_port.log[-1][0].get_data(as_text=True)
+    assert "getPersonaList" in list_request
+    assert "20111111112" not in list_request
+
+    # Both answers were cached individually, so the single endpoint does not call AFIP again.
+    resp = await client.post("/wspci/persona", json={"cuitRepresentada": 30740253022, "idPersona": 20222222223})
+    assert resp.json()["response"]["metadata"]["servidor"] == "srv1"
+    assert _afip_calls(wspci_httpserver_fixed_port) == 2
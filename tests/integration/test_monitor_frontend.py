@@ -1,3 +1,5 @@
+import re
+
 import pytest
 from httpx import AsyncClient
 
@@ -37,3 +39,45 @@ async def test_monitor_assets_served(client: AsyncClient):
     assert "renderPosList" in js_resp.text
     assert "AFRelay Logs" in logs_html.text
     assert "refreshLogs" in logs_js.text
+
+
+@pytest.mark.asyncio
+async def test_monitor_pages_reference_content_hashed_assets(client: AsyncClient):
+    index = await client.get("/monitor/")
+    version = re.search(r'src="/monitor/app\.js\?v=([0-9a-f]+)"', index.text).group(1)
+    assert re.search(r'href="/monitor/styles\.css\?v=[0-9a-f]+"', index.text)
+    assert index.headers["cache-control"] == "no-cache"
+
+    hashed = await client.get(f"/monitor/app.js?v={version}")
+    assert hashed.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    stale = await client.get("/monitor/app.js?v=old")
+    assert stale.headers["cache-control"] == "no-cache"
+
+
+@pytest.mark.asyncio
+async def test_monitor_assets_are_precompressed_and_revalidated(client: AsyncClient):
+    plain = await client.get("/monitor/app.js", headers={"Accept-Encoding": "identity"})
+    gzipped = await client.get("/monitor/app.js", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+    # httpx decodes the body transparently.
+    assert gzipped.text == plain.text
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+
+    not_modified = await client.get(
+        "/monitor/app.js",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]},
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == gzipped.headers["etag"]
+
+    # An ETag for a different encoding is a different representation.
+    mismatched = await client.get(
+        "/monitor/app.js",
+        headers={"Accept-Encoding": "identity", "If-None-Match": gzipped.headers["etag"]},
+    )
+    assert mismatched.status_code == 200
@@ -0,0 +1,32 @@
+import pytest
+from httpx import AsyncClient
+
+from service.controllers import readiness_health_controller as health
+
+
+@pytest.fixture
+def fake_checks(monkeypatch):
+    async def ok():
+        return "OK"
+
+    async def failing():
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(health, "HEALTH_CHECKS", {"ntp": ok, "wsfe_health": ok, "wspci_health": failing})
+    monkeypatch.setattr(health, "_health_cache", {})
+
+
+@pytest.mark.asyncio
+async def test_probe_fails_only_on_missing_or_stale_results(client: AsyncClient, fake_checks, monkeypatch):
+    resp = await client.get("/health/readiness")
+    assert resp.status_code == 503
+    assert resp.json()["status"] == "stale"
+
+    await health.refresh_health_checks()
+    resp = await client.get("/health/readiness")
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "degraded"
+
+    monkeypatch.setattr(health, "HEALTH_MAX_STALENESS_SECONDS", -1)
+    resp = await client.get("/health/readiness")
+    assert resp.status_code == 503
@@ -0,0 +1,28 @@
+import time
+
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+async def test_request_timeout_header_cancels_the_afip_call(client: AsyncClient, wsfe_httpserver_fixed_port, wsfe_manager, override_auth):
+
+    def slow_afip(request):
+        time.sleep(2)
+
+    wsfe_httpserver_fixed_port.expect_request("/soap", method="POST").respond_with_handler(slow_afip)
+
+    payload = {
+        "Cuit": 30740253022,
+        "PtoVta": 1,
+        "CbteTipo": 6
+    }
+
+    started = time.monotonic()
+    resp = await client.post("/wsfe/invoices/last-authorized", json=payload, headers={"X-Request-Timeout": "0.3"})
+
+    assert time.monotonic() - started < 1.5
+    assert resp.status_code == 504
+    data = resp.json()
+    assert data["status"] == "error"
+    assert data["error"]["error_type"] == "Request abandoned"
@@ -1,5 +1,9 @@
+import json
+
+import httpx
 import pytest
 from httpx import AsyncClient
+from werkzeug import Request, Response
 
 SOAP_RESPONSE = """
 <soap-env:Envelope
@@ -135,3 +139,194 @@ async def test_request_invoice_error(client: AsyncClient, wsfe_httpserver_fixed_
     data = resp.json()
     assert data["status"] == "error"
     assert data["error"]["error_type"] == "HTTP Error"
+
+
+LAST_AUTHORIZED_RESPONSE = """<?xml version="1.0" encoding="utf-8"?>
+<soap-env:Envelope
+    xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"
+    xmlns:ar="http://ar.gov.afip.dif.FEV1/">
+    <soap-env:Header/>
+    <soap-env:Body>
+        <ar:FECompUltimoAutorizadoResponse>
+            <ar:FECompUltimoAutorizadoResult>
+                <ar:PtoVta>1</ar:PtoVta>
+                <ar:CbteTipo>11</ar:CbteTipo>
+                <ar:CbteNro>{cbte_nro}</ar:CbteNro>
+            </ar:FECompUltimoAutorizadoResult>
+        </ar:FECompUltimoAutorizadoResponse>
+    </soap-env:Body>
+</soap-env:Envelope>
+"""
+
+FAILOVER_PAYLOAD = {
+    "Auth": {"Cuit": 30740253022},
+    "FeCAEReq": {
+        "FeCabReq": {"CantReg": 1, "PtoVta": 1, "CbteTipo": 11},
+        "FeDetReq": {
+            "FECAEDetRequest": [
+                {
+                    "Concepto": 1,
+                    "DocTipo": 99,
+                    "DocNro": 0,
+                    "CbteDesde": 2,
+                    "CbteHasta": 2,
+                    "CbteFch" : "20260125",
+                    "ImpTotal": 100.0,
+                    "ImpNeto": 100.0,
+                    "ImpTotConc": 0.0,
+                    "ImpOpEx": 0.0,
+                    "ImpTrib": 0.0,
+                    "ImpIVA": 0.0,
+                    "MonId": "PES",
+                    "MonCotiz": 1,
+                    "CondicionIVAReceptorId": 5,
+                }
+            ]
+        }
+    }
+}
+
+
+@pytest.fixture
+def active_caea_cycle(tmp_path, monkeypatch):
+    from pathlib import Path
+
+    from service.caea_resilience import db
+    from service.caea_resilience import repository as repo
+    from service.caea_resilience.bootstrap import \
+        resolve_current_and_next_cycles
+
+    monkeypatch.setattr(db, "DB_PATH", Path(tmp_path / "afrelay_state.db"))
+    monkeypatch.setenv("WSFE_CAEA_FAILOVER", "true")
+    db.init_db()
+    periodo, orden = resolve_current_and_next_cycles()[0]
+    cycle = repo.create_cycle(cuit=30740253022, periodo=periodo, orden=orden)
+    repo.update_cycle_from_afip(cycle["id"], {"ResultGet": {"CAEA": "61234567890123"}}, status="active")
+
+
+def _afip_answering(last_authorized_nro: int):
+    # FECAESolicitar fails with a 500; FECompUltimoAutorizado answers.
+    def handler(request: Request) -> Response:
+        if "FECompUltimoAutorizado" in request.get_data(as_text=True):
+            return Response(LAST_AUTHORIZED_RESPONSE.format(cbte_nro=last_authorized_nro), content_type="text/xml")
+        return Response("Internal Server Error", status=500, content_type="text/plain")
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_request_invoice_fails_over_to_caea(client: AsyncClient, wsfe_httpserver_fixed_port, wsfe_manager, override_auth, active_caea_cycle):
+
+    # AFIP's last authorized number (1) proves CbteDesde 2 was not authorized.
+    wsfe_httpserver_fixed_port.expect_request("/soap", method="POST").respond_with_handler(_afip_answering(1))
+
+    resp = await client.post("/wsfe/invoices", json=FAILOVER_PAYLOAD)
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["status"] == "contingency"
+    assert data["mode"] == "CAEA"
+    assert data["caea"] == "61234567890123"
+    assert data["cbte_nro"] == 1
+    assert data["cause"]["error"]["error_type"] == "HTTP Error"
+    assert data["job"]["job_type"] == "INFORM_CAEA_MOVEMENT"
+
+    informed = json.loads(data["job"]["payload_json"])["request"]["FeCAEARegInfReq"]["FeDetReq"]["FECAEADetRequest"][0]
+    assert informed["CAEA"] == "61234567890123"
+    assert informed["CbteDesde"] == informed["CbteHasta"] == 1
+
+
+@pytest.mark.asyncio
+async def test_request_invoice_5xx_possibly_authorized_does_not_fail_over(client: AsyncClient, wsfe_httpserver_fixed_port, wsfe_manager, override_auth, active_caea_cycle):
+
+    # CbteDesde 2 is already the last authorized number: AFIP processed the request.
+    wsfe_httpserver_fixed_port.expect_request("/soap", method="POST").respond_with_handler(_afip_answering(2))
+
+    resp = await client.post("/wsfe/invoices", json=FAILOVER_PAYLOAD)
+
+    data = resp.json()
+    assert data["status"] == "error"
+    assert data["error"]["error_type"] == "HTTP Error"
+
+
+@pytest.mark.asyncio
+async def test_request_invoice_read_timeout_does_not_fail_over(client: AsyncClient, wsfe_manager, override_auth, active_caea_cycle, monkeypatch):
+    from service.controllers import request_invoice_controller
+
+    async def read_timeout(*args):
+        raise httpx.ReadTimeout("timed out waiting for AFIP")
+
+    async def afip_still_unreachable(comp_info):
+        return {"status": "error", "error": {"method": "FECompUltimoAutorizado", "error_type": "Network error", "details": ""}}
+
+    monkeypatch.setattr(wsfe_manager.get_client().service, "FECAESolicitar", read_timeout)
+    monkeypatch.setattr(request_invoice_controller, "get_last_authorized_info", afip_still_unreachable)
+
+    resp = await client.post("/wsfe/invoices", json=FAILOVER_PAYLOAD)
+
+    data = resp.json()
+    assert data["status"] == "error"
+    assert data["error"]["error_type"] == "Network error"
+
+
+@pytest.mark.asyncio
+async def test_request_invoice_connect_error_fails_over_without_asking_afip(client: AsyncClient, wsfe_manager, override_auth, active_caea_cycle, monkeypatch):
+    from service.controllers import request_invoice_controller
+
+    async def refused(*args):
+        raise httpx.ConnectError("connection refused")
+
+    async def must_not_be_called(comp_info):
+        raise AssertionError("a refused connection never reached AFIP")
+
+    monkeypatch.setattr(wsfe_manager.get_client().service, "FECAESolicitar", refused)
+    monkeypatch.setattr(request_invoice_controller, "get_last_authorized_info", must_not_be_called)
+
+    resp = await client.post("/wsfe/invoices", json=FAILOVER_PAYLOAD)
+
+    assert resp.json()["status"] == "contingency"
+
+
+@pytest.mark.asyncio
+async def test_request_invoice_rejected_locally(client: AsyncClient, wsfe_httpserver_fixed_port, wsfe_manager, override_auth):
+    from service.param_rules.tables import param_tables
+
+    param_tables.update("tipos_doc", [{"Id": 80, "Desc": "CUIT", "FchDesde": "20080725", "FchHasta": "NULL"}])
+
+    payload = {
+        "Auth": {"Cuit": 30740253022},
+        "FeCAEReq": {
+            "FeCabReq": {"CantReg": 1, "PtoVta": 1, "CbteTipo": 11},
+            "FeDetReq": {
+                "FECAEDetRequest": [
+                    {
+                        "Concepto": 1,
+                        "DocTipo": 99,
+                        "DocNro": 0,
+                        "CbteDesde": 2,
+                        "CbteHasta": 2,
+                        "CbteFch" : "20260125",
+                        "ImpTotal": 100.0,
+                        "ImpNeto": 100.0,
+                        "ImpTotConc": 0.0,
+                        "ImpOpEx": 0.0,
+                        "ImpTrib": 0.0,
+                        "ImpIVA": 0.0,
+                        "MonId": "PES",
+                        "MonCotiz": 1,
+                        "CondicionIVAReceptorId": 5,
+                    }
+                ]
+            }
+        }
+    }
+
+    resp = await client.post("/wsfe/invoices", json=payload)
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["local_validation"] is True
+    assert data["response"]["FeCabResp"]["Resultado"] == "R"
+    detail = data["response"]["FeDetResp"]["FECAEDetResponse"][0]
+    assert detail["Observaciones"]["Obs"][0]["Code"] == 10015
+    # Never reached AFIP.
+    assert len(wsfe_httpserver_fixed_port.log) == 0
@@ -58,6 +58,14 @@ async def test_ui_metrics_and_logs_endpoints(client: AsyncClient, override_auth)
     assert logs_data["total"] >= 1
     assert any("/wsfe/invoices" in item["path"] for item in logs_data["items"])
 
+    trace_id = invoice_resp.headers["X-Trace-Id"]
+    trace_resp = await client.get(f"/ui/traces/{trace_id}")
+    assert trace_resp.status_code == 200
+    assert [item["path"] for item in trace_resp.json()["logs"]] == ["/wsfe/invoices"]
+    # Rejected before the handler: CUIT comes from the captured request body.
+    assert trace_resp.json()["logs"][0]["cuit"] == 30740253022
+    assert trace_resp.json()["logs"][0]["error_type"] == "HTTP_422"
+
     metrics_resp = await client.get("/ui/metrics/summary")
     assert metrics_resp.status_code == 200
     metrics_data = metrics_resp.json()
@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 from pathlib import Path
 
 import pytest
@@ -160,3 +163,52 @@ async def test_solicit_without_caea_is_not_marked_active(client: AsyncClient, ov
     outbox = await client.get("/wsfe/caea/queue/outbox?status=retrying&limit=20")
     assert outbox.status_code == 200
     assert any(item["idempotency_key"].endswith(":202602:2") for item in outbox.json()["items"])
+
+
+def _seed_invoices(count_by_periodo: dict[int, int]) -> None:
+    for periodo, count in count_by_periodo.items():
+        cycle = repo.create_cycle(cuit=30740253022, periodo=periodo, orden=1)
+        repo.update_cycle_from_afip(cycle["id"], {"ResultGet": {"CAEA": f"6123456789{periodo % 10000:04d}"}}, status="active")
+        for nro in range(1, count + 1):
+            repo.create_local_invoice(
+                cycle_id=cycle["id"], cuit=30740253022, pto_vta=periodo % 100, cbte_tipo=11, cbte_nro=nro, payload={"n": nro}
+            )
+
+
+@pytest.mark.asyncio
+async def test_export_caea_invoices_ndjson_pages_and_filters(client: AsyncClient, override_auth, isolated_state_db, monkeypatch):
+    monkeypatch.setattr(repo, "EXPORT_PAGE_SIZE", 3)
+    _seed_invoices({202602: 7, 202603: 2})
+
+    resp = await client.get("/wsfe/caea/export/invoices?periodo=202602")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [row["cbte_nro"] for row in rows] == list(range(1, 8))
+    assert {row["periodo"] for row in rows} == {202602}
+    assert json.loads(rows[0]["payload_json"]) == {"n": 1}
+
+    # Keyset resume: continue after the last id received.
+    resp = await client.get(f"/wsfe/caea/export/invoices?after_id={rows[4]['id']}&limit=3")
+    resumed = [json.loads(line) for line in resp.text.splitlines()]
+    assert [row["id"] for row in resumed] == [rows[5]["id"], rows[6]["id"], rows[6]["id"] + 1]
+
+    resp = await client.get("/wsfe/caea/export/invoices?created_to=2000-01-01")
+    assert resp.text == ""
+
+
+@pytest.mark.asyncio
+async def test_export_outbox_csv(client: AsyncClient, override_auth, isolated_state_db):
+    for orden in (1, 2):
+        await client.post("/wsfe/caea/queue/solicitar", json={"Cuit": 30740253022, "Periodo": 202602, "Orden": orden})
+    await client.post("/wsfe/caea/queue/solicitar", json={"Cuit": 20111111112, "Periodo": 202602, "Orden": 1})
+
+    resp = await client.get("/wsfe/caea/export/outbox?format=csv&cuit=30740253022&job_type=SOLICIT_CAEA")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert 'filename="afip_outbox.csv"' in resp.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert tuple(rows[0].keys()) == repo.OUTBOX_EXPORT_COLUMNS
+    assert [row["idempotency_key"] for row in rows] == ["solicit:30740253022:202602:1", "solicit:30740253022:202602:2"]
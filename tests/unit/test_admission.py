@@ -0,0 +1,163 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from service.soap_client import admission
+from service.soap_client.admission import (PRIORITY_BACKGROUND,
+                                           PRIORITY_CRITICAL,
+                                           PRIORITY_STANDARD,
+                                           AdmissionRejected, PriorityLimiter,
+                                           QueueFull, admit, priority_for)
+from service.soap_client.wsfe import consult_afip_wsfe
+
+
+def test_priority_classes():
+    assert priority_for("FECAESolicitar") == PRIORITY_CRITICAL
+    assert priority_for("loginCms") == PRIORITY_CRITICAL
+    assert priority_for("FECompConsultar") == PRIORITY_STANDARD
+    assert priority_for("FEParamGetTiposIva") == PRIORITY_BACKGROUND
+    assert priority_for("FEDummy") == PRIORITY_BACKGROUND
+
+
+@pytest.mark.asyncio
+async def test_limiter_wakes_waiters_by_priority():
+    limiter = PriorityLimiter(limit=1)
+    await limiter.acquire(PRIORITY_STANDARD, timeout=1)
+    order = []
+
+    async def waiter(name, priority):
+        await limiter.acquire(priority, timeout=1)
+        order.append(name)
+        limiter.release()
+
+    tasks = [
+        asyncio.create_task(waiter("params", PRIORITY_BACKGROUND)),
+        asyncio.create_task(waiter("query", PRIORITY_STANDARD)),
+        asyncio.create_task(waiter("invoice", PRIORITY_CRITICAL)),
+    ]
+    await asyncio.sleep(0)
+    assert limiter.queued == 3
+
+    limiter.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["invoice", "query", "params"]
+    assert limiter.in_flight == 0
+    assert limiter.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_background_calls_are_shed_first():
+    limiter = PriorityLimiter(limit=1, max_queue=2)
+    await limiter.acquire(PRIORITY_CRITICAL, timeout=1)
+    queued = asyncio.create_task(limiter.acquire(PRIORITY_STANDARD, timeout=1))
+    await asyncio.sleep(0)
+
+    with pytest.raises(QueueFull):
+        await limiter.acquire(PRIORITY_BACKGROUND, timeout=1)
+
+    limiter.release()
+    await queued
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_wait_timeout_frees_the_queue_slot():
+    limiter = PriorityLimiter(limit=1)
+    await limiter.acquire(PRIORITY_STANDARD, timeout=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await limiter.acquire(PRIORITY_STANDARD, timeout=0.01)
+
+    assert limiter.queued == 0
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_saturated_service_is_rejected_with_503(monkeypatch):
+    monkeypatch.setenv("AFIP_WSFE_MAX_CONCURRENCY", "1")
+
+    async with admit("wsfe", "FECompConsultar", max_wait=0.01):
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with admit("wsfe", "FECompConsultar", max_wait=0.01):
+                pass
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.reason == "overloaded"
+    assert admission.snapshot()["wsfe"] == {"in_flight": 0, "queued": 0}
+
+
+@pytest.mark.asyncio
+async def test_per_cuit_concurrency_is_rejected_with_429(monkeypatch):
+    monkeypatch.setattr(admission, "AFIP_CUIT_MAX_CONCURRENCY", 1)
+
+    async with admit("wsfe", "FECAESolicitar", cuit=20123456789, max_wait=0.01):
+        # Another CUIT is not affected.
+        async with admit("wsfe", "FECAESolicitar", cuit=30740253022, max_wait=0.01):
+            pass
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with admit("wsfe", "FECAESolicitar", cuit=20123456789, max_wait=0.01):
+                pass
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.reason == "cuit_busy"
+
+
+@pytest.mark.asyncio
+async def test_per_cuit_state_is_bounded_and_keeps_busy_cuits(monkeypatch):
+    monkeypatch.setattr(admission, "AFIP_CUIT_MAX_TRACKED", 3)
+    monkeypatch.setattr(admission, "AFIP_CUIT_MAX_CONCURRENCY", 1)
+
+    async with admit("wsfe", "FECAESolicitar", cuit=20123456789):
+        for cuit in range(30000000000, 30000000010):
+            async with admit("wsfe", "FECAESolicitar", cuit=cuit):
+                pass
+
+        assert len(admission._cuit_limiters) <= 3
+        # The busy CUIT kept its limiter, so its limit still applies.
+        assert 20123456789 in admission._cuit_limiters
+        with pytest.raises(AdmissionRejected):
+            async with admit("wsfe", "FECAESolicitar", cuit=20123456789, max_wait=0.01):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_rejects_when_wait_exceeds_budget(monkeypatch):
+    monkeypatch.setenv("AFIP_WSPCI_RATE_PER_SECOND", "1")
+
+    async with admit("wspci", "getPersona", max_wait=0.01):
+        pass
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with admit("wspci", "getPersona", max_wait=0.01):
+            pass
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after == pytest.approx(1.0, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_rejection_is_returned_as_http_error_with_retry_after(client: AsyncClient, override_auth, monkeypatch):
+    monkeypatch.setattr(admission, "AFIP_ADMISSION_MAX_WAIT_SECONDS", 0.01)
+    monkeypatch.setenv("AFIP_WSFE_MAX_CONCURRENCY", "1")
+    release = asyncio.Event()
+
+    async def slow_call():
+        await release.wait()
+        return {}
+
+    holder = asyncio.create_task(consult_afip_wsfe(slow_call, "FECAESolicitar"))
+    await asyncio.sleep(0)
+
+    resp = await client.post(
+        "/wsfe/invoices/last-authorized",
+        json={"Cuit": 30740253022, "PtoVta": 1, "CbteTipo": 6},
+    )
+    release.set()
+    await holder
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    assert resp.json()["error"]["error_type"] == "Service overloaded"
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from service.soap_client import resilience
+from service.soap_client.resilience import call_afip
+from service.utils.deadline import (ClientDisconnected, DeadlineExceeded,
+                                    RequestDeadline, parse_timeout,
+                                    reset_request_deadline,
+                                    run_within_deadline, set_request_deadline)
+
+
+@pytest.fixture
+def request_deadline():
+    deadline = RequestDeadline()
+    token = set_request_deadline(deadline)
+    yield deadline
+    reset_request_deadline(token)
+
+
+def test_parse_timeout_accepts_relative_and_absolute_values():
+    assert parse_timeout(None, "2.5") == 2.5
+    assert parse_timeout(str(time.time() + 10), None) == pytest.approx(10, abs=0.5)
+
+    iso = (datetime.now(timezone.utc) + timedelta(seconds=30)).isoformat().replace("+00:00", "Z")
+    assert parse_timeout(iso, None) == pytest.approx(30, abs=0.5)
+
+    # The earlier of both wins; garbage is ignored.
+    assert parse_timeout(str(time.time() + 10), "3") == 3
+    assert parse_timeout("tomorrow", "soon") is None
+
+
+@pytest.mark.asyncio
+async def test_without_deadline_the_call_just_runs():
+    async def call():
+        return "ok"
+
+    assert await run_within_deadline(call) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_when_the_deadline_passes(request_deadline):
+    request_deadline.expires_at = time.monotonic() + 0.05
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        await run_within_deadline(slow)
+
+    assert time.monotonic() - started < 1
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_when_the_client_disconnects(request_deadline):
+    async def slow():
+        await asyncio.sleep(5)
+
+    asyncio.get_running_loop().call_later(0.05, request_deadline.disconnected.set)
+
+    with pytest.raises(ClientDisconnected):
+        await run_within_deadline(slow)
+
+
+@pytest.mark.asyncio
+async def test_no_retry_when_the_deadline_is_too_close(request_deadline, monkeypatch):
+    monkeypatch.setattr(resilience, "AFIP_MIN_ATTEMPT_SECONDS", 1)
+    request_deadline.expires_at = time.monotonic() + 0.5
+    calls = []
+
+    async def refused():
+        calls.append(1)
+        raise httpx.ConnectError("refused")
+
+    with pytest.raises(httpx.ConnectError):
+        await call_afip("wsfe", "FECompConsultar", refused)
+
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_deadline_skips_afip_entirely(request_deadline):
+    request_deadline.expires_at = time.monotonic() - 1
+    calls = []
+
+    async def call():
+        calls.append(1)
+
+    with pytest.raises(DeadlineExceeded):
+        await call_afip("wsfe", "FECompConsultar", call)
+
+    assert calls == []
@@ -1,8 +1,14 @@
+import copy
+
 import pytest
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
+from service.api.models.fecae_batch import (FECAESolicitarPayload,
+                                            finalize_fecae_payload)
 from service.api.models.fecae_solicitar import RootModel
 
+FECAE_PAYLOAD_ADAPTER = TypeAdapter(FECAESolicitarPayload)
+
 
 def _base_payload():
     return {
@@ -98,3 +104,80 @@ def test_fecae_valid_service_case_for_concept_2():
 
     model = RootModel.model_validate(payload)
     assert model.FeCAEReq.FeDetReq.FECAEDetRequest[0].Concepto == 2
+
+
+def _batch_payload(rows: int = 3):
+    payload = _base_payload()
+    template = payload["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"][0]
+    details = []
+    for i in range(rows):
+        row = copy.deepcopy(template)
+        row["CbteDesde"] = row["CbteHasta"] = 10 + i
+        details.append(row)
+    payload["FeCAEReq"]["FeCabReq"]["CantReg"] = rows
+    payload["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"] = details
+    return payload
+
+
+def _both_paths(payload):
+    reference = RootModel.model_validate(copy.deepcopy(payload)).model_dump(by_alias=True, exclude_none=True)
+    batch = finalize_fecae_payload(FECAE_PAYLOAD_ADAPTER.validate_python(copy.deepcopy(payload)))
+    return reference, batch
+
+
+def test_batch_path_builds_the_same_afip_payload_as_the_models():
+    payload = _batch_payload()
+    first, second, third = payload["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"]
+    first.update(Concepto=2, FchServDesde="20260101", FchServHasta="20260131", FchVtoPago="20260210")
+    first["Iva"] = {"AlicIva": [{"Id": 5, "BaseImp": 100, "Importe": 21}]}
+    first["ImpIVA"], first["ImpTotal"] = 21, 121
+    # Explicit nulls are dropped, as with exclude_none.
+    second.update(FchServDesde=None, CanMisMonExt=None, Opcionales=None)
+    second["Tributos"] = {"Tributo": [{"Id": 99, "Desc": None, "BaseImp": 0, "Alic": 0, "Importe": 0}]}
+    # Groups are also accepted by field name (populate_by_name).
+    third.update(MonId="DOL", MonCotiz="1050.5")
+    third["cbtes_asoc"] = {"CbteAsoc": [{"Tipo": 11, "PtoVta": 1, "Nro": 1, "CbteFch": "20260101"}]}
+
+    reference, batch = _both_paths(payload)
+
+    assert batch == reference
+    assert "FchServDesde" not in batch["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"][1]
+    assert batch["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"][2]["CbtesAsoc"]["CbteAsoc"][0]["Nro"] == 1
+
+
+@pytest.mark.parametrize(
+    "row_update",
+    [
+        {"CbteFch": "2026-01-25"},
+        {"FchVtoPago": "2026021"},
+        {"CbteDesde": 20, "CbteHasta": 19},
+        {"Concepto": 3},
+        {"ImpTotal": 100.02},
+        {"MonCotiz": 1.001},
+        {"MonCotiz": None},
+        {"MonId": "DOL", "MonCotiz": 0},
+    ],
+)
+def test_batch_path_reports_the_model_errors(row_update):
+    payload = _batch_payload()
+    payload["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"][1].update(row_update)
+
+    with pytest.raises(ValidationError) as reference:
+        RootModel.model_validate(copy.deepcopy(payload))
+    with pytest.raises(ValidationError) as batch:
+        finalize_fecae_payload(FECAE_PAYLOAD_ADAPTER.validate_python(payload))
+
+    def summary(error):
+        return [(e["type"], e["loc"], e["msg"]) for e in error.value.errors()]
+
+    assert summary(batch) == summary(reference)
+    assert batch.value.errors()[0]["loc"] == ("FeCAEReq", "FeDetReq", "FECAEDetRequest", 1)
+
+
+def test_batch_path_accepts_totals_within_a_cent():
+    payload = _batch_payload(1)
+    payload["FeCAEReq"]["FeDetReq"]["FECAEDetRequest"][0]["ImpTotal"] = 100.005
+
+    reference, batch = _both_paths(payload)
+
+    assert batch == reference
@@ -0,0 +1,107 @@
+import json
+import logging
+import queue
+
+import pytest
+from httpx import AsyncClient
+
+from service.api.app import app
+from service.observability.collector import (reset_current_trace_id,
+                                             set_current_trace_id)
+from service.utils import jwt_validator
+from service.utils import logger as logger_module
+from service.utils.logger import (DroppingQueueHandler, JsonFormatter,
+                                  ModuleLevelFilter, module_name)
+
+
+def _record(message="hello %s", args=("world",), level=logging.INFO, pathname=__file__):
+    return logging.LogRecord("service.utils.logger", level, pathname, 1, message, args, None)
+
+
+@pytest.fixture
+def restore_log_levels():
+    base, overrides = logger_module.level_filter.base_level, dict(logger_module.level_filter.overrides)
+    yield
+    logger_module.level_filter.base_level = base
+    logger_module.level_filter.overrides = overrides
+    logger_module.logger.setLevel(logger_module.level_filter.threshold())
+
+
+def test_module_name_is_the_dotted_path_inside_the_project():
+    assert module_name(logger_module.__file__) == "service.utils.logger"
+    assert module_name(__file__) == "tests.unit.test_logger"
+
+
+def test_most_specific_module_override_wins():
+    level_filter = ModuleLevelFilter(
+        logging.INFO,
+        {"service.soap_client": logging.WARNING, "service.soap_client.wsfe": logging.DEBUG},
+    )
+
+    assert level_filter.level_for("service.soap_client.wspci") == logging.WARNING
+    assert level_filter.level_for("service.soap_client.wsfe") == logging.DEBUG
+    assert level_filter.level_for("service.api.wsfe") == logging.INFO
+    assert level_filter.threshold() == logging.DEBUG
+
+    assert not level_filter.filter(_record(level=logging.DEBUG))
+    assert level_filter.filter(_record(level=logging.INFO))
+
+
+def test_json_records_carry_trace_id_and_truncate_large_messages(monkeypatch):
+    monkeypatch.setattr(logger_module, "LOG_MAX_MESSAGE_CHARS", 10)
+    record = _record(message="Response: %s", args=("x" * 50,))
+    token = set_current_trace_id("trace-123")
+    try:
+        assert ModuleLevelFilter(logging.DEBUG).filter(record)
+    finally:
+        reset_current_trace_id(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["trace_id"] == "trace-123"
+    assert entry["module"] == "tests.unit.test_logger"
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "Response: ... [truncated 50 chars]"
+
+
+def test_queue_handler_defers_formatting_and_drops_when_full():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    payload = {"big": "response"}
+    first = _record(message="Response: %s", args=(payload,))
+
+    handler.emit(first)
+    handler.emit(_record())
+
+    queued = handler.queue.get_nowait()
+    # Still unformatted: the writer thread renders it.
+    assert queued is first and queued.msg == "Response: %s"
+    assert queued.getMessage() == "Response: {'big': 'response'}"
+    assert handler.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_admin_log_levels_update_at_runtime(monkeypatch, restore_log_levels):
+    monkeypatch.setattr(jwt_validator, "ADMIN_SECRET", "admin-secret")
+    headers = {"Authorization": "Bearer admin-secret"}
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.put(
+            "/admin/log-levels", params={"level": "WARNING"}, headers=headers
+        )
+        assert response.json()["level"] == "WARNING"
+        assert not logger_module.logger.isEnabledFor(logging.INFO)
+
+        response = await client.put(
+            "/admin/log-levels", params={"level": "DEBUG", "module": "service.soap_client"}, headers=headers
+        )
+        assert response.json()["modules"] == {"service.soap_client": "DEBUG"}
+        assert logger_module.logger.isEnabledFor(logging.DEBUG)
+
+        response = await client.put(
+            "/admin/log-levels", params={"level": "NOTSET", "module": "service.soap_client"}, headers=headers
+        )
+        assert response.json()["modules"] == {}
+        assert (await client.get("/admin/log-levels", headers=headers)).json()["level"] == "WARNING"
+
+        response = await client.put("/admin/log-levels", params={"level": "NOTSET"}, headers=headers)
+        assert response.status_code == 400
+        response = await client.put("/admin/log-levels", params={"level": "VERBOSE"}, headers=headers)
+        assert response.status_code == 422
@@ -0,0 +1,58 @@
+import pytest
+
+from service.observability.metrics import (Counter, Gauge, Histogram,
+                                           MetricsRegistry)
+
+
+def test_registry_renders_exposition_format():
+    registry = MetricsRegistry()
+    calls = registry.register(Counter("calls", "Calls.", ("service",)))
+    depth = registry.register(Gauge("depth", "Depth.", ("status",)))
+    latency = registry.register(Histogram("latency_seconds", "Latency.", ("service",), buckets=(0.1, 1.0)))
+
+    calls.labels("wsfe").inc()
+    calls.labels("wsfe").inc()
+    registry.add_collector(lambda: depth.labels("pending").set(3))
+    for value in (0.05, 0.5, 2.0):
+        latency.labels("wsfe").observe(value)
+
+    text = registry.render()
+    assert "# TYPE calls counter" in text
+    assert 'calls_total{service="wsfe"} 2' in text
+    assert 'depth{status="pending"} 3' in text
+    assert 'latency_seconds_bucket{service="wsfe",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{service="wsfe",le="1"} 2' in text
+    assert 'latency_seconds_bucket{service="wsfe",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{service="wsfe"} 3' in text
+    assert 'latency_seconds_sum{service="wsfe"} 2.55' in text
+
+
+def test_labels_must_match_label_names():
+    calls = Counter("calls", "Calls.", ("service", "method"))
+    with pytest.raises(ValueError):
+        calls.labels("wsfe")
+
+
+
+@pytest.mark.asyncio
+async def test_traced_transport_counts_requests_in_flight(monkeypatch):
+    from zeep.transports import AsyncTransport
+
+    from service.observability.metrics import http_in_flight
+    from service.soap_client.async_client import TracedAsyncTransport
+
+    seen = []
+
+    async def fake_post(self, address, message, headers):
+        seen.append(http_in_flight.labels("wsfe").value)
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(AsyncTransport, "post", fake_post)
+    transport = TracedAsyncTransport(service="wsfe")
+    before = http_in_flight.labels("wsfe").value
+
+    with pytest.raises(OSError):
+        await transport.post("http://afip", b"", {})
+
+    assert seen == [before + 1]
+    assert http_in_flight.labels("wsfe").value == before
@@ -0,0 +1,17 @@
+from service.api.middleware import observability
+from service.api.middleware.observability import _BodyCapture
+
+
+def test_body_capture_keeps_chunks_until_cap(monkeypatch):
+    monkeypatch.setattr(observability, "CAPTURE_MAX_BYTES", 8)
+    chunk = b"abcd"
+    capture = _BodyCapture()
+    capture.add(chunk)
+    assert capture.body() is chunk
+
+    capture.add(b"efgh")
+    assert capture.body() == b"abcdefgh"
+
+    capture.add(b"i")
+    assert capture.body() is None
+    assert capture.chunks == []
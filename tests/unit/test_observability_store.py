@@ -0,0 +1,164 @@
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from service.observability.models import DomainEventEntry, RequestLogEntry
+from service.observability.sketch import LatencySketch
+from service.observability.store import ObservabilityStore
+
+
+def _log(
+    path="/wsfe/invoices",
+    ok=True,
+    duration_ms=10.0,
+    service="wsfe",
+    error_type=None,
+    timestamp=None,
+    trace_id="trace",
+    cuit=None,
+):
+    entry = RequestLogEntry(
+        trace_id=trace_id,
+        method="POST",
+        path=path,
+        status_code=200,
+        ok=ok,
+        duration_ms=duration_ms,
+        service=service,
+        error_type=error_type,
+        cuit=cuit,
+    )
+    if timestamp is not None:
+        entry.timestamp = timestamp
+    return entry
+
+
+def test_sketch_quantiles_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3, 1) for _ in range(5000)]
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    ordered = sorted(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[math.ceil(q * len(ordered)) - 1]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+
+
+def test_sketch_merge_and_empty():
+    left, right = LatencySketch(), LatencySketch()
+    assert left.quantile(0.95) == 0.0
+    left.add(10.0)
+    right.add(0.0)
+    right.add(1000.0)
+    left.merge(right)
+    assert left.count == 3
+    assert left.quantile(0.0) == 0.0
+    assert left.quantile(1.0) == pytest.approx(1000.0, rel=0.01)
+
+
+def test_summary_counts_come_from_minute_buckets():
+    store = ObservabilityStore(max_logs=10)
+    for _ in range(30):
+        store.add_request_log(_log())
+    store.add_request_log(_log(ok=False, error_type="SOAPFault"))
+    store.add_request_log(_log(path="/wsfe/params/types-iva", ok=False, error_type="SOAPFault"))
+    store.add_domain_event(DomainEventEntry(event_type="soap_call", service="wsfe", status="error", error_type="SOAPFault"))
+
+    summary = store.get_summary(window_minutes=5)
+    # Counters are not bounded by the log deque size.
+    assert summary["total_requests"] == 32
+    assert summary["error_count"] == 2
+    assert summary["services"]["wsfe"]["error_rate"] == round(2 / 32, 4)
+
+    errors = store.get_errors(window_minutes=5)
+    assert errors["items"][0] == {
+        "key": "SOAPFault",
+        "count": 2,
+        "last_seen": errors["items"][0]["last_seen"],
+        "sample": "/wsfe/params/types-iva",
+    }
+
+    ops = store.get_operations_summary(window_minutes=5)
+    assert ops["fecae"] == {"success": 30, "error": 1}
+    assert ops["wsfe_params"]["types_iva"] == {"success": 0, "error": 1}
+    assert ops["domain_events"]["error_signatures"] == {"soap_call:SOAPFault": 1}
+
+
+def test_window_excludes_old_buckets():
+    store = ObservabilityStore()
+    now = datetime.now(timezone.utc)
+    store.add_request_log(_log(timestamp=now - timedelta(minutes=30)))
+    store.add_request_log(_log(timestamp=now))
+    # Out-of-order insert lands in its own minute bucket.
+    store.add_request_log(_log(timestamp=now - timedelta(minutes=20)))
+
+    assert store.get_summary(window_minutes=10)["total_requests"] == 1
+    assert store.get_summary(window_minutes=25)["total_requests"] == 2
+    assert store.get_summary(window_minutes=60)["total_requests"] == 3
+
+
+def test_cursor_pages_walk_back_without_overlap():
+    store = ObservabilityStore()
+    for i in range(25):
+        store.add_request_log(_log(ok=i % 2 == 0))
+
+    seen = []
+    cursor = None
+    while True:
+        page = store.list_logs(page_size=4, status="ok", cursor=cursor)
+        assert page["total"] == 13
+        seen.extend(item["seq"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 13
+
+
+def test_combined_filters_and_path_substring():
+    store = ObservabilityStore()
+    store.add_request_log(_log(path="/wsfe/invoices", cuit=20111111112))
+    store.add_request_log(_log(path="/wsfe/invoices/query", cuit=20111111112, ok=False, error_type="AFIP error"))
+    store.add_request_log(_log(path="/wspci/persona", service="wspci", cuit=20111111112))
+    store.add_request_log(_log(path="/wsfe/invoices", cuit=30740253022))
+
+    by_cuit = store.list_logs(cuit=20111111112, endpoint="invoices")
+    assert by_cuit["total"] == 2
+    assert [item["path"] for item in by_cuit["items"]] == ["/wsfe/invoices/query", "/wsfe/invoices"]
+
+    errors = store.list_logs(service="wsfe", error_type="AFIP error")
+    assert errors["total"] == 1
+    assert store.list_logs(service="wsaa")["total"] == 0
+
+    second_page = store.list_logs(page=2, page_size=1, endpoint="/wsfe/invoices")
+    assert second_page["total"] == 3
+    assert second_page["items"][0]["path"] == "/wsfe/invoices/query"
+
+
+def test_evicted_entries_leave_the_indexes():
+    store = ObservabilityStore(max_logs=3)
+    store.add_request_log(_log(trace_id="old", service="wspci"))
+    for _ in range(3):
+        store.add_request_log(_log(trace_id="new"))
+
+    assert store.list_logs()["total"] == 3
+    assert store.list_logs(service="wspci")["total"] == 0
+    assert store.get_trace("old")["logs"] == []
+
+
+def test_trace_lookup_returns_logs_and_events():
+    store = ObservabilityStore()
+    store.add_request_log(_log(trace_id="abc"))
+    store.add_request_log(_log(trace_id="other"))
+    store.add_domain_event(DomainEventEntry(event_type="soap_call", service="wsfe", status="success", trace_id="abc"))
+
+    trace = store.get_trace("abc")
+    assert trace["trace_id"] == "abc"
+    assert len(trace["logs"]) == 1
+    assert [event["event_type"] for event in trace["events"]] == ["soap_call"]
+    assert store.list_domain_events(trace_id="abc")["total"] == 1
@@ -0,0 +1,180 @@
+from pathlib import Path
+
+import pytest
+
+from service.caea_resilience import db
+from service.param_rules import engine
+from service.param_rules.engine import (check_invoice, prevalidate_invoice,
+                                        rejection_response)
+from service.param_rules.tables import (ParamTableStore, compile_tables,
+                                        param_tables)
+
+ROWS = {
+    "tipos_cbte": [
+        {"Id": 1, "Desc": "Factura A", "FchDesde": "20100917", "FchHasta": "NULL"},
+        {"Id": 6, "Desc": "Factura B", "FchDesde": "20100917", "FchHasta": "NULL"},
+        {"Id": 11, "Desc": "Factura C", "FchDesde": "20110330", "FchHasta": "NULL"},
+        {"Id": 99, "Desc": "Retired A", "FchDesde": "20100917", "FchHasta": "20120101"},
+    ],
+    "tipos_doc": [{"Id": 80, "Desc": "CUIT"}, {"Id": 96, "Desc": "DNI"}, {"Id": 99, "Desc": "Doc. (Otro)"}],
+    "tipos_iva": [{"Id": "3", "Desc": "0%"}, {"Id": "4", "Desc": "10.5%"}, {"Id": "5", "Desc": "21%"}],
+    "monedas": [{"Id": "PES", "Desc": "Pesos Argentinos"}, {"Id": "DOL", "Desc": "Dólar Estadounidense"}],
+    "condiciones_iva_receptor": [
+        {"Id": 1, "Desc": "IVA Responsable Inscripto", "Cmp_Clase": "A/M/C"},
+        {"Id": 5, "Desc": "Consumidor Final", "Cmp_Clase": "B/C"},
+    ],
+}
+
+
+def _invoice(cbte_tipo=6, **detail_overrides):
+    detail = {
+        "Concepto": 1,
+        "DocTipo": 96,
+        "DocNro": 30111222,
+        "CbteDesde": 7,
+        "CbteHasta": 7,
+        "CbteFch": "20260125",
+        "ImpTotal": 121.0,
+        "ImpTotConc": 0.0,
+        "ImpNeto": 100.0,
+        "ImpOpEx": 0.0,
+        "ImpTrib": 0.0,
+        "ImpIVA": 21.0,
+        "MonId": "PES",
+        "MonCotiz": 1.0,
+        "CondicionIVAReceptorId": 5,
+        "Iva": {"AlicIva": [{"Id": 5, "BaseImp": 100.0, "Importe": 21.0}]},
+    }
+    detail.update(detail_overrides)
+    return {
+        "Auth": {"Cuit": 30740253022},
+        "FeCAEReq": {
+            "FeCabReq": {"CantReg": 1, "PtoVta": 3, "CbteTipo": cbte_tipo},
+            "FeDetReq": {"FECAEDetRequest": [detail]},
+        },
+    }
+
+
+def _rules(violations):
+    return [(violation.rule, violation.detail_index) for violation in violations]
+
+
+def test_compile_tables_reads_classes_rates_and_validity():
+    tables = compile_tables(ROWS)
+
+    assert tables.cbte_classes == {1: "A", 6: "B", 11: "C"}
+    assert tables.iva_rates == {3: 0.0, 4: 0.105, 5: 0.21}
+    assert tables.condiciones_iva_receptor[1] == frozenset({"A", "M", "C"})
+    assert compile_tables({}).doc_tipos is None
+
+
+def test_valid_invoice_passes():
+    assert check_invoice(_invoice(), compile_tables(ROWS)) == []
+
+
+@pytest.mark.parametrize(
+    "invoice, expected",
+    [
+        (_invoice(cbte_tipo=99), [("cbte_tipo", None)]),
+        (_invoice(DocTipo=86), [("doc_tipo", 0)]),
+        (_invoice(MonId="XYZ"), [("mon_id", 0)]),
+        (_invoice(CondicionIVAReceptorId=42), [("condicion_iva_receptor", 0)]),
+        # Consumidor Final is not valid on class A vouchers.
+        (_invoice(cbte_tipo=1), [("condicion_iva_receptor", 0)]),
+        (_invoice(Iva={"AlicIva": [{"Id": 7, "BaseImp": 100.0, "Importe": 21.0}]}), [("iva_id", 0)]),
+        (_invoice(Iva={"AlicIva": [{"Id": 4, "BaseImp": 100.0, "Importe": 21.0}]}), [("iva_rate", 0)]),
+        (_invoice(ImpIVA=20.0, ImpTotal=120.0), [("iva_total", 0)]),
+        (_invoice(ImpNeto=90.0, ImpTotConc=10.0), [("iva_base", 0)]),
+        (_invoice(Iva=None), [("iva_required", 0)]),
+    ],
+)
+def test_invalid_values_are_reported_with_their_rule(invoice, expected):
+    assert _rules(check_invoice(invoice, compile_tables(ROWS))) == expected
+
+
+def test_iva_rounded_per_line_item_is_not_a_rate_violation():
+    # 21% of 1234.56 is 259.2576; twenty rounded line items add up to 259.40.
+    invoice = _invoice(
+        ImpNeto=1234.56,
+        ImpIVA=259.40,
+        ImpTotal=1493.96,
+        Iva={"AlicIva": [{"Id": 5, "BaseImp": 1234.56, "Importe": 259.40}]},
+    )
+
+    assert check_invoice(invoice, compile_tables(ROWS)) == []
+
+
+def test_large_invoice_with_many_rounded_lines_is_not_a_rate_violation():
+    # 2000 lines of 0.99 at 21%: each line's 0.2079 is rounded to 0.21, 4.20 over BaseImp * rate in total.
+    invoice = _invoice(
+        ImpNeto=1980.0,
+        ImpIVA=420.0,
+        ImpTotal=2400.0,
+        Iva={"AlicIva": [{"Id": 5, "BaseImp": 1980.0, "Importe": 420.0}]},
+    )
+    assert check_invoice(invoice, compile_tables(ROWS)) == []
+
+    # A wrong rate on the same amounts is still caught.
+    wrong_rate = _invoice(
+        ImpNeto=1980.0,
+        ImpIVA=420.0,
+        ImpTotal=2400.0,
+        Iva={"AlicIva": [{"Id": 4, "BaseImp": 1980.0, "Importe": 420.0}]},
+    )
+    assert _rules(check_invoice(wrong_rate, compile_tables(ROWS))) == [("iva_rate", 0)]
+
+
+def test_rules_without_a_loaded_table_are_skipped():
+    invoice = _invoice(cbte_tipo=99, DocTipo=86, MonId="XYZ")
+
+    assert check_invoice(invoice, compile_tables({"monedas": ROWS["monedas"]})) != []
+    assert _rules(check_invoice(invoice, compile_tables({}))) == []
+
+
+def test_rejection_response_matches_afip_result_shape():
+    invoice = _invoice(cbte_tipo=99, DocTipo=86)
+    violations = check_invoice(invoice, compile_tables(ROWS))
+
+    result = rejection_response(invoice, violations)
+
+    assert result["status"] == "success" and result["local_validation"] is True
+    response = result["response"]
+    assert response["FeCabResp"]["Resultado"] == "R"
+    assert response["Errors"]["Err"] == [{"Code": 10007, "Msg": "CbteTipo 99 is not a valid voucher type"}]
+    detail = response["FeDetResp"]["FECAEDetResponse"][0]
+    assert detail["Resultado"] == "R" and detail["CAE"] is None
+    assert [obs["Code"] for obs in detail["Observaciones"]["Obs"]] == [10015]
+
+
+def test_store_persists_tables_for_other_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", Path(tmp_path / "afrelay_state.db"))
+    db.init_db()
+    ParamTableStore().update("monedas", ROWS["monedas"])
+
+    restarted = ParamTableStore()
+    # Lookups never read SQLite themselves: load() runs at startup, off the event loop.
+    assert restarted.get().monedas is None
+    restarted.load()
+
+    assert restarted.loaded
+    assert restarted.get().monedas == frozenset({"PES", "DOL"})
+    assert restarted.status()["monedas"]["rows"] == 2
+
+    expired = ParamTableStore(max_age=0)
+    expired.load()
+    assert expired.get().monedas is None
+
+
+def test_prevalidate_uses_the_shared_tables(monkeypatch):
+    for name, rows in ROWS.items():
+        param_tables.update(name, rows)
+
+    assert prevalidate_invoice(_invoice()) is None
+    assert prevalidate_invoice(_invoice(DocTipo=86))["response"]["FeCabResp"]["Resultado"] == "R"
+
+    wrong_rate = _invoice(Iva={"AlicIva": [{"Id": 4, "BaseImp": 100.0, "Importe": 21.0}]})
+    monkeypatch.setattr(engine, "DISABLED_RULES", frozenset({"iva_rate"}))
+    assert prevalidate_invoice(wrong_rate) is None
+
+    monkeypatch.setattr(engine, "LOCAL_RULES_ENABLED", False)
+    assert prevalidate_invoice(_invoice(DocTipo=86)) is None
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from service.caea_resilience import db
+from service.persona_cache.cache import (PersonaCache, coalesce,
+                                         is_not_found_message)
+from service.utils.deadline import (ClientDisconnected, RequestDeadline,
+                                    remaining_seconds, run_within_deadline,
+                                    set_request_deadline)
+
+CUIT = 30740253022
+
+
+@pytest.fixture
+def isolated_state_db(tmp_path, monkeypatch):
+    state_db = tmp_path / "afrelay_state.db"
+    monkeypatch.setattr(db, "DB_PATH", Path(state_db))
+    db.init_db()
+    return state_db
+
+
+def test_persona_cache_survives_restart(isolated_state_db):
+    PersonaCache().put(CUIT, 20111111112, "found", {"status": "success", "response": {"idPersona": 20111111112}})
+
+    entry = PersonaCache().get((CUIT, 20111111112))
+
+    assert entry is not None
+    assert entry.kind == "found"
+    assert entry.result["response"]["idPersona"] == 20111111112
+
+
+def test_persona_cache_expires_negative_entries_first(isolated_state_db, monkeypatch):
+    cache = PersonaCache(ttl=3600, negative_ttl=60)
+    cache.put(CUIT, 1, "found", {"status": "success", "response": {}})
+    cache.put(CUIT, 2, "not_found", {"status": "error", "error": {"details": "No existe persona con ese Id"}})
+
+    now = time.time()
+    monkeypatch.setattr("service.persona_cache.cache.time.time", lambda: now + 120)
+
+    assert cache.get((CUIT, 1)) is not None
+    assert cache.get((CUIT, 2)) is None
+    assert PersonaCache().get((CUIT, 2)) is None
+
+
+def test_persona_cache_evicts_least_recently_used(isolated_state_db):
+    cache = PersonaCache(max_entries=2)
+    for id_persona in (1, 2):
+        cache.put(CUIT, id_persona, "found", {"status": "success", "response": {}})
+    cache.get((CUIT, 1))
+    cache.put(CUIT, 3, "found", {"status": "success", "response": {}})
+
+    assert list(cache._memory) == [(CUIT, 1), (CUIT, 3)]
+    # Still served from SQLite after eviction from memory.
+    assert cache.get((CUIT, 2)) is not None
+
+
+def test_persona_cache_is_scoped_to_the_represented_cuit(isolated_state_db):
+    cache = PersonaCache()
+    cache.put(CUIT, 20111111112, "found", {"status": "success", "response": {}})
+
+    assert cache.get((30999999994, 20111111112)) is None
+    assert PersonaCache().get((30999999994, 20111111112)) is None
+    assert PersonaCache().get((CUIT, 20111111112)) is not None
+
+
+@pytest.mark.asyncio
+async def test_coalesced_lookup_survives_the_first_caller_disconnecting():
+    calls = []
+    release = asyncio.Event()
+    first = RequestDeadline(expires_at=time.monotonic() + 60)
+
+    async def fetch():
+        calls.append(remaining_seconds())
+        # Like call_afip: gives up when the deadline in its context does.
+        await run_within_deadline(release.wait)
+        return {"status": "success", "response": {}}
+
+    async def lookup(deadline: RequestDeadline):
+        set_request_deadline(deadline)
+        return await coalesce((CUIT, 1), fetch)
+
+    first_waiter = asyncio.create_task(lookup(first))
+    second_waiter = asyncio.create_task(lookup(RequestDeadline()))
+    await asyncio.sleep(0.01)
+    first.disconnected.set()
+
+    with pytest.raises(ClientDisconnected):
+        await first_waiter
+    release.set()
+
+    assert await second_waiter == {"status": "success", "response": {}}
+    assert calls == [None]
+
+
+def test_not_found_message():
+    assert is_not_found_message("No existe persona con ese Id")
+    assert not is_not_found_message("Error interno")
+    assert not is_not_found_message(None)
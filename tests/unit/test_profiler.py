@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from service.api.app import app
+from service.observability.collector import get_store
+from service.observability.loop_monitor import LoopLagMonitor
+from service.observability.profiler import SamplingProfiler
+from service.utils import jwt_validator
+
+
+def _busy_wait(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profiler_collapses_stacks_by_thread():
+    sampler = SamplingProfiler(interval=0.002)
+    sampler.start()
+    _busy_wait(0.1)
+    sampler.stop()
+
+    collapsed = sampler.collapsed()
+    assert sampler.sample_count > 0
+    assert "_busy_wait (test_profiler.py:" in collapsed
+    assert "afrelay-profiler" not in collapsed
+    for line in collapsed.strip().splitlines():
+        assert line.rsplit(" ", 1)[1].isdigit()
+
+
+def test_profiler_speedscope_shares_frames():
+    sampler = SamplingProfiler(interval=0.002)
+    sampler.start()
+    _busy_wait(0.05)
+    sampler.stop()
+
+    document = sampler.speedscope()
+    frames = document["shared"]["frames"]
+    assert any(frame["name"] == "_busy_wait" for frame in frames)
+    for profile in document["profiles"]:
+        assert profile["type"] == "sampled"
+        assert len(profile["samples"]) == len(profile["weights"])
+        assert all(0 <= index < len(frames) for sample in profile["samples"] for index in sample)
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_reports_blocking_call_with_stack():
+    monitor = LoopLagMonitor(interval=0.02, threshold_ms=50)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        _busy_wait(0.2)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    assert monitor.stalls
+    stall = monitor.stalls[-1]
+    assert stall["lag_ms"] >= 50
+    assert any(frame.startswith("_busy_wait") for frame in stall["stack"])
+    events = get_store().list_domain_events(event_type="event_loop_stall")["items"]
+    assert events and events[0]["payload"]["lag_ms"] == stall["lag_ms"]
+
+
+@pytest.mark.asyncio
+async def test_admin_profile_requires_admin_secret(monkeypatch):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        monkeypatch.setattr(jwt_validator, "ADMIN_SECRET", None)
+        response = await client.get("/admin/profile", headers={"Authorization": "Bearer anything"})
+        assert response.status_code == 403
+
+        monkeypatch.setattr(jwt_validator, "ADMIN_SECRET", "admin-secret")
+        response = await client.get("/admin/profile", headers={"Authorization": "Bearer wrong"})
+        assert response.status_code == 401
+
+        response = await client.get(
+            "/admin/profile",
+            params={"seconds": 0.1, "interval_ms": 5, "format": "speedscope"},
+            headers={"Authorization": "Bearer admin-secret"},
+        )
+        assert response.status_code == 200
+        assert response.json()["profiles"]
+
+        response = await client.get(
+            "/admin/profile", params={"seconds": 120}, headers={"Authorization": "Bearer admin-secret"}
+        )
+        assert response.status_code == 422
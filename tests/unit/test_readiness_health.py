@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from service.controllers import readiness_health_controller as health
+
+
+@pytest.fixture
+def fake_checks(monkeypatch):
+    async def ok_ntp():
+        await asyncio.sleep(0.1)
+        return "OK"
+
+    async def ok_wsfe():
+        await asyncio.sleep(0.1)
+        return {"AppServer": "OK", "DbServer": "OK", "AuthServer": "OK"}
+
+    async def failing_wspci():
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(
+        health,
+        "HEALTH_CHECKS",
+        {"ntp": ok_ntp, "wsfe_health": ok_wsfe, "wspci_health": failing_wspci},
+    )
+    monkeypatch.setattr(health, "_health_cache", {})
+
+
+@pytest.mark.asyncio
+async def test_checks_run_concurrently_and_are_cached(fake_checks):
+    started = time.perf_counter()
+    await health.refresh_health_checks()
+    assert time.perf_counter() - started < 0.19
+
+    result = await health.readiness_health_check()
+    assert result["status"] == "degraded"
+    assert result["ntp"] == "OK"
+    assert result["wsfe_health"]["AppServer"] == "OK"
+    assert result["wspci_health"] == {"status": "error", "message": "connection refused"}
+    assert result["checks"]["wspci_health"]["status"] == "error"
+    assert result["checks"]["ntp"]["stale"] is False
+
+
+@pytest.mark.asyncio
+async def test_slow_check_times_out(fake_checks, monkeypatch):
+    async def hanging():
+        await asyncio.sleep(10)
+
+    monkeypatch.setitem(health.HEALTH_CHECKS, "wsfe_health", hanging)
+    monkeypatch.setattr(health, "HEALTH_CHECK_TIMEOUT_SECONDS", 0.05)
+    await health.refresh_health_checks()
+
+    result = await health.readiness_health_check()
+    assert result["checks"]["wsfe_health"]["error"].startswith("timed out")
@@ -0,0 +1,115 @@
+import httpx
+import pytest
+from zeep.exceptions import Fault
+
+from service.soap_client import resilience
+from service.soap_client.resilience import (CLOSED, HALF_OPEN, OPEN,
+                                            CircuitOpenError, RetryBudget,
+                                            call_afip, get_breaker)
+from service.soap_client.wsfe import consult_afip_wsfe
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried():
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise httpx.ConnectError("refused")
+        return "ok"
+
+    assert await call_afip("wsfe", "FECAESolicitar", flaky) == "ok"
+    assert len(calls) == 3
+    assert get_breaker("wsfe", "FECAESolicitar").state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_faults_are_not_retried_and_do_not_trip_the_breaker():
+    calls = []
+
+    async def fault():
+        calls.append(1)
+        raise Fault("business error")
+
+    for _ in range(resilience.AFIP_BREAKER_FAILURES + 1):
+        with pytest.raises(Fault):
+            await call_afip("wsfe", "FECompConsultar", fault)
+
+    assert len(calls) == resilience.AFIP_BREAKER_FAILURES + 1
+    assert get_breaker("wsfe", "FECompConsultar").state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_recovers(monkeypatch):
+    monkeypatch.setattr(resilience, "AFIP_MAX_ATTEMPTS", 1)
+    calls = []
+
+    async def down():
+        calls.append(1)
+        raise httpx.ConnectError("refused")
+
+    for _ in range(resilience.AFIP_BREAKER_FAILURES):
+        with pytest.raises(httpx.ConnectError):
+            await call_afip("wsfe", "FECAESolicitar", down)
+
+    breaker = get_breaker("wsfe", "FECAESolicitar")
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        await call_afip("wsfe", "FECAESolicitar", down)
+    assert len(calls) == resilience.AFIP_BREAKER_FAILURES
+
+    # Other methods keep their own breaker.
+    assert get_breaker("wsfe", "FECompConsultar").state == CLOSED
+
+    breaker.opened_at -= breaker.open_seconds
+
+    async def up():
+        assert breaker.state == HALF_OPEN
+        return "ok"
+
+    assert await call_afip("wsfe", "FECAESolicitar", up) == "ok"
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_maps_to_error_response(monkeypatch):
+    monkeypatch.setattr(resilience, "AFIP_MAX_ATTEMPTS", 1)
+
+    async def down():
+        raise httpx.ConnectError("refused")
+
+    for _ in range(resilience.AFIP_BREAKER_FAILURES):
+        await consult_afip_wsfe(down, "FECAESolicitar")
+
+    response = await consult_afip_wsfe(down, "FECAESolicitar")
+    assert response["status"] == "error"
+    assert response["error"]["error_type"] == "Circuit open"
+
+
+def test_retry_budget_limits_retries_to_a_fraction_of_traffic():
+    budget = RetryBudget(ratio=0.5, minimum=2)
+    assert budget.try_withdraw() and budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+
+@pytest.mark.asyncio
+async def test_failed_call_withdraws_only_for_retries_taken(monkeypatch):
+    monkeypatch.setattr(resilience, "AFIP_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(resilience, "retry_budget", RetryBudget(ratio=0, minimum=10))
+    calls = []
+
+    async def down():
+        calls.append(1)
+        raise httpx.ConnectError("refused")
+
+    with pytest.raises(httpx.ConnectError):
+        await call_afip("wsfe", "FECompUltimoAutorizado", down)
+
+    assert len(calls) == 3
+    assert resilience.retry_budget.tokens == 8
@@ -0,0 +1,135 @@
+import sqlite3
+import time
+
+import pytest
+
+from service.observability.models import (DomainEventEntry, RequestLogEntry,
+                                          Span)
+from service.observability.shared_store import (PRUNE_EVERY,
+                                                SqliteObservabilityStore)
+
+
+def _log(path="/wsfe/invoices", ok=True, duration_ms=10.0, service="wsfe", error_type=None, status_code=200):
+    return RequestLogEntry(
+        trace_id="trace",
+        method="POST",
+        path=path,
+        status_code=status_code,
+        ok=ok,
+        duration_ms=duration_ms,
+        service=service,
+        error_type=error_type,
+        cuit=30740253022,
+    )
+
+
+def test_workers_share_logs_through_the_same_file(tmp_path):
+    db_path = tmp_path / "obs.db"
+    worker_a = SqliteObservabilityStore(db_path)
+    worker_b = SqliteObservabilityStore(db_path)
+
+    worker_a.add_request_log(_log())
+    worker_b.add_request_log(_log(ok=False, error_type="Network error", status_code=200))
+    worker_b.add_domain_event(DomainEventEntry(event_type="soap_call", service="wsfe", status="success"))
+    worker_a.update_token_status("wsaa", {"valid": True, "expires_at": None})
+    worker_a.flush()
+    worker_b.flush()
+
+    logs = worker_a.list_logs()
+    assert logs["total"] == 2
+    assert logs["items"][0]["error_type"] == "Network error"
+
+    summary = worker_b.get_summary(window_minutes=60)
+    assert summary["total_requests"] == 2
+    assert summary["services"]["wsfe"]["errors"] == 1
+
+    errors = worker_a.get_errors(window_minutes=60)
+    assert errors["items"][0]["key"] == "Network error"
+    assert errors["items"][0]["sample"] == "/wsfe/invoices"
+
+    ops = worker_a.get_operations_summary(window_minutes=60)
+    assert ops["fecae"] == {"success": 1, "error": 1}
+    assert ops["domain_events"]["by_type"] == {"soap_call": 1}
+
+    assert worker_b.list_domain_events(service="wsfe")["total"] == 1
+    assert worker_b.get_token_status()["wsaa"]["valid"] is True
+
+
+def test_tables_are_bounded(tmp_path):
+    store = SqliteObservabilityStore(tmp_path / "obs.db", max_logs=10, max_events=10)
+
+    for _ in range(PRUNE_EVERY * 2):
+        store.add_request_log(_log())
+
+    assert store.list_logs()["total"] <= 10 + PRUNE_EVERY
+
+
+def test_summary_percentile(tmp_path):
+    store = SqliteObservabilityStore(tmp_path / "obs.db")
+    for duration in range(1, 101):
+        store.add_request_log(_log(duration_ms=float(duration)))
+
+    summary = store.get_summary(window_minutes=10)
+    assert summary["p95_ms"] == pytest.approx(95.0, rel=0.02)
+    assert summary["p99_ms"] == pytest.approx(99.0, rel=0.02)
+    assert summary["avg_ms"] == 50.5
+
+
+def test_cursor_pagination_and_trace_lookup(tmp_path):
+    store = SqliteObservabilityStore(tmp_path / "obs.db")
+    for _ in range(5):
+        store.add_request_log(_log())
+    store.add_domain_event(DomainEventEntry(event_type="soap_call", service="wsfe", status="success", trace_id="trace"))
+
+    first = store.list_logs(page_size=3)
+    second = store.list_logs(page_size=3, cursor=first["next_cursor"])
+    seqs = [item["seq"] for item in first["items"] + second["items"]]
+    assert seqs == sorted(seqs, reverse=True) and len(set(seqs)) == 5
+    assert second["next_cursor"] is None
+    assert store.list_logs(cuit=30740253022)["total"] == 5
+
+    trace = store.get_trace("trace")
+    assert len(trace["logs"]) == 5
+    assert len(trace["events"]) == 1
+
+
+def test_spans_round_trip(tmp_path):
+    store = SqliteObservabilityStore(tmp_path / "obs.db")
+    entry = _log()
+    entry.spans = [Span(name="network", start_ms=1.5, duration_ms=20.0)]
+    store.add_request_log(entry)
+
+    item = store.list_logs()["items"][0]
+    assert item["spans"] == [{"name": "network", "start_ms": 1.5, "duration_ms": 20.0}]
+
+
+def test_logs_since_returns_entries_other_workers_wrote_after_the_cursor(tmp_path):
+    db_path = tmp_path / "obs.db"
+    reader = SqliteObservabilityStore(db_path)
+    writer = SqliteObservabilityStore(db_path)
+
+    cursor = reader.logs_since(None)
+    assert cursor["items"] == []
+
+    writer.add_request_log(_log(path="/a"))
+    writer.add_request_log(_log(path="/b"))
+    writer.flush()
+    delta = reader.logs_since(cursor["cursor"])
+    assert [item["path"] for item in delta["items"]] == ["/a", "/b"]
+    assert reader.logs_since(delta["cursor"])["items"] == []
+
+
+def test_writes_do_not_wait_for_a_locked_file(tmp_path):
+    db_path = tmp_path / "obs.db"
+    store = SqliteObservabilityStore(db_path)
+    other_worker = sqlite3.connect(db_path, isolation_level=None)
+    other_worker.execute("BEGIN IMMEDIATE")
+
+    started = time.perf_counter()
+    for _ in range(50):
+        store.add_request_log(_log())
+    assert time.perf_counter() - started < 0.5
+
+    other_worker.execute("ROLLBACK")
+    other_worker.close()
+    assert store.list_logs()["total"] == 50
@@ -1,14 +1,99 @@
-from unittest.mock import patch
+import asyncio
+import time
 
-from service.time.time_management import generate_ntp_timestamp
+import ntplib
+import pytest
+
+from service.time import clock as clock_module
+from service.time.clock import ClockService, clock
+from service.time.time_management import (generate_ntp_timestamp,
+                                          request_ntp_for_readiness)
+
+
+@pytest.fixture(autouse=True)
+def reset_clock():
+    clock.reset()
+    yield
+    clock.reset()
 
 
 def test_generate_ntp_timestamp():
 
-    with patch('ntplib.NTPClient') as MockClient:
-        instance = MockClient.return_value
-        instance.request.return_value.tx_time = 1673356800
+    clock.set_offset(120.0)
+
+    epoch, gen_time, exp_time = generate_ntp_timestamp()
+
+    assert abs(epoch - (time.time() + 120.0)) <= 1
+    assert gen_time.endswith("Z")
+    assert exp_time > gen_time
+
+
+def test_generate_ntp_timestamp_falls_back_to_system_clock():
+
+    epoch, _, _ = generate_ntp_timestamp()
+
+    assert abs(epoch - time.time()) <= 1
+
+
+def test_readiness_uses_cached_sync_state(monkeypatch):
+
+    assert request_ntp_for_readiness() is False
+
+    clock.set_offset(0.0)
+    assert request_ntp_for_readiness() is True
+
+    monkeypatch.setattr(clock_module, "CLOCK_MAX_STALENESS_SECONDS", -1)
+    assert request_ntp_for_readiness() is False
+
+
+class _FakeNTPServer(asyncio.DatagramProtocol):
+    offset = 30.0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        query = ntplib.NTPPacket()
+        query.from_data(data)
+        server_time = ntplib.system_to_ntp_time(time.time() + self.offset)
+        reply = ntplib.NTPPacket(mode=4, version=3, tx_timestamp=server_time)
+        reply.stratum = 2
+        reply.orig_timestamp = query.tx_timestamp
+        reply.recv_timestamp = server_time
+        self.transport.sendto(reply.to_data(), addr)
+
+
+@pytest.mark.asyncio
+async def test_refresh_measures_offset_over_udp(monkeypatch):
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(_FakeNTPServer, local_addr=("127.0.0.1", 0))
+    port = transport.get_extra_info("sockname")[1]
+
+    original_endpoint = loop.create_datagram_endpoint
+
+    def _to_fake_server(factory, remote_addr=None, **kwargs):
+        return original_endpoint(factory, remote_addr=("127.0.0.1", port), **kwargs)
+
+    monkeypatch.setattr(loop, "create_datagram_endpoint", _to_fake_server)
+    service = ClockService(server="ntp.test")
+    try:
+        assert await service.refresh() is True
+    finally:
+        transport.close()
+
+    assert service.offset_seconds == pytest.approx(30.0, abs=0.5)
+    assert service.now().timestamp() == pytest.approx(time.time() + 30.0, abs=0.5)
+    assert service.staleness_seconds() < 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_failure_keeps_previous_state(monkeypatch):
+    async def _timeout(*args, **kwargs):
+        raise asyncio.TimeoutError()
 
-        epoch, gen_time, exp_time = generate_ntp_timestamp()
+    monkeypatch.setattr(clock_module, "query_ntp", _timeout)
+    service = ClockService()
 
-        assert epoch == 1673356800
\ No newline at end of file
+    assert await service.refresh() is False
+    assert service.synced is False
+    assert service.last_error == "TimeoutError"
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from config.paths import AfipPaths
+from service.observability.collector import get_store
+from service.time.clock import clock
+from service.utils.token_lifecycle import TokenLifecycle
+
+TICKET = """<?xml version='1.0' encoding='UTF-8'?>
+<loginTicketResponse version="1.0">
+    <header>
+        <expirationTime>{expiration}</expirationTime>
+    </header>
+    <credentials><token>fake_token</token><sign>fake_sign</sign></credentials>
+</loginTicketResponse>
+"""
+
+
+class FakeScheduler:
+    def __init__(self) -> None:
+        self.jobs: dict[str, dict] = {}
+
+    def add_job(self, func, **kwargs) -> None:
+        self.jobs[kwargs["id"]] = {"func": func, **kwargs}
+
+
+@pytest.fixture
+def afip_paths(tmp_path):
+    return AfipPaths(base_xml=tmp_path, base_crypto=tmp_path, base_certs=tmp_path)
+
+
+def write_ticket(afip_paths, expires_at: datetime) -> None:
+    afip_paths.login_response.write_text(TICKET.format(expiration=expires_at.isoformat()), encoding="utf-8")
+
+
+def last_event() -> dict:
+    return get_store().list_domain_events(event_type="token_lifecycle", page_size=1)["items"][0]
+
+
+def make_lifecycle(renew, **kwargs) -> TokenLifecycle:
+    options = {"margin_seconds": 900, "jitter_seconds": 300, "retry_base_seconds": 30, "retry_max_seconds": 120}
+    options.update(kwargs)
+    return TokenLifecycle("wsaa", "loginTicketResponse.xml", renew, **options)
+
+
+async def failing_renew() -> dict:
+    return {"status": "error generating access token."}
+
+
+def test_start_schedules_one_shot_renewal_before_expiration(afip_paths):
+    expires_at = clock.now() + timedelta(hours=12)
+    write_ticket(afip_paths, expires_at)
+    scheduler = FakeScheduler()
+
+    lifecycle = make_lifecycle(failing_renew, rng=lambda: 0.5)
+    lifecycle.start(scheduler)
+
+    job = scheduler.jobs["wsaa_token_renewal"]
+    assert job["trigger"] == "date"
+    assert abs((job["run_date"] - (expires_at - timedelta(seconds=900))).total_seconds()) < 1
+    assert lifecycle.expires_at == expires_at.astimezone(timezone.utc)
+
+    event = last_event()
+    assert event["event_type"] == "token_lifecycle"
+    assert event["status"] == "scheduled"
+    assert 12 * 3600 - 5 < event["payload"]["seconds_to_expiry"] <= 12 * 3600
+
+
+@pytest.mark.parametrize("draw, offset", [(0.0, -300), (1.0, 300)])
+def test_jitter_spreads_renewal_around_margin(afip_paths, draw, offset):
+    lifecycle = make_lifecycle(failing_renew, rng=lambda: draw)
+    now = clock.now()
+    lifecycle.expires_at = now + timedelta(hours=12)
+
+    renew_at = lifecycle.next_renewal(now)
+
+    assert renew_at == lifecycle.expires_at - timedelta(seconds=900) + timedelta(seconds=offset)
+
+
+def test_jitter_never_exceeds_half_the_margin():
+    lifecycle = make_lifecycle(failing_renew, margin_seconds=600, jitter_seconds=3600)
+
+    assert lifecycle.jitter_seconds == 300
+
+
+def test_missing_ticket_is_renewed_immediately(afip_paths):
+    scheduler = FakeScheduler()
+    lifecycle = make_lifecycle(failing_renew)
+    before = clock.now()
+
+    lifecycle.start(scheduler)
+
+    assert lifecycle.expires_at is None
+    assert scheduler.jobs["wsaa_token_renewal"]["run_date"] >= before
+    assert scheduler.jobs["wsaa_token_renewal"]["run_date"] <= clock.now()
+
+
+@pytest.mark.asyncio
+async def test_successful_renewal_schedules_next_cycle(afip_paths):
+    renewed_until = clock.now() + timedelta(hours=12)
+
+    async def renew():
+        write_ticket(afip_paths, renewed_until)
+        return {"status": "success"}
+
+    scheduler = FakeScheduler()
+    lifecycle = make_lifecycle(renew, rng=lambda: 0.5)
+    lifecycle.start(scheduler)
+    await lifecycle.run()
+
+    assert lifecycle.failures == 0
+    assert lifecycle.expires_at == renewed_until.astimezone(timezone.utc)
+    assert abs((scheduler.jobs["wsaa_token_renewal"]["run_date"] - (renewed_until - timedelta(seconds=900))).total_seconds()) < 1
+    assert last_event()["status"] == "renewed"
+
+
+@pytest.mark.asyncio
+async def test_failed_renewals_back_off_exponentially(afip_paths):
+    calls = 0
+
+    async def renew():
+        nonlocal calls
+        calls += 1
+        raise OSError("certificate not readable")
+
+    scheduler = FakeScheduler()
+    lifecycle = make_lifecycle(renew)
+    lifecycle.start(scheduler)
+
+    delays = []
+    for _ in range(4):
+        before = clock.now()
+        await lifecycle.run()
+        delays.append(round((scheduler.jobs["wsaa_token_renewal"]["run_date"] - before).total_seconds()))
+
+    assert calls == 4
+    assert lifecycle.failures == 4
+    assert delays == [30, 60, 120, 120]
+    assert last_event()["status"] == "retry_scheduled"
+
+
+@pytest.mark.asyncio
+async def test_ticket_renewed_elsewhere_is_followed_without_renewing(afip_paths):
+    calls = 0
+
+    async def renew():
+        nonlocal calls
+        calls += 1
+        return {"status": "success"}
+
+    write_ticket(afip_paths, clock.now() + timedelta(minutes=10))
+    scheduler = FakeScheduler()
+    lifecycle = make_lifecycle(renew, rng=lambda: 0.5)
+    lifecycle.start(scheduler)
+
+    renewed_until = clock.now() + timedelta(hours=12)
+    write_ticket(afip_paths, renewed_until)
+    await lifecycle.run()
+
+    assert calls == 0
+    assert lifecycle.expires_at == renewed_until.astimezone(timezone.utc)
+    assert scheduler.jobs["wsaa_token_renewal"]["run_date"] > clock.now() + timedelta(hours=11)
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from service.observability import tracing
+
+
+def test_spans_are_recorded_relative_to_trace_origin():
+    token = tracing.start_trace()
+    with tracing.span("auth_load"):
+        time.sleep(0.002)
+    spans = tracing.finish_trace(token)
+
+    assert [s.name for s in spans] == ["auth_load"]
+    assert spans[0].duration_ms >= 2.0
+    assert spans[0].start_ms >= 0
+    assert tracing.current_spans() == []
+
+
+def test_spans_outside_a_request_are_dropped():
+    with tracing.span("orphan"):
+        pass
+    assert tracing.current_spans() == []
+
+
+def test_split_span_around_network():
+    token = tracing.start_trace()
+    started = time.perf_counter()
+    time.sleep(0.001)
+    with tracing.span("network"):
+        time.sleep(0.002)
+    time.sleep(0.001)
+    tracing.split_span(started, "network", before="soap_build", after="soap_parse")
+    spans = {s.name: s for s in tracing.finish_trace(token)}
+
+    assert spans["soap_build"].duration_ms >= 1.0
+    assert spans["soap_parse"].duration_ms >= 1.0
+    assert spans["soap_build"].start_ms <= spans["network"].start_ms
+
+
+def test_traced_decorator_and_child_tasks_share_the_trace():
+    @tracing.traced("work")
+    async def work():
+        await asyncio.sleep(0)
+
+    async def run():
+        token = tracing.start_trace()
+        await asyncio.gather(work(), work())
+        return tracing.finish_trace(token)
+
+    spans = asyncio.run(run())
+    assert [s.name for s in spans] == ["work", "work"]
+    header = tracing.server_timing_header(spans, 12.34)
+    assert header.endswith("total;dur=12.3")
+    assert header.startswith("work;dur=")
@@ -0,0 +1,146 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from service.caea_resilience import db
+from service.caea_resilience import repository as repo
+from service.observability import ui_stream
+from service.observability.models import DomainEventEntry, RequestLogEntry
+from service.observability.store import ObservabilityStore
+from service.observability.ui_stream import (DROPPED, UiStreamHub, format_sse,
+                                             sse_messages)
+
+
+def _log(ok=True, error_type=None):
+    return RequestLogEntry(
+        trace_id="trace",
+        method="POST",
+        path="/wsfe/invoices",
+        status_code=200,
+        ok=ok,
+        duration_ms=10.0,
+        service="wsfe",
+        error_type=error_type,
+    )
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", Path(tmp_path / "afrelay_state.db"))
+    db.init_db()
+    store = ObservabilityStore()
+    monkeypatch.setattr(ui_stream, "get_store", lambda: store)
+    monkeypatch.setattr(ui_stream, "refresh_token_state_from_files", lambda: None)
+    return store
+
+
+def _idle_hub(**kwargs) -> UiStreamHub:
+    hub = UiStreamHub(interval=3600, **kwargs)
+    hub.collect = lambda windows: []
+    return hub
+
+
+def _by_type(deltas):
+    return {event_type: data for event_type, data, _ in deltas}
+
+
+def test_collect_returns_only_what_changed_since_the_last_scan(store):
+    store.add_request_log(_log())
+    hub = UiStreamHub()
+
+    # The first scan only sets cursors and the baseline for aggregates and alerts.
+    first = _by_type(hub.collect({60}))
+    assert "logs" not in first and "outbox" not in first
+    assert first["metrics"]["summary"]["total_requests"] == 1
+
+    assert hub.collect({60}) == []
+
+    store.add_request_log(_log(ok=False, error_type="Network error"))
+    store.add_domain_event(DomainEventEntry(event_type="soap_call", service="wsfe", status="error"))
+    repo.add_outbox_job("inform_caea_invoice", "invoice:30740253022:1", {"id": 1})
+
+    deltas = hub.collect({60})
+    changed = _by_type(deltas)
+    assert [item["error_type"] for item in changed["logs"]["items"]] == ["Network error"]
+    assert [item["event_type"] for item in changed["events"]["items"]] == ["soap_call"]
+    assert changed["metrics"]["summary"]["error_count"] == 1
+    assert [item["job_type"] for item in changed["outbox"]["changed"]] == ["inform_caea_invoice"]
+    assert changed["outbox"]["summary"]["pending"] == 1
+    metrics_window = next(window for event_type, _, window in deltas if event_type == "metrics")
+    assert metrics_window == 60
+
+
+def test_outbox_changes_sharing_an_updated_at_are_not_skipped(store, monkeypatch):
+    monkeypatch.setattr(repo, "_now_iso", lambda: "2026-01-01T00:00:00+00:00")
+    _, cursor = repo.list_outbox_changes(None)
+    for nro in range(1, 4):
+        repo.add_outbox_job("inform_caea_invoice", f"invoice:30740253022:{nro}", {"id": nro})
+
+    first, cursor = repo.list_outbox_changes(cursor, limit=2)
+    rest, _ = repo.list_outbox_changes(cursor, limit=2)
+
+    assert [item["idempotency_key"] for item in first + rest] == [
+        f"invoice:30740253022:{nro}" for nro in range(1, 4)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_and_drops_slow_consumers():
+    hub = _idle_hub(queue_size=2)
+    fast = hub.subscribe(window_minutes=60)
+    slow = hub.subscribe(window_minutes=15)
+    try:
+        hub.publish("logs", {"items": [1]})
+        hub.publish("metrics", {"summary": {}}, window_minutes=60)
+        assert fast.queue.qsize() == 2
+        assert slow.queue.qsize() == 1
+
+        fast.queue.get_nowait()
+        fast.queue.get_nowait()
+        for i in range(2):
+            hub.publish("logs", {"items": [i]})
+
+        assert slow.dropped and not fast.dropped
+        assert hub.subscriber_count == 1
+        assert slow.queue.get_nowait() is DROPPED
+        assert slow.queue.empty()
+    finally:
+        await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_sse_messages_formats_events_and_unsubscribes_on_drop():
+    hub = _idle_hub()
+    subscriber = hub.subscribe()
+    hub.publish("alerts", {"active": [], "raised": [], "resolved": ["r1"]})
+    subscriber.queue.put_nowait(DROPPED)
+
+    chunks = [chunk async for chunk in sse_messages(hub, subscriber, heartbeat=0.01)]
+
+    assert chunks[0].startswith("retry: ")
+    assert chunks[1] == format_sse(1, "alerts", {"active": [], "raised": [], "resolved": ["r1"]})
+    assert chunks[2].startswith("id: 0\nevent: dropped\n")
+    assert hub.subscriber_count == 0
+    # The producer stops with the last subscriber.
+    assert hub._task is None
+
+
+@pytest.mark.asyncio
+async def test_sse_messages_sends_keepalives_while_idle():
+    hub = _idle_hub()
+    subscriber = hub.subscribe()
+    stream = sse_messages(hub, subscriber, heartbeat=0.01)
+    try:
+        await stream.__anext__()
+        assert await stream.__anext__() == ": keepalive\n\n"
+    finally:
+        await stream.aclose()
+    assert hub.subscriber_count == 0
+
+
+def test_format_sse_is_one_compact_data_line():
+    message = format_sse(7, "tokens", {"wsaa": {"valid": True}})
+    assert message == 'id: 7\nevent: tokens\ndata: {"wsaa":{"valid":true}}\n\n'
+    assert json.loads(message.split("data: ")[1]) == {"wsaa": {"valid": True}}
@@ -1,8 +1,11 @@
 from unittest.mock import MagicMock
 
+from lxml import etree
+
+from config.paths import AfipPaths
 from service.xml_management.xml_builder import (
     build_login_ticket_request, extract_token_and_sign_from_xml, is_expired,
-    is_expiring_soon, parse_and_save_loginticketresponse, xml_exists)
+    parse_and_save_loginticketresponse, read_cached, save_xml, xml_exists)
 
 
 def test_build_login_ticket_request():
@@ -65,37 +68,45 @@ def test_loginTicketRequest_is_expired():
     assert expired == False
 
 
-def test_loginTicketResponse_is_expiring_soon_true():
+def test_loginTicketRequest_exists():
 
-    def fake_time_provider():
-        return (
-            1767807000,
-            "2026-01-07T17:30:00Z",
-            "2026-01-07T17:40:00Z",
-        )
+    exists = xml_exists("loginTicketRequest.xml")
+    assert exists == True
 
-    expiring = is_expiring_soon("loginTicketResponse.xml", fake_time_provider, renew_before_minutes=15)
-    assert expiring is True
+def test_loginTicketResponse_exists():
 
+    exists = xml_exists("loginTicketResponse.xml")
+    assert exists == True
 
-def test_loginTicketResponse_is_expiring_soon_false():
+def test_save_xml_replaces_file_without_leftovers(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.paths.get_afip_paths", lambda: AfipPaths(tmp_path, tmp_path, tmp_path))
+    (tmp_path / "loginTicketResponse.xml").write_text("<old/>", encoding="utf-8")
 
-    def fake_time_provider():
-        return (
-            1767796200,
-            "2026-01-07T14:30:00Z",
-            "2026-01-07T14:40:00Z",
-        )
+    save_xml(etree.Element("loginTicketResponse"), "loginTicketResponse.xml")
 
-    expiring = is_expiring_soon("loginTicketResponse.xml", fake_time_provider, renew_before_minutes=15)
-    assert expiring is False
+    assert etree.parse(str(tmp_path / "loginTicketResponse.xml")).getroot().tag == "loginTicketResponse"
+    assert [path.name for path in tmp_path.iterdir()] == ["loginTicketResponse.xml"]
 
-def test_loginTicketRequest_exists():
 
-    exists = xml_exists("loginTicketRequest.xml")
-    assert exists == True
+def test_read_cached_parses_again_only_after_save(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.paths.get_afip_paths", lambda: AfipPaths(tmp_path, tmp_path, tmp_path))
+    path = tmp_path / "loginTicketResponse.xml"
+    parsed = []
 
-def test_loginTicketResponse_exists():
+    def parse(path):
+        parsed.append(path)
+        return etree.parse(str(path)).getroot().findtext(".//token")
 
-    exists = xml_exists("loginTicketResponse.xml")
-    assert exists == True
+    def save(token):
+        root = etree.Element("loginTicketResponse")
+        etree.SubElement(etree.SubElement(root, "credentials"), "token").text = token
+        save_xml(root, "loginTicketResponse.xml")
+
+    save("first")
+    assert read_cached(path, parse) == "first"
+    assert read_cached(path, parse) == "first"
+    assert len(parsed) == 1
+
+    save("second")
+    assert read_cached(path, parse) == "second"
+    assert len(parsed) == 2